@@ -0,0 +1,56 @@
+# File: benchmarks/afk_memory.py
+"""
+Memory cost per AFK entry at scale.
+
+Compares the old dict-of-dicts layout with the slotted AfkRecord store.
+
+Usage:
+    python -m benchmarks.afk_memory [entries]
+"""
+import html
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from utils.afk_store import AfkRecord, DEFAULT_REASON
+
+DEFAULT_ENTRIES = 1_000_000
+
+
+def build_dict_of_dicts(entries: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        user_id: {'since': now.replace(microsecond=user_id % 1_000_000), 'reason': html.escape("AFK")}
+        for user_id in range(entries)
+    }
+
+
+def build_slotted(entries: int) -> dict:
+    now = time.time()
+    return {user_id: AfkRecord(now + user_id * 1e-6, DEFAULT_REASON) for user_id in range(entries)}
+
+
+def measure(name: str, builder, entries: int) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = builder(entries)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<16} {len(data):>10,} entries  {current / 2**20:8.1f} MiB  "
+        f"{current / entries:6.1f} B/entry  built in {elapsed:.2f}s"
+    )
+    del data
+
+
+def main() -> None:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENTRIES
+    measure("dict of dicts", build_dict_of_dicts, entries)
+    measure("slotted records", build_slotted, entries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# File: benchmarks/fake_bot_api.py
+"""
+A local stand-in for the Telegram Bot API.
+
+Answers the methods this bot calls with well-formed results so the real
+handlers can run without touching Telegram. Every call can be delayed by a
+fixed latency plus jitter, and a share of calls can be refused with 429 to
+exercise the flood-limit paths.
+
+Usage:
+    python -m benchmarks.fake_bot_api [--port 8081] [--latency 0.05] [--flood-rate 0.01]
+
+Point a bot at it with base_url="http://127.0.0.1:<port>/bot".
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Parameters that are sent as plain strings and must not be JSON-decoded
+TEXT_PARAMS = {"text", "caption", "title", "description", "custom_title", "callback_data", "animation", "photo", "document"}
+
+# Never refused with 429, so start-up and polling stay reliable
+FLOOD_EXEMPT = {"getMe", "getUpdates", "deleteWebhook", "close", "logOut"}
+
+MethodResult = Callable[[Dict[str, Any]], Any]
+
+
+class FakeBotAPI:
+    """
+    In-memory Bot API server.
+
+    Message ids are handed out per chat from one counter, shared with any
+    traffic generator that calls `next_message_id`, so ids the bot sends and
+    receives interleave the way they do on Telegram.
+
+    Args:
+        latency: Seconds added to every call
+        jitter: Extra random delay of up to this many seconds per call
+        flood_rate: Share of calls (0-1) answered with 429 Too Many Requests
+        retry_after: retry_after sent with each 429
+        admins: User ids reported as the creator of every group
+        seed: Seed for jitter and 429 injection
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        admins: Iterable[int] = (),
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.admins = set(admins)
+        self._random = random.Random(seed)
+
+        self.bot_user: Dict[str, Any] = {}
+        self.calls: Counter = Counter()
+        self.floods: Counter = Counter()
+        self._message_ids: Dict[int, int] = {}
+        self._updates: List[Dict[str, Any]] = []
+        self._next_update_id = 1
+        self._updates_ready = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+        self._methods: Dict[str, MethodResult] = {
+            "getMe": lambda params: self.bot_user,
+            "deleteWebhook": lambda params: True,
+            "setMyCommands": lambda params: True,
+            "sendMessage": lambda params: self._message(params, text=params.get("text", "")),
+            "sendAnimation": lambda params: self._message(params, caption=params.get("caption"), animation=self._file("animation")),
+            "sendPhoto": lambda params: self._message(params, caption=params.get("caption"), photo=[self._photo()]),
+            "sendDocument": lambda params: self._message(params, caption=params.get("caption"), document=self._file("document")),
+            "editMessageText": self._edited_message,
+            "deleteMessage": lambda params: True,
+            "deleteMessages": lambda params: True,
+            "pinChatMessage": lambda params: True,
+            "unpinChatMessage": lambda params: True,
+            "answerCallbackQuery": lambda params: True,
+            "restrictChatMember": lambda params: True,
+            "banChatMember": lambda params: True,
+            "unbanChatMember": lambda params: True,
+            "setChatPermissions": lambda params: True,
+            "leaveChat": lambda params: True,
+            "getChat": lambda params: self.chat(params["chat_id"]),
+            "getChatMember": lambda params: self._member(params["chat_id"], params["user_id"]),
+            "getChatAdministrators": self._administrators,
+            "getChatMemberCount": lambda params: 100,
+        }
+
+    # ---------------- Lifecycle ----------------
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token: str = "123456:FAKE",
+        username: Optional[str] = None
+    ) -> str:
+        """
+        Start serving.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind; 0 picks a free one
+            token: Token the bot will use; its numeric part becomes the bot's id
+            username: The bot's username; derived from its id if omitted
+
+        Returns:
+            str: The base_url to give the bot
+        """
+        bot_id = int(token.split(":", 1)[0])
+        self.bot_user = {
+            "id": bot_id,
+            "is_bot": True,
+            "first_name": "Benchmark Bot",
+            "username": username or f"bench{bot_id}_bot",
+            "can_join_groups": True,
+            "can_read_all_group_messages": False,
+            "supports_inline_queries": False,
+        }
+
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/bot{token}/{method}", self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self._runner = runner
+
+        bound_port = runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}/bot"
+        logger.info(f"🧪 Fake Bot API listening on {self.base_url}")
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---------------- Traffic ----------------
+    def next_message_id(self, chat_id: int) -> int:
+        message_id = self._message_ids.get(chat_id, 0) + 1
+        self._message_ids[chat_id] = message_id
+        return message_id
+
+    def push_update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue an update for getUpdates, assigning its update_id."""
+        update["update_id"] = self._next_update_id
+        self._next_update_id += 1
+        self._updates.append(update)
+        self._updates_ready.set()
+        return update
+
+    def reset_counts(self) -> None:
+        self.calls.clear()
+        self.floods.clear()
+
+    # ---------------- Request handling ----------------
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await _read_params(request)
+        self.calls[method] += 1
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if method not in FLOOD_EXEMPT and self.flood_rate and self._random.random() < self.flood_rate:
+            self.floods[method] += 1
+            return _error(429, f"Too Many Requests: retry after {self.retry_after}", retry_after=self.retry_after)
+
+        if method == "getUpdates":
+            return _ok(await self._get_updates(params))
+
+        handler = self._methods.get(method)
+        if handler is None:
+            return _error(400, f"Bad Request: method {method} is not implemented by the fake server")
+        try:
+            return _ok(handler(params))
+        except (KeyError, ValueError) as e:
+            return _error(400, f"Bad Request: invalid parameters for {method}: {e}")
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = params.get("offset") or 0
+        # A later offset confirms everything before it
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+
+        if not self._updates and params.get("timeout"):
+            self._updates_ready.clear()
+            try:
+                await asyncio.wait_for(self._updates_ready.wait(), params["timeout"])
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[: params.get("limit") or 100]
+
+    # ---------------- Result objects ----------------
+    def chat(self, chat_id: Any) -> Dict[str, Any]:
+        chat_id = int(chat_id)
+        if chat_id > 0:
+            return {"id": chat_id, "type": "private", "first_name": f"User {chat_id}"}
+        return {"id": chat_id, "type": "supergroup", "title": f"Group {chat_id}"}
+
+    def user(self, user_id: Any) -> Dict[str, Any]:
+        user_id = int(user_id)
+        if user_id == self.bot_user["id"]:
+            return self.bot_user
+        return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+
+    def _message(self, params: Dict[str, Any], **content: Any) -> Dict[str, Any]:
+        chat_id = int(params["chat_id"])
+        message = {
+            "message_id": self.next_message_id(chat_id),
+            "date": int(time.time()),
+            "chat": self.chat(chat_id),
+            "from": self.bot_user,
+        }
+        message.update({key: value for key, value in content.items() if value is not None})
+        return message
+
+    def _edited_message(self, params: Dict[str, Any]) -> Any:
+        if "inline_message_id" in params:
+            return True
+        chat_id = int(params["chat_id"])
+        return {
+            "message_id": int(params["message_id"]),
+            "date": int(time.time()),
+            "edit_date": int(time.time()),
+            "chat": self.chat(chat_id),
+            "from": self.bot_user,
+            "text": params.get("text", ""),
+        }
+
+    def _file(self, kind: str) -> Dict[str, Any]:
+        file_id = f"{kind}-{self._random.getrandbits(48):x}"
+        if kind == "animation":
+            return {"file_id": file_id, "file_unique_id": file_id, "width": 320, "height": 240, "duration": 3}
+        return {"file_id": file_id, "file_unique_id": file_id}
+
+    def _photo(self) -> Dict[str, Any]:
+        file_id = f"photo-{self._random.getrandbits(48):x}"
+        return {"file_id": file_id, "file_unique_id": file_id, "width": 640, "height": 480}
+
+    def _member(self, chat_id: Any, user_id: Any) -> Dict[str, Any]:
+        user_id = int(user_id)
+        if user_id == self.bot_user["id"]:
+            return _administrator(self.bot_user)
+        if user_id in self.admins:
+            return {"status": "creator", "user": self.user(user_id), "is_anonymous": False}
+        return {"status": "member", "user": self.user(user_id)}
+
+    def _administrators(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        members = [{"status": "creator", "user": self.user(user_id), "is_anonymous": False} for user_id in sorted(self.admins)]
+        members.append(_administrator(self.bot_user))
+        return members
+
+
+def _administrator(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "status": "administrator",
+        "user": user,
+        "can_be_edited": False,
+        "is_anonymous": False,
+        "can_manage_chat": True,
+        "can_delete_messages": True,
+        "can_manage_video_chats": True,
+        "can_restrict_members": True,
+        "can_promote_members": False,
+        "can_change_info": True,
+        "can_invite_users": True,
+        "can_pin_messages": True,
+    }
+
+
+async def _read_params(request: web.Request) -> Dict[str, Any]:
+    """Decode form or JSON parameters; non-text values arrive JSON-encoded."""
+    if request.content_type == "application/json":
+        return await request.json()
+
+    params = {}
+    for key, value in (await request.post()).items():
+        if not isinstance(value, str) or key in TEXT_PARAMS:
+            params[key] = value
+            continue
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    params.update({key: value for key, value in request.query.items() if key not in params})
+    return params
+
+
+def _ok(result: Any) -> web.Response:
+    return web.json_response({"ok": True, "result": result})
+
+
+def _error(code: int, description: str, retry_after: Optional[int] = None) -> web.Response:
+    body: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+    if retry_after is not None:
+        body["parameters"] = {"retry_after": retry_after}
+    return web.json_response(body, status=code)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    api = FakeBotAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+        admins=args.admin,
+        seed=args.seed
+    )
+    base_url = await api.start(args.host, args.port, args.token)
+    print(f"Fake Bot API on {base_url} (token {args.token}). Ctrl+C to stop.")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        print(f"Calls: {dict(api.calls)}")
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay per call, in seconds")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="share of calls answered with 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after sent with each 429")
+    parser.add_argument("--seed", type=int, default=None, help="seed for jitter and 429 injection")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--token", default="123456:FAKE")
+    parser.add_argument("--admin", type=int, action="append", default=[], help="user id reported as group creator")
+    add_server_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
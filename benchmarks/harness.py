@@ -0,0 +1,122 @@
+# File: benchmarks/harness.py
+"""
+Runs the real bot against the fake Bot API, for the benchmark tools.
+
+run_isolated must wrap the tool's entry point, since the environment it
+sets is read when config is first imported.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Awaitable, Callable, List, Optional
+
+from benchmarks.fake_bot_api import FakeBotAPI, add_server_arguments
+
+TOKEN = "123456:BENCHMARK"
+
+
+def add_harness_arguments(parser: argparse.ArgumentParser) -> None:
+    add_server_arguments(parser)
+    parser.add_argument("--log", help="write the bot's warnings and errors to this file")
+
+
+def run_isolated(main: Callable[[], Awaitable[None]]) -> None:
+    """
+    Run a benchmark with a throwaway data directory.
+
+    The metrics endpoint and update recording are switched off, so a run
+    can't clash with a live bot on the same machine.
+    """
+    data_dir = tempfile.mkdtemp(prefix="bot-benchmark-")
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["RECORD_UPDATES"] = "0"
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def route_logs(log_file: Optional[str]) -> None:
+    """Send the bot's warnings to a file, or drop its logs entirely."""
+    # Rendering rich tracebacks for refused calls costs more than the handlers themselves
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if log_file:
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(logging.WARNING)
+    else:
+        logging.disable(logging.CRITICAL)
+
+
+class BotUnderTest:
+    """
+    The application built by bot.build_application, running against a fake
+    Bot API with state loaded as on_startup would.
+
+    Used as `async with BotUnderTest(api) as app:`. The cat pool warm-up is
+    skipped since it would call the real cat API.
+    """
+
+    def __init__(self, api: FakeBotAPI, token: str = TOKEN, username: Optional[str] = None, log_file: Optional[str] = None):
+        self.api = api
+        self.token = token
+        self.username = username
+        self.log_file = log_file
+        self.app = None
+
+    async def __aenter__(self):
+        from bot import build_application
+        from utils.afk_store import afk_store
+        from utils.group_registry import group_registry
+        from utils.storage import storage
+        from utils.sudo_admins import sudo_index
+
+        route_logs(self.log_file)
+        base_url = await self.api.start(token=self.token, username=self.username)
+        self.app = build_application(self.token, base_url=base_url)
+        await self.app.initialize()
+
+        await storage.open()
+        await group_registry.load()
+        await sudo_index.reload()
+        await afk_store.load()
+        self.app.bot_data.update(await storage.load_settings())
+        await self.app.start()
+        return self.app
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        from utils.afk_store import afk_store
+        from utils.group_registry import group_registry
+        from utils.storage import storage
+
+        await self.app.stop()
+        await group_registry.flush()
+        await afk_store.flush()
+        await storage.close()
+        await self.app.shutdown()
+        await self.api.stop()
+
+
+async def feed(app, updates: List[Any]) -> None:
+    """Queue updates the way the poller does and wait until all are handled."""
+    for update in updates:
+        app.update_queue.put_nowait(update)
+    await app.update_queue.join()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list; 0.0 if it's empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
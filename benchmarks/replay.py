@@ -0,0 +1,218 @@
+# File: benchmarks/replay.py
+"""
+Replay a recorded update stream against the fake Bot API.
+
+Feeds a recording made with RECORD_UPDATES=1 through the bot's full
+handler stack at its original pace, N times faster, or as fast as the bot
+takes updates. Reports throughput, update latency and the Bot API calls
+issued per update, overall and by kind of update.
+
+Usage:
+    python -m benchmarks.replay RECORDING [--speed 1|N|max] [--admin ID ...]
+        [--latency S] [--jitter S] [--flood-rate P] [--log FILE]
+
+Anonymised recordings use pseudonymous ids, so the bot owner and group
+admins aren't recognised; pass their recorded ids with --admin to have
+admin commands succeed.
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from telegram import Update
+from telegram.ext import TypeHandler
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.harness import BotUnderTest, add_harness_arguments, percentile, run_isolated
+
+# Marker handlers run before and after every other handler group
+FIRST_GROUP = -10**6
+LAST_GROUP = 10**6
+
+
+class UpdateTrace:
+    __slots__ = ("kind", "queued", "started", "finished", "calls_before", "calls")
+
+    def __init__(self, kind: str, queued: float):
+        self.kind = kind
+        self.queued = queued
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.calls_before = 0
+        self.calls = 0
+
+
+class Tracer:
+    """
+    Times each update and counts the API calls made while it is handled.
+
+    Updates are handled one at a time, so calls between the start and end
+    markers belong to that update. Jobs and non-blocking handlers running at
+    the same time are counted against it too.
+    """
+
+    def __init__(self, api: FakeBotAPI):
+        self.api = api
+        self.traces: Dict[int, UpdateTrace] = {}
+
+    def install(self, app) -> None:
+        app.add_handler(TypeHandler(Update, self.on_start), group=FIRST_GROUP)
+        app.add_handler(TypeHandler(Update, self.on_finish), group=LAST_GROUP)
+
+    def queued(self, update) -> None:
+        self.traces[update.update_id] = UpdateTrace(update_kind(update), time.perf_counter())
+
+    async def on_start(self, update, context) -> None:
+        trace = self.traces.get(update.update_id)
+        if trace is not None:
+            trace.started = time.perf_counter()
+            trace.calls_before = sum(self.api.calls.values())
+
+    async def on_finish(self, update, context) -> None:
+        trace = self.traces.get(update.update_id)
+        if trace is not None:
+            trace.finished = time.perf_counter()
+            trace.calls = sum(self.api.calls.values()) - trace.calls_before
+
+
+def update_kind(update) -> str:
+    """"/command" for commands, the update type otherwise."""
+    from utils.metrics import update_type
+
+    message = update.message
+    if message and message.text and message.text.startswith("/"):
+        return message.text.split()[0].split("@")[0]
+    return update_type(update)
+
+
+async def replay(app, tracer: Tracer, entries, speed: Optional[float]) -> float:
+    """
+    Queue every recorded update, paced unless speed is None.
+
+    Returns:
+        float: Seconds of traffic the recording spans
+    """
+    started = time.perf_counter()
+    first = last = None
+    for arrived, data in entries:
+        if first is None:
+            first = arrived
+        last = arrived
+        update = Update.de_json(data, app.bot)
+        if speed:
+            delay = started + (arrived - first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tracer.queued(update)
+        app.update_queue.put_nowait(update)
+
+    await app.update_queue.join()
+    return (last - first) if first is not None else 0.0
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def report(tracer: Tracer, api: FakeBotAPI, span: float, elapsed: float, speed_label: str) -> None:
+    from utils.metrics import handler_errors_total, handler_latency
+
+    traces = list(tracer.traces.values())
+    handled = [trace for trace in traces if trace.finished is not None]
+    latency = [trace.finished - trace.queued for trace in handled]
+    handling = [trace.finished - trace.started for trace in handled]
+    calls = [trace.calls for trace in handled]
+    total_calls = sum(api.calls.values())
+
+    print(
+        f"Replayed {len(traces)} updates spanning {span:.1f}s of traffic in {elapsed:.2f}s "
+        f"({speed_label}): {len(traces) / elapsed:.1f} updates/s"
+    )
+    if len(handled) < len(traces):
+        print(f"  {len(traces) - len(handled)} updates stopped before the last handler group")
+    print(
+        f"Update latency, queued to handled: p50 {ms(percentile(latency, 0.5))}  p90 {ms(percentile(latency, 0.9))}  "
+        f"p99 {ms(percentile(latency, 0.99))}  max {ms(max(latency, default=0.0))}"
+    )
+    print(
+        f"Handling time: p50 {ms(percentile(handling, 0.5))}  p99 {ms(percentile(handling, 0.99))}  "
+        f"max {ms(max(handling, default=0.0))}"
+    )
+    print(
+        f"Handlers (bot metrics): p50 {ms(handler_latency.quantile(0.5) or 0.0)}  "
+        f"p99 {ms(handler_latency.quantile(0.99) or 0.0)}  {handler_errors_total.total():.0f} errors"
+    )
+    print(
+        f"Bot API: {total_calls} calls, {total_calls / max(len(traces), 1):.2f} per update "
+        f"(p99 {percentile(calls, 0.99):.0f}, max {max(calls, default=0)}), "
+        f"{sum(api.floods.values())} refused with 429"
+    )
+
+    by_kind: Dict[str, List[UpdateTrace]] = defaultdict(list)
+    for trace in handled:
+        by_kind[trace.kind].append(trace)
+    print("\nBy update kind:")
+    for kind, group in sorted(by_kind.items(), key=lambda item: -len(item[1]))[:15]:
+        print(
+            f"  {kind:<24} {len(group):>7}  {sum(trace.calls for trace in group) / len(group):6.2f} calls/update  "
+            f"p99 {ms(percentile([trace.finished - trace.started for trace in group], 0.99))}"
+        )
+
+    print("\nBy API method:")
+    for method, count in api.calls.most_common(15):
+        print(f"  {method:<24} {count:>7}  {count / max(len(traces), 1):6.2f} per update")
+
+
+async def run(args: argparse.Namespace) -> None:
+    from utils.recorder import load_recording
+
+    header, entries = load_recording(args.recording)
+    api = FakeBotAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        flood_rate=args.flood_rate,
+        retry_after=args.retry_after,
+        admins=args.admin,
+        seed=args.seed
+    )
+    # Reuse the recorded bot's id and username so commands addressed to it match
+    token = f"{header['bot_id']}:REPLAY"
+    async with BotUnderTest(api, token=token, username=header.get("bot_username"), log_file=args.log) as app:
+        tracer = Tracer(api)
+        tracer.install(app)
+        api.reset_counts()
+
+        print(f"Recording from {header['started_at']} (anonymise: {header['anonymise']})")
+        started = time.perf_counter()
+        span = await replay(app, tracer, entries, args.speed)
+        elapsed = time.perf_counter() - started
+
+        speed_label = "max speed" if args.speed is None else f"{args.speed:g}x"
+        report(tracer, api, span, elapsed, speed_label)
+
+
+def parse_speed(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("recording", type=Path, help="a .ndjson.gz file written by the update recorder")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1 for the recorded pace, N for N times faster, or max")
+    parser.add_argument("--admin", type=int, action="append", default=[], help="user id reported as creator of every group")
+    add_harness_arguments(parser)
+    args = parser.parse_args()
+
+    run_isolated(lambda: run(args))
+
+
+if __name__ == "__main__":
+    main()
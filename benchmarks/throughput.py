@@ -0,0 +1,290 @@
+# File: benchmarks/throughput.py
+"""
+Update throughput of the bot's full handler set.
+
+Starts the fake Bot API, builds the application with bot.build_application
+pointed at it, and feeds synthetic group traffic into the update queue the
+way the poller does. Each scenario reports updates/s and handler latency
+percentiles from the bot's own metrics, so the numbers match /stats.
+
+Usage:
+    python -m benchmarks.throughput [afk|warn|purge|broadcast ...] [--updates N]
+        [--latency S] [--jitter S] [--flood-rate P] [--log FILE]
+
+All scenarios run when none are named. State lives in a temporary data
+directory that is removed afterwards.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.harness import BotUnderTest, add_harness_arguments, feed, run_isolated
+GROUP_ADMIN_ID = 1000  # reported as creator of every group
+FIRST_USER_ID = 2000
+CHAT_COUNT = 20
+USER_COUNT = 200
+AFK_SHARE = 0.1
+PURGE_SIZE = 200  # messages removed by each /purge
+SCENARIO_TIMEOUT = 600  # seconds to wait for non-blocking handlers
+
+Json = Dict[str, Any]
+
+
+class Traffic:
+    """Builds update payloads with message ids drawn from the fake server."""
+
+    def __init__(self, api: FakeBotAPI, seed: int):
+        self.api = api
+        self.random = random.Random(seed)
+        self._update_id = 0
+
+    def update(self, message: Json) -> Json:
+        self._update_id += 1
+        return {"update_id": self._update_id, "message": message}
+
+    def message(
+        self,
+        chat_id: int,
+        user_id: int,
+        text: str,
+        reply_to: Optional[Json] = None,
+        entities: Optional[List[Json]] = None
+    ) -> Json:
+        message = {
+            "message_id": self.api.next_message_id(chat_id),
+            "date": int(time.time()),
+            "chat": self.api.chat(chat_id),
+            "from": self.api.user(user_id),
+            "text": text,
+        }
+        if reply_to is not None:
+            message["reply_to_message"] = reply_to
+        if entities:
+            message["entities"] = entities
+        return message
+
+    def command(self, chat_id: int, user_id: int, command: str, args: str = "", reply_to: Optional[Json] = None) -> Json:
+        text = f"/{command} {args}".rstrip()
+        entity = {"type": "bot_command", "offset": 0, "length": len(command) + 1}
+        return self.message(chat_id, user_id, text, reply_to, [entity])
+
+    def mention(self, chat_id: int, user_id: int, target_id: int) -> Json:
+        handle = f"@user{target_id}"
+        text = f"hey {handle} are you around?"
+        entity = {"type": "mention", "offset": 4, "length": len(handle)}
+        return self.message(chat_id, user_id, text, entities=[entity])
+
+
+def chat_ids(count: int) -> List[int]:
+    return [-1001000000000 - index for index in range(count)]
+
+
+def user_ids(count: int) -> List[int]:
+    return list(range(FIRST_USER_ID, FIRST_USER_ID + count))
+
+
+class Scenario:
+    """
+    One benchmark run.
+
+    Args:
+        name: Name shown in the report
+        setup: Updates fed untimed first, e.g. to fill caches
+        timed: Updates that are measured
+        prepare: Called between setup and the timed run
+        wait_for: Handler label of a non-blocking command; the run ends once
+            it has finished for every timed update
+    """
+
+    def __init__(
+        self,
+        name: str,
+        setup: List[Json],
+        timed: List[Json],
+        prepare: Optional[Callable[[], None]] = None,
+        wait_for: Optional[str] = None
+    ):
+        self.name = name
+        self.setup = setup
+        self.timed = timed
+        self.prepare = prepare
+        self.wait_for = wait_for
+
+
+def afk_chatter(traffic: Traffic, size: int) -> Scenario:
+    """Group chatter where some replies and @mentions hit AFK users."""
+    from utils.afk_store import afk_store
+
+    chats = chat_ids(CHAT_COUNT)
+    users = user_ids(USER_COUNT)
+    afk_users = users[: int(USER_COUNT * AFK_SHARE)]
+    active_users = users[len(afk_users):]
+
+    # Every user speaks once so their profile and last message are known
+    last_message = {user_id: traffic.message(traffic.random.choice(chats), user_id, "hi all") for user_id in users}
+    setup = [traffic.update(message) for message in last_message.values()]
+
+    timed = []
+    for _ in range(size):
+        chat_id = traffic.random.choice(chats)
+        sender = traffic.random.choice(active_users)
+        roll = traffic.random.random()
+        if roll < 0.2:
+            target = last_message[traffic.random.choice(users)]
+            message = traffic.message(target["chat"]["id"], sender, "agreed", reply_to=target)
+        elif roll < 0.4:
+            message = traffic.mention(chat_id, sender, traffic.random.choice(users))
+        else:
+            message = traffic.message(chat_id, sender, "just chatting about nothing in particular")
+        timed.append(traffic.update(message))
+
+    def prepare() -> None:
+        for user_id in afk_users:
+            afk_store.set(user_id, "lunch")
+
+    return Scenario("afk", setup, timed, prepare=prepare)
+
+
+def warn_burst(traffic: Traffic, size: int) -> Scenario:
+    """An admin issuing /warn replies back to back; every third warn mutes."""
+    chats = chat_ids(CHAT_COUNT)
+    users = user_ids(USER_COUNT)
+
+    targets = [traffic.message(traffic.random.choice(chats), user_id, "spam spam spam") for user_id in users]
+    setup = [traffic.update(message) for message in targets]
+
+    timed = []
+    for _ in range(size):
+        target = traffic.random.choice(targets)
+        timed.append(traffic.update(
+            traffic.command(target["chat"]["id"], GROUP_ADMIN_ID, "warn", "flooding", reply_to=target)
+        ))
+    return Scenario("warn", setup, timed)
+
+
+def purge_runs(traffic: Traffic, size: int) -> Scenario:
+    """One reply-range /purge per chat, each over PURGE_SIZE indexed messages."""
+    chats = chat_ids(max(1, size // PURGE_SIZE))
+    users = user_ids(USER_COUNT)
+
+    setup = []
+    first_message = {}
+    for chat_id in chats:
+        for index in range(PURGE_SIZE):
+            message = traffic.message(chat_id, traffic.random.choice(users), f"message {index}")
+            first_message.setdefault(chat_id, message)
+            setup.append(traffic.update(message))
+
+    timed = [
+        traffic.update(traffic.command(chat_id, GROUP_ADMIN_ID, "purge", reply_to=first_message[chat_id]))
+        for chat_id in chats
+    ]
+    return Scenario("purge", setup, timed, wait_for="/purge")
+
+
+def broadcast_run(traffic: Traffic, size: int) -> Scenario:
+    """A single owner /broadcast to one group per ten updates of scale."""
+    from config import ADMIN_USER_ID
+
+    groups = chat_ids(max(CHAT_COUNT, size // 10))
+    setup = [traffic.update(traffic.message(chat_id, FIRST_USER_ID, "hello")) for chat_id in groups]
+    timed = [traffic.update(traffic.command(ADMIN_USER_ID, ADMIN_USER_ID, "broadcast", "benchmark notice"))]
+    return Scenario("broadcast", setup, timed, wait_for="/broadcast")
+
+
+SCENARIOS = {
+    "afk": afk_chatter,
+    "warn": warn_burst,
+    "purge": purge_runs,
+    "broadcast": broadcast_run,
+}
+
+
+async def wait_for_handler(label: str, count: int) -> None:
+    from utils.metrics import handler_latency
+
+    deadline = time.monotonic() + SCENARIO_TIMEOUT
+    while handler_latency.count(label) < count:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{label} did not finish within {SCENARIO_TIMEOUT}s")
+        await asyncio.sleep(0.01)
+
+
+async def run_scenario(app, api: FakeBotAPI, scenario: Scenario, flood_rate: float) -> None:
+    from telegram import Update
+    from utils.metrics import metrics, handler_errors_total, handler_latency
+
+    await feed(app, [Update.de_json(data, app.bot) for data in scenario.setup])
+    if scenario.prepare:
+        scenario.prepare()
+
+    # Parse up front; the poller hands the queue ready Update objects too
+    timed = [Update.de_json(data, app.bot) for data in scenario.timed]
+    metrics.reset()
+    api.reset_counts()
+    api.flood_rate = flood_rate
+
+    started = time.perf_counter()
+    await feed(app, timed)
+    if scenario.wait_for:
+        await wait_for_handler(scenario.wait_for, len(timed))
+    elapsed = time.perf_counter() - started
+    api.flood_rate = 0.0
+
+    p50 = handler_latency.quantile(0.5) or 0.0
+    p99 = handler_latency.quantile(0.99) or 0.0
+    calls = sum(api.calls.values())
+    print(
+        f"{scenario.name:<10} {len(timed):>6} updates  {elapsed:8.2f}s  {len(timed) / elapsed:9.1f} updates/s  "
+        f"p50 {p50 * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  "
+        f"{calls} API calls ({calls / elapsed:.0f}/s, {sum(api.floods.values())} refused with 429)  "
+        f"{handler_errors_total.total():.0f} handler errors"
+    )
+
+    busiest = sorted(handler_latency.label_sets(), key=lambda labels: -handler_latency.count(*labels))
+    for labels in busiest[:5]:
+        print(
+            f"{'':<12}{labels[0]:<28} {handler_latency.count(*labels):>6} runs  "
+            f"p50 {handler_latency.quantile(0.5, labels) * 1000:7.1f}ms  "
+            f"p99 {handler_latency.quantile(0.99, labels) * 1000:7.1f}ms"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    api = FakeBotAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        retry_after=args.retry_after,
+        admins=[GROUP_ADMIN_ID],
+        seed=args.seed
+    )
+    async with BotUnderTest(api, log_file=args.log) as app:
+        print(
+            f"Fake Bot API latency {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms jitter), "
+            f"429 rate {args.flood_rate:.1%}, scale {args.updates} updates"
+        )
+        traffic = Traffic(api, args.seed)
+        for name in args.scenarios or list(SCENARIOS):
+            await run_scenario(app, api, SCENARIOS[name](traffic, args.updates), args.flood_rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=", ".join(SCENARIOS))
+    parser.add_argument("--updates", type=int, default=2000, help="timed updates per scenario, and scale for purge and broadcast")
+    add_harness_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+    if args.seed is None:
+        args.seed = 1
+
+    run_isolated(lambda: run(args))
+
+
+if __name__ == "__main__":
+    main()
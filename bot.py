@@ -1,21 +1,52 @@
 # File: bot.py
 import os
-import json
+import math
 import asyncio
 from pathlib import Path
-from datetime import datetime, time
+from typing import List, Optional
+from datetime import datetime, time, timedelta
 from dotenv import load_dotenv
-from telegram.ext import Application, filters, ChatMemberHandler
+from telegram.ext import Application, ChatMemberHandler
 from telegram import Update
 from telegram.ext import ContextTypes
-from telegram.error import TelegramError
+from telegram.error import TelegramError, RetryAfter
 from telegram.constants import ChatType
-from telegram.ext import MessageHandler
+from telegram.ext import TypeHandler
+from telegram.request import HTTPXRequest
 
 
 from commands import register_all_handlers
 from events import register_all_handlers as register_event_handlers
-from utils.helpers import send_message_safely
+from utils.helpers import send_message_safely, is_chat_gone_error
+from utils.admin_check import record_bot_membership
+from utils.throttle import TokenBucket, fan_out
+from utils.broadcast import broadcast_message, BroadcastReport
+from utils.group_registry import group_registry, flush_groups_job
+from utils.storage import storage, import_legacy_json
+from utils.sudo_admins import sudo_index
+from utils.afk_store import afk_store, flush_afk_job, sweep_afk_job
+from utils.media_cache import file_id_cache
+from utils.http import http_client
+from utils.message_index import IndexingBot, record_message
+from utils.profile_cache import observe_users
+from utils.dispatch import fast_path, UpdateKind
+from utils.metrics import MetricsRequest, count_update, instrument_handlers, metrics_server
+from utils.recorder import update_recorder, record_update, flush_recording_job
+from commands.afk import handle_afk_messages, afk_check_needed
+from commands.cat import cat_pool
+from config import (
+    ADMIN_USER_ID,
+    GROUPS_FLUSH_INTERVAL,
+    AFK_FLUSH_INTERVAL,
+    AFK_SWEEP_INTERVAL,
+    STARTUP_NOTICE_WINDOW,
+    VERIFY_MODE,
+    VERIFY_CONCURRENCY,
+    VERIFY_RATE,
+    VERIFY_SLICE_INTERVAL,
+    RECORD_UPDATES,
+    RECORD_FLUSH_INTERVAL,
+)
 
 from rich.logging import RichHandler
 import logging
@@ -28,7 +59,6 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 # File paths
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
-GROUPS_FILE = DATA_DIR / "groups.json"
 
 # Set up rich logging
 logging.basicConfig(
@@ -39,145 +69,161 @@ logging.basicConfig(
 )
 logger = logging.getLogger("bot")
 
-def load_groups() -> dict:
-    """Load the list of groups from the JSON file."""
-    if not GROUPS_FILE.exists():
-        return {}
-    
-    try:
-        with open(GROUPS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        logger.error(f"❌ Error decoding {GROUPS_FILE}. Using empty groups list.")
-        return {}
-    except Exception as e:
-        logger.error(f"❌ Failed to load groups: {e}")
-        return {}
-
-def save_groups(groups: dict) -> bool:
-    """Save the list of groups to the JSON file."""
-    try:
-        with open(GROUPS_FILE, "w", encoding="utf-8") as f:
-            json.dump(groups, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"❌ Failed to save groups: {e}")
-        return False
+# Caps getChat calls made while verifying groups
+verify_bucket = TokenBucket(VERIFY_RATE)
 
 async def notify_groups_on_startup(context: ContextTypes.DEFAULT_TYPE):
-    """Send a notification to all groups indicating the bot is up."""
-    groups = load_groups()
-    if not groups:
+    """
+    Send a notification to all groups indicating the bot is up.
+    
+    Each group's notice time is checkpointed in the registry, and groups
+    notified within STARTUP_NOTICE_WINDOW are skipped. A restart therefore
+    resumes an interrupted run, and a crash loop doesn't re-spam groups.
+    """
+    if not len(group_registry):
         logger.info("ℹ️ No groups to notify on startup.")
         return
 
-    logger.info(f"🔔 Notifying {len(groups)} groups about bot startup...")
+    cutoff = (datetime.now() - timedelta(seconds=STARTUP_NOTICE_WINDOW)).isoformat()
+    pending = [
+        chat_id for chat_id, info in group_registry.items()
+        # Skip if the group has notifications disabled or was notified recently
+        if not info.get("notifications_disabled", False)
+        and info.get("startup_notified_at", "") < cutoff
+    ]
+    if not pending:
+        logger.info("ℹ️ All groups were notified recently. Skipping startup notices.")
+        return
+
+    logger.info(f"🔔 Notifying {len(pending)}/{len(group_registry)} groups about bot startup...")
     
-    success_count = 0
-    for chat_id, info in list(groups.items()):
-        # Skip if the group has notifications disabled
-        if info.get("notifications_disabled", False):
-            continue
-            
-        result = await send_message_safely(
-            context=context,
-            chat_id=chat_id,
-            text="🚀 Bot is up and running!"
-        )
-        
-        if result is False:
-            # Bot might have been kicked - mark for verification
-            groups[chat_id]["needs_verification"] = True
-            logger.warning(f"⚠️ Failed to send message to group {chat_id}. Marked for verification.")
-        else:
-            success_count += 1
-            # Update last activity
-            groups[chat_id]["last_active"] = datetime.now().isoformat()
-    
-    save_groups(groups)
-    logger.info(f"✅ Successfully notified {success_count}/{len(groups)} groups")
+    def mark_notified(chat_id: str) -> None:
+        group_registry.update(chat_id, startup_notified_at=datetime.now().isoformat())
+    
+    async def checkpoint(report: BroadcastReport) -> None:
+        await group_registry.flush()
+    
+    report = await broadcast_message(
+        context.bot,
+        pending,
+        "🚀 Bot is up and running!",
+        on_progress=checkpoint,
+        on_sent=mark_notified,
+        on_migrated=group_registry.migrate
+    )
+    
+    for chat_id in report.failed_ids:
+        # Bot might have been kicked - mark for verification
+        group_registry.update(chat_id, needs_verification=True)
+    for chat_id in report.pruned:
+        group_registry.remove(chat_id)
+    
+    await group_registry.flush()
+    logger.info(
+        f"✅ Successfully notified {report.sent}/{len(pending)} groups "
+        f"({report.failed} failed, {len(report.pruned)} removed)"
+    )
 
-async def verify_groups_membership(context: ContextTypes.DEFAULT_TYPE):
-    """Verify that the bot is still a member of all saved groups."""
-    groups = load_groups()
-    if not groups:
+def groups_due_for_verification(limit: Optional[int] = None) -> List[str]:
+    """Groups ordered by verification priority: flagged first, then least recently verified."""
+    ordered = sorted(
+        group_registry.items(),
+        key=lambda item: (not item[1].get("needs_verification", False), item[1].get("verified_at", ""))
+    )
+    chat_ids = [chat_id for chat_id, _ in ordered]
+    return chat_ids if limit is None else chat_ids[:limit]
+
+async def verify_groups(context: ContextTypes.DEFAULT_TYPE, chat_ids: List[str]):
+    """Verify membership in the given groups and apply the results as one batch."""
+    if not chat_ids:
         return
-        
-    logger.info(f"🔍 Verifying membership in {len(groups)} groups...")
     
-    for chat_id, info in list(groups.items()):
+    verified = {}
+    unreachable = []
+    gone = []
+    
+    async def check(chat_id: str) -> None:
+        await verify_bucket.acquire()
         try:
             # Try to get chat info - will fail if bot is not in the group
             chat = await context.bot.get_chat(chat_id)
-            groups[chat_id]["needs_verification"] = False
-            groups[chat_id]["verified_at"] = datetime.now().isoformat()
-            groups[chat_id]["title"] = chat.title
-        except TelegramError:
-            logger.info(f"❌ Bot is no longer in group {chat_id}. Removing from groups list.")
-            del groups[chat_id]
-    
-    save_groups(groups)
-    logger.info(f"✅ Group verification complete. {len(groups)} active groups.")
+            verified[chat_id] = chat.title
+        except RetryAfter as e:
+            verify_bucket.pause(e.retry_after)
+            unreachable.append(chat_id)
+        except TelegramError as e:
+            if is_chat_gone_error(e):
+                gone.append(chat_id)
+            else:
+                logger.warning(f"⚠️ Couldn't verify group {chat_id}: {e}")
+                unreachable.append(chat_id)
+    
+    await fan_out(chat_ids, check, VERIFY_CONCURRENCY)
+    
+    now = datetime.now().isoformat()
+    for chat_id, title in verified.items():
+        group_registry.update(chat_id, needs_verification=False, verified_at=now, title=title)
+    for chat_id in unreachable:
+        # Try again first thing on the next pass
+        group_registry.update(chat_id, needs_verification=True)
+    for chat_id in gone:
+        logger.info(f"❌ Bot is no longer in group {chat_id}. Removing from groups list.")
+        group_registry.remove(chat_id)
+    
+    await group_registry.flush()
+    logger.info(
+        f"✅ Verified {len(chat_ids)} groups: {len(verified)} ok, "
+        f"{len(gone)} removed, {len(unreachable)} to retry. {len(group_registry)} active groups."
+    )
+
+async def verify_groups_membership(context: ContextTypes.DEFAULT_TYPE):
+    """Verify that the bot is still a member of all saved groups."""
+    if not len(group_registry):
+        return
+        
+    logger.info(f"🔍 Verifying membership in {len(group_registry)} groups...")
+    await verify_groups(context, groups_due_for_verification())
+
+async def verify_groups_slice(context: ContextTypes.DEFAULT_TYPE):
+    """Verify the next slice of groups so every group is covered once a day."""
+    if not len(group_registry):
+        return
+    
+    slice_size = math.ceil(len(group_registry) * VERIFY_SLICE_INTERVAL / 86400)
+    await verify_groups(context, groups_due_for_verification(slice_size))
+
+async def verify_flagged_groups(context: ContextTypes.DEFAULT_TYPE):
+    """Verify only the groups flagged with needs_verification."""
+    flagged = [
+        chat_id for chat_id, info in group_registry.items()
+        if info.get("needs_verification", False)
+    ]
+    await verify_groups(context, flagged)
+
+GROUP_GREETING = "👋 Hello! I've been added to this group. Use /help to see what I can do!"
 
 async def add_group(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle the bot being added to a group."""
+    """Record activity in a group, greeting it if the bot didn't know it yet."""
     chat = update.effective_chat
     
     # Only process group chats
     if chat.type not in [ChatType.GROUP, ChatType.SUPERGROUP]:
         return
         
-    groups = load_groups()
-    
-    # Check if this is a new group
-    is_new = str(chat.id) not in groups
-    
-    # Update or add the group
-    groups[str(chat.id)] = {
-        "title": chat.title,
-        "first_joined": groups.get(str(chat.id), {}).get("first_joined", datetime.now().isoformat()),
-        "last_active": datetime.now().isoformat(),
-        "needs_verification": False,
-        "type": chat.type,
-        "notifications_disabled": False
-    }
-    
-    save_groups(groups)
+    # Update or add the group; written back by the background flush
+    is_new = group_registry.touch(chat)
     
     if is_new:
         logger.info(f"➕ Bot added to new group: {chat.title} (ID: {chat.id})")
-        await send_message_safely(
-            context=context,
-            chat_id=chat.id,
-            text="👋 Hello! I've been added to this group. Use /help to see what I can do!"
-        )
+        await send_message_safely(context=context, chat_id=chat.id, text=GROUP_GREETING)
     else:
-        logger.info(f"🔄 Bot activity in existing group: {chat.title} (ID: {chat.id})")
+        logger.debug(f"🔄 Bot activity in existing group: {chat.title} (ID: {chat.id})")
 
-async def remove_group(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle the bot being removed from a group."""
+async def track_bot_membership(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle changes to the bot's own membership and rights in a group."""
     chat = update.effective_chat
-    
-    # Only process group chats
-    if chat.type not in [ChatType.GROUP, ChatType.SUPERGROUP]:
-        return
-        
-    groups = load_groups()
-    
-    # Check if the group is in our list
-    if str(chat.id) in groups:
-        del groups[str(chat.id)]
-        save_groups(groups)
-        logger.info(f"➖ Bot removed from group: {chat.title} (ID: {chat.id})")
-
-def reset_bot_state():
-    """Reset all bot state variables to start fresh."""
-    from commands.afk import afk_users
-    
-    # Clear AFK users dictionary
-    afk_users.clear()
-    
-    logger.info("🔄 Bot state has been reset.")
+    if record_bot_membership(chat, update.my_chat_member.new_chat_member):
+        await send_message_safely(context=context, chat_id=chat.id, text=GROUP_GREETING)
 
 async def notify_admin_on_startup(context: ContextTypes.DEFAULT_TYPE):
     """Notify the admin that the bot has started."""
@@ -185,8 +231,7 @@ async def notify_admin_on_startup(context: ContextTypes.DEFAULT_TYPE):
         return
         
     try:
-        groups = load_groups()
-        group_count = len(groups)
+        group_count = len(group_registry)
         
         message = (
             f"🤖 Bot startup complete!\n"
@@ -202,53 +247,150 @@ async def notify_admin_on_startup(context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error(f"❌ Failed to notify admin: {e}")
 
+async def run_group_startup_tasks(app: Application):
+    """Verify groups, then send startup notices."""
+    # In sliding mode the periodic job covers everything else over the day
+    if VERIFY_MODE == "sliding":
+        await verify_flagged_groups(app.create_context())
+    else:
+        await verify_groups_membership(app.create_context())
+    
+    await notify_groups_on_startup(app.create_context())
+
 async def startup_sequence(app: Application):
-    """Run all startup tasks in sequence."""
+    """Run startup fan-out in the background while updates are handled."""
     try:
-        # Wait a moment for the bot to fully initialize
-        await asyncio.sleep(2)
-        
-        # First verify group membership
-        await verify_groups_membership(app.create_context())
-        
-        # Then notify groups
-        await notify_groups_on_startup(app.create_context())
-        
-        # Finally notify admin
-        await notify_admin_on_startup(app.create_context())
+        # Group tasks and the admin notice don't depend on each other
+        results = await asyncio.gather(
+            run_group_startup_tasks(app),
+            notify_admin_on_startup(app.create_context()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"❌ Error in startup sequence: {result}")
     except Exception as e:
         logger.error(f"❌ Error in startup sequence: {e}")
+    
+    elapsed = (datetime.now() - app.bot_data["started_at"]).total_seconds()
+    app.bot_data["startup_fanout_seconds"] = elapsed
+    logger.info(f"🏁 Startup fan-out finished {elapsed:.1f}s after start")
+
+async def track_first_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Record how long after start the first update was handled."""
+    if "first_update_seconds" in context.bot_data:
+        return
+    elapsed = (datetime.now() - context.bot_data["started_at"]).total_seconds()
+    context.bot_data["first_update_seconds"] = elapsed
+    logger.info(f"⚡ First update handled {elapsed:.1f}s after start")
+
+async def on_startup(app: Application):
+    """Open storage and load persisted state before polling starts."""
+    await storage.open()
+    await import_legacy_json(storage)
+    await group_registry.load()
+    await sudo_index.reload()
+    await afk_store.load()
+    await file_id_cache.load()
+    await http_client.start()
+    await metrics_server.start()
+    if RECORD_UPDATES:
+        update_recorder.start(app.bot)
+    
+    # Warm the /meow image pool in the background
+    cat_pool.start_refill()
+    
+    # Restore persisted settings (warn limit, log channel, ...)
+    app.bot_data.update(await storage.load_settings())
+
+async def on_shutdown(app: Application):
+    """Write any pending state before the process exits."""
+    await group_registry.flush()
+    await afk_store.flush()
+    await storage.close()
+    await http_client.close()
+    await metrics_server.stop()
+    await update_recorder.close()
 
 def schedule_tasks(app: Application):
     """Schedule periodic tasks."""
-    # Verify group membership once per day
-    app.job_queue.run_daily(
-        verify_groups_membership,
-        time=time(hour=0, minute=0)  # Use the imported time class
-    )
+    # Write pending group changes in the background
+    app.job_queue.run_repeating(flush_groups_job, interval=GROUPS_FLUSH_INTERVAL)
+    
+    # Persist AFK changes and expire stale AFK statuses
+    app.job_queue.run_repeating(flush_afk_job, interval=AFK_FLUSH_INTERVAL)
+    app.job_queue.run_repeating(sweep_afk_job, interval=AFK_SWEEP_INTERVAL, first=AFK_SWEEP_INTERVAL)
+    
+    # Write recorded updates in the background
+    if RECORD_UPDATES:
+        app.job_queue.run_repeating(flush_recording_job, interval=RECORD_FLUSH_INTERVAL)
+    
+    # Verify group membership, either a slice every few minutes or all at once per day
+    if VERIFY_MODE == "sliding":
+        app.job_queue.run_repeating(
+            verify_groups_slice,
+            interval=VERIFY_SLICE_INTERVAL,
+            first=VERIFY_SLICE_INTERVAL
+        )
+    else:
+        app.job_queue.run_daily(
+            verify_groups_membership,
+            time=time(hour=0, minute=0)  # Use the imported time class
+        )
 
 def register_group_tracking(app: Application):
     """Register handlers for tracking group membership."""
     # Track when bot is added to groups
-    app.add_handler(ChatMemberHandler(add_group, chat_member_types=ChatMemberHandler.MY_CHAT_MEMBER))
-    
-    # Ensure activity is tracked on any message
-    app.add_handler(MessageHandler(
-        filters.ChatType.GROUPS & ~filters.COMMAND,
-        lambda u, c: add_group(u, c),
-        block=False
-    ))
+    app.add_handler(ChatMemberHandler(track_bot_membership, chat_member_types=ChatMemberHandler.MY_CHAT_MEMBER))
 
-def main():
-    if not TELEGRAM_BOT_TOKEN:
-        logger.error("❌ Missing TELEGRAM_BOT_TOKEN in .env file!")
-        return
+def register_fast_path(app: Application):
+    """Run the per-message features from one classified pass, ahead of all other handlers."""
+    # Opt-in; recorded first so the recording sees updates as they arrived
+    if RECORD_UPDATES:
+        fast_path.add_stage("recorder", record_update)
+    fast_path.add_stage("metrics", count_update)
+    fast_path.add_stage("first_update", track_first_update)
+    fast_path.add_stage("profiles", observe_users)
+    fast_path.add_stage("message_index", record_message, requires=UpdateKind.GROUP | UpdateKind.MESSAGE)
+    fast_path.add_stage("group_activity", add_group, requires=UpdateKind.GROUP | UpdateKind.MESSAGE)
+    fast_path.add_stage(
+        "afk",
+        handle_afk_messages,
+        requires=UpdateKind.MESSAGE,
+        any_of=UpdateKind.TEXT | UpdateKind.REPLY | UpdateKind.MENTION,
+        excludes=UpdateKind.COMMAND,
+        when=afk_check_needed
+    )
+    app.add_handler(TypeHandler(Update, fast_path), group=-100)
+
+def build_application(token: str, base_url: Optional[str] = None) -> Application:
+    """
+    Build the application with every handler and periodic job registered.
     
-    # Reset bot state
-    reset_bot_state()
+    Args:
+        token: The bot token
+        base_url: Bot API base URL, for a local Bot API server; the public
+            API is used if omitted
+        
+    Returns:
+        Application: The application, not yet initialized
+    """
+    # The bot indexes its own outgoing messages, which never arrive as updates
+    bot = IndexingBot(
+        token,
+        base_url=base_url or "https://api.telegram.org/bot",
+        request=MetricsRequest(connection_pool_size=256),
+        get_updates_request=HTTPXRequest()
+    )
     
     # Initialize the Application with JobQueue
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .bot(bot)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Register command handlers
     register_all_handlers(app)
@@ -257,17 +399,29 @@ def main():
     # Register group tracking handlers
     register_group_tracking(app)
     
-    # Add maintenance middleware
-    from commands.dev import maintenance_middleware
-    app.add_handler(MessageHandler(filters.ALL, maintenance_middleware, block=False), group=-1)
+    # Drop non-owner updates during maintenance before any other handler runs
+    from commands.dev import maintenance_gate
+    app.add_handler(TypeHandler(Update, maintenance_gate), group=-1000)
+    
+    # Profiles, message index, group activity and AFK in one pass per update
+    register_fast_path(app)
+    
+    # Time every handler; must come after all handlers are added
+    instrument_handlers(app)
     
-    # Initialize command counter
-    app.bot_data["cmd_count"] = 0
-    app.bot_data["msg_count"] = 0
     app.bot_data["uptime"] = datetime.now().isoformat()
+    app.bot_data["started_at"] = datetime.now()
     
     # Schedule tasks
     schedule_tasks(app)
+    return app
+
+def main():
+    if not TELEGRAM_BOT_TOKEN:
+        logger.error("❌ Missing TELEGRAM_BOT_TOKEN in .env file!")
+        return
+    
+    app = build_application(TELEGRAM_BOT_TOKEN)
     
     # Check for restart flag
     restart_flag = DATA_DIR / "restart.flag"
@@ -299,7 +453,8 @@ def main():
     logger.info("🚀 Starting polling...")
     
     try:
-        app.run_polling()
+        # chat_member updates are only delivered when requested explicitly
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         logger.info("👋 Bot stopped by user")
     except Exception as e:
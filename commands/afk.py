@@ -1,13 +1,16 @@
 # File: commands/afk.py
 import html
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 from telegram import Update, MessageEntity, User
 from telegram.constants import ParseMode
-from telegram.ext import CommandHandler, MessageHandler, ContextTypes, filters
+from telegram.ext import CommandHandler, ContextTypes
+
+from utils.afk_store import afk_store
+from utils.profile_cache import profile_cache
+from utils.dispatch import UpdateKind
 
 logger = logging.getLogger(__name__)
-afk_users = {}
 
 def format_timedelta(delta: timedelta) -> str:
     seconds = int(delta.total_seconds())
@@ -34,21 +37,19 @@ async def afk_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     reason = "AFK"
     if context.args:
         reason = " ".join(context.args)
-    now = datetime.now(timezone.utc)
-    afk_users[user.id] = {'since': now, 'reason': html.escape(reason)}
+    afk_store.set(user.id, reason)
     user_mention = get_user_mention(user)
     await message.reply_text(
-        f"🌙 {user_mention} is now AFK!\n📝 Reason: <i>{reason}</i>",
+        f"🌙 {user_mention} is now AFK!\n📝 Reason: <i>{html.escape(reason)}</i>",
         parse_mode=ParseMode.HTML
     )
 
 async def handle_afk_messages(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.effective_user
     message = update.effective_message
-    now = datetime.now(timezone.utc)
-    if user.id in afk_users:
-        afk_info = afk_users.pop(user.id)
-        duration = now - afk_info['since']
+    if afk_store.get(user.id) is not None:
+        afk_info = afk_store.pop(user.id)
+        duration = timedelta(seconds=afk_info.age())
         await message.reply_text(
             f"👋 Welcome back, {get_user_mention(user)}!\n⏱️ You were AFK for {format_timedelta(duration)}.",
             parse_mode=ParseMode.HTML
@@ -61,20 +62,30 @@ async def handle_afk_messages(update: Update, context: ContextTypes.DEFAULT_TYPE
     for entity in message.entities or []:
         if entity.type == MessageEntity.TEXT_MENTION and entity.user:
             mentions.add(entity.user.id)
+        elif entity.type == MessageEntity.MENTION:
+            # @username mentions resolve from users the bot has already seen
+            uid = profile_cache.resolve_username(message.parse_entity(entity))
+            if uid is not None:
+                mentions.add(uid)
     for uid in mentions:
-        if uid in afk_users:
-            info = afk_users[uid]
-            duration = now - info['since']
-            chat_member = await context.bot.get_chat_member(update.effective_chat.id, uid)
-            user_mention = get_user_mention(chat_member.user)
+        info = afk_store.get(uid)
+        if info is not None:
+            duration = timedelta(seconds=info.age())
+            afk_user = await profile_cache.resolve(context.bot, uid, update.effective_chat.id)
+            user_mention = get_user_mention(afk_user) if afk_user else f'<a href="tg://user?id={uid}">this user</a>'
             await message.reply_text(
-                f"⚠️ {user_mention} is AFK: <i>{info['reason']}</i>\n⏱️ Since: {format_timedelta(duration)} ago",
+                f"⚠️ {user_mention} is AFK: <i>{html.escape(info.reason)}</i>\n⏱️ Since: {format_timedelta(duration)} ago",
                 parse_mode=ParseMode.HTML
             )
 
+def afk_check_needed(update: Update, kind: UpdateKind) -> bool:
+    """O(1) test for whether handle_afk_messages has anything to do."""
+    if not len(afk_store):
+        return False
+    if update.effective_user and update.effective_user.id in afk_store:
+        return True
+    return bool(kind & (UpdateKind.REPLY | UpdateKind.MENTION))
+
 def register_all_handlers(app):
+    # handle_afk_messages runs as a stage of the fast-path dispatcher (see bot.py)
     app.add_handler(CommandHandler("afk", afk_command))
-    app.add_handler(MessageHandler(
-        filters.TEXT & ~filters.COMMAND | filters.Entity(MessageEntity.TEXT_MENTION) | filters.REPLY,
-        handle_afk_messages
-    ))
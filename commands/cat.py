@@ -1,10 +1,16 @@
+import asyncio
 import logging
-import requests
+import aiohttp
+from collections import deque
+from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
 from dotenv import load_dotenv
 import os
 
+from utils.http import http_client
+from config import CAT_POOL_SIZE, CAT_POOL_LOW_WATER, CAT_POOL_REFILL_BATCH
+
 # Load the API key from .env (ensure CAT_API_KEY is in your .env)
 load_dotenv()
 CAT_API_URL = "https://api.thecatapi.com/v1/images/search"  # Example API URL
@@ -13,53 +19,115 @@ CAT_API_KEY = os.getenv("CAT_API_KEY")
 # Logger setup
 logger = logging.getLogger(__name__)
 
-async def meow_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Send a random cat image when the command /meow is issued."""
-    logger.info(f"Received /meow command from chat: {update.effective_chat.id}")
-    fetching_message = await update.message.reply_text("Fetching a cute cat for you... 🐱")
+class CatImagePool:
+    """
+    Bounded pool of cat image URLs fetched ahead of time.
 
-    try:
-        # Prepare headers if API key is available
+    /meow takes a URL from memory. When the pool drops below the low-water
+    mark, a background refill fetches a whole batch with one API request.
+    """
+
+    def __init__(self, size: int = CAT_POOL_SIZE, low_water: int = CAT_POOL_LOW_WATER, batch: int = CAT_POOL_REFILL_BATCH):
+        self.size = size
+        self.low_water = low_water
+        self.batch = batch
+        self._urls = deque(maxlen=size)
+        self._refill_task = None
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    async def refill(self) -> None:
+        """Fetch one batch of image URLs into the pool."""
         headers = {}
         if CAT_API_KEY:
             headers["x-api-key"] = CAT_API_KEY
 
-        # Make request to Cat API with a timeout
-        response = requests.get(CAT_API_URL, headers=headers, timeout=10)  # Set timeout to 10 seconds
-        response.raise_for_status()  # Check if the request was successful
-
-        data = response.json()
-        if data and isinstance(data, list) and len(data) > 0:
-            cat_url = data[0].get("url")
-            if cat_url:
-                # Edit the fetching message to include the cat image
-                await context.bot.edit_message_media(
-                    chat_id=update.effective_chat.id,
-                    message_id=fetching_message.message_id,
-                    media={'type': 'photo', 'media': cat_url}
-                )
-                # Edit the caption separately
-                await context.bot.edit_message_caption(
-                    chat_id=update.effective_chat.id,
-                    message_id=fetching_message.message_id,
-                    caption="Meow! 🐾"
-                )
-            else:
-                await fetching_message.edit_text("Oops! Couldn't find a cat image. Try again later! 😿")
+        data = await http_client.get_json(CAT_API_URL, headers=headers, params={"limit": self.batch})
+        if not isinstance(data, list):
+            raise ValueError("The cat API returned unexpected data")
+
+        self.refills += 1
+        for item in data:
+            url = item.get("url") if isinstance(item, dict) else None
+            if url:
+                self._urls.append(url)
+
+    def start_refill(self) -> asyncio.Task:
+        """Start a background refill unless one is already running, and return it."""
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.get_running_loop().create_task(self.refill())
+            self._refill_task.add_done_callback(self._refill_done)
+        return self._refill_task
+
+    def _refill_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to refill cat image pool: {task.exception()}")
+
+    async def take(self) -> Optional[str]:
+        """Return an image URL, fetching a batch first only if the pool is empty."""
+        if self._urls:
+            self.hits += 1
         else:
-            await fetching_message.edit_text("Oops! The cat API returned unexpected data. Try again later! 😿")
+            self.misses += 1
+            # Share the refill in flight, e.g. the startup warm-up, instead of
+            # fetching a second batch; shielded so a cancelled /meow doesn't stop it
+            await asyncio.shield(self.start_refill())
+
+        url = self._urls.popleft() if self._urls else None
+        if len(self._urls) < self.low_water:
+            self.start_refill()
+        return url
 
-    except requests.exceptions.Timeout:
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._urls),
+            "capacity": self.size,
+            "batch": self.batch,
+            "refills": self.refills,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+cat_pool = CatImagePool()
+
+
+async def meow_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Send a random cat image when the command /meow is issued."""
+    logger.info(f"Received /meow command from chat: {update.effective_chat.id}")
+
+    try:
+        cat_url = await cat_pool.take()
+        if cat_url:
+            # Photo and caption go out in a single call. Each URL is a one-off
+            # random cat, so it isn't worth a file_id cache entry.
+            await context.bot.send_photo(
+                update.effective_chat.id, cat_url,
+                caption="Meow! 🐾",
+                reply_to_message_id=update.message.message_id
+            )
+        else:
+            await update.message.reply_text("Oops! Couldn't find a cat image. Try again later! 😿")
+
+    except asyncio.TimeoutError:
         logger.error("Request timed out.")
-        await fetching_message.edit_text("The request timed out. Please try again later. 😞")
+        await update.message.reply_text("The request timed out. Please try again later. 😞")
 
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error(f"Request error: {e}")
-        await fetching_message.edit_text("Something went wrong while fetching a cat. Please try again later. 😞")
+        await update.message.reply_text("Something went wrong while fetching a cat. Please try again later. 😞")
+
+    except ValueError as e:
+        logger.error(f"Unexpected cat API response: {e}")
+        await update.message.reply_text("Oops! The cat API returned unexpected data. Try again later! 😿")
 
     except Exception as e:
         logger.error(f"An error occurred: {e}")
-        await fetching_message.edit_text("Oops! An error occurred. Please try again later. 😓")
+        await update.message.reply_text("Oops! An error occurred. Please try again later. 😓")
 
 
 def register_cat_handler(app):
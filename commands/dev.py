@@ -1,51 +1,41 @@
 # File: commands/dev.py
-import json
+import io
 import os
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import CommandHandler, ContextTypes, CallbackQueryHandler, filters
+from telegram.ext import CommandHandler, ContextTypes, CallbackQueryHandler, ApplicationHandlerStop, filters
+from telegram.error import TelegramError
 from telegram.constants import ParseMode
 
 from utils.permissions import require_permission, Permission
-from utils.helpers import send_message_safely
-from config import DATA_DIR, ADMIN_USER_ID
-
-# Path to store sudo admins list
-SUDO_FILE = DATA_DIR / "sudo_admins.json"
-
-def load_sudo_admins() -> Dict[str, Any]:
-    """Load sudo admins from JSON file."""
-    if not SUDO_FILE.exists():
-        return {"admins": [], "last_updated": datetime.now().isoformat()}
-    
-    try:
-        with open(SUDO_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {"admins": [], "last_updated": datetime.now().isoformat()}
-
-def save_sudo_admins(data: Dict[str, Any]) -> bool:
-    """Save sudo admins to JSON file."""
-    try:
-        with open(SUDO_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving sudo admins: {e}")
-        return False
-
-def is_sudo_admin(user_id: int) -> bool:
-    """Check if a user is a sudo admin."""
-    # Bot owner is always a sudo admin
-    if ADMIN_USER_ID and str(user_id) == str(ADMIN_USER_ID):
-        return True
-        
-    # Check if user is in sudo admins list
-    sudo_data = load_sudo_admins()
-    return str(user_id) in [str(admin["id"]) for admin in sudo_data["admins"]]
+from utils.group_registry import group_registry
+from utils.storage import storage
+from utils.sudo_admins import sudo_index
+from utils.admin_cache import admin_cache
+from utils.admin_check import record_bot_membership
+from events.admin_changes import track_admin_changes
+from utils.broadcast import broadcast_message, BroadcastReport
+from commands.cat import cat_pool
+from utils.media_cache import file_id_cache
+from utils.message_index import message_index
+from utils.profile_cache import profile_cache
+from utils.dispatch import fast_path
+from utils.recorder import update_recorder
+from utils.metrics import (
+    api_errors_total,
+    api_latency,
+    api_requests_total,
+    commands_total,
+    handler_latency,
+    update_queue_depth,
+    updates_total,
+)
+from utils.profiler import profile_cpu, profile_loop, ProfilerBusy
+from config import DATA_DIR, ADMIN_USER_ID, MAINTENANCE_NOTICE_INTERVAL, PROFILE_MAX_SECONDS
 
 @require_permission(Permission.BOT_OWNER)
 async def shutdown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -74,43 +64,41 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     message = " ".join(context.args)
     broadcast_text = f"📢 Broadcast:\n\n{message}"
     
-    # Load groups from the groups file
-    groups_file = DATA_DIR / "groups.json"
-    if not groups_file.exists():
+    groups = group_registry.ids()
+    if not groups:
         await update.message.reply_text("❌ No groups found to broadcast to.")
         return
         
-    try:
-        with open(groups_file, "r", encoding="utf-8") as f:
-            groups = json.load(f)
-    except Exception as e:
-        await update.message.reply_text(f"❌ Error loading groups: {e}")
-        return
-        
     # Send status message
     status_msg = await update.message.reply_text(f"🔄 Broadcasting to {len(groups)} groups...")
     
-    # Send broadcast to all groups
-    success_count = 0
-    for chat_id in groups:
-        try:
-            await send_message_safely(
-                context=context,
-                chat_id=chat_id,
-                text=broadcast_text
-            )
-            success_count += 1
-        except Exception:
-            pass
+    async def show_progress(report: BroadcastReport) -> None:
+        await status_msg.edit_text(f"🔄 Broadcasting... {report.done}/{report.total} groups done.")
+    
+    report = await broadcast_message(
+        context.bot, groups, broadcast_text,
+        on_progress=show_progress,
+        on_migrated=group_registry.migrate
+    )
+    
+    # Forget groups the bot is no longer in
+    for chat_id in report.pruned:
+        group_registry.remove(chat_id)
+    await group_registry.flush()
     
     # Update status message with results
-    await status_msg.edit_text(f"✅ Broadcast sent to {success_count}/{len(groups)} groups.")
+    await status_msg.edit_text(
+        f"✅ Broadcast finished for {report.total} groups.\n"
+        f"📨 Sent: {report.sent}\n"
+        f"❌ Failed: {report.failed}\n"
+        f"🧹 Pruned: {len(report.pruned)}\n"
+        f"🔀 Moved to supergroups: {len(report.migrated)}"
+    )
 
 @require_permission(Permission.BOT_OWNER)
 async def sudo_list_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all sudo admins."""
-    sudo_data = load_sudo_admins()
-    admins = sudo_data["admins"]
+    admins = await storage.load_sudo_admins()
     
     if not admins:
         await update.message.reply_text("📝 No sudo admins configured yet.")
@@ -142,25 +130,18 @@ async def sudo_add_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     # Get name if provided, otherwise use "Admin"
     name = " ".join(context.args[1:]) if len(context.args) > 1 else f"Admin {user_id}"
     
-    # Load current sudo admins
-    sudo_data = load_sudo_admins()
-    
-    # Check if already a sudo admin
-    if any(str(admin["id"]) == str(user_id) for admin in sudo_data["admins"]):
-        await update.message.reply_text(f"⚠️ User {user_id} is already a sudo admin.")
-        return
-        
-    # Add new sudo admin
-    sudo_data["admins"].append({
+    # Add new sudo admin unless already present
+    added = await sudo_index.add({
         "id": user_id,
         "name": name,
         "added_date": datetime.now().isoformat(),
         "added_by": update.effective_user.id
     })
     
-    sudo_data["last_updated"] = datetime.now().isoformat()
-    save_sudo_admins(sudo_data)
-    
+    if not added:
+        await update.message.reply_text(f"⚠️ User {user_id} is already a sudo admin.")
+        return
+        
     await update.message.reply_text(f"✅ Added {name} (ID: {user_id}) as sudo admin.")
 
 @require_permission(Permission.BOT_OWNER)
@@ -176,12 +157,10 @@ async def sudo_remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text("❌ Invalid user ID. Must be a number.")
         return
         
-    # Load current sudo admins
-    sudo_data = load_sudo_admins()
-    
     # Find admin to remove
+    admins = await storage.load_sudo_admins()
     admin_to_remove = None
-    for admin in sudo_data["admins"]:
+    for admin in admins:
         if str(admin["id"]) == str(user_id):
             admin_to_remove = admin
             break
@@ -191,9 +170,7 @@ async def sudo_remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
         
     # Remove admin
-    sudo_data["admins"].remove(admin_to_remove)
-    sudo_data["last_updated"] = datetime.now().isoformat()
-    save_sudo_admins(sudo_data)
+    await sudo_index.remove(user_id)
     
     await update.message.reply_text(f"✅ Removed {admin_to_remove['name']} (ID: {user_id}) from sudo admins.")
 
@@ -201,28 +178,101 @@ async def sudo_remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show bot statistics."""
     # Get groups count
-    groups_file = DATA_DIR / "groups.json"
-    try:
-        with open(groups_file, "r", encoding="utf-8") as f:
-            groups = json.load(f)
-        group_count = len(groups)
-    except Exception:
-        group_count = 0
+    group_count = len(group_registry)
+    active_count = len(await storage.groups_active_since(datetime.now() - timedelta(days=7)))
 
     # Get sudo admins count
-    sudo_data = load_sudo_admins()
-    sudo_count = len(sudo_data["admins"])
+    sudo_count = len(await storage.load_sudo_admins())
     
     # Build stats message
     stats = [
         "*📊 Bot Statistics:*",
-        f"• Groups: {group_count}",
+        f"• Groups: {group_count} ({active_count} active in the last 7 days)",
         f"• Sudo Admins: {sudo_count}",
         f"• Uptime: {context.bot_data.get('uptime', 'Unknown')}",
-        f"• Commands processed: {context.bot_data.get('cmd_count', 0)}",
-        f"• Messages processed: {context.bot_data.get('msg_count', 0)}"
+        f"• Commands processed: {commands_total.total():.0f}",
+        f"• Messages processed: {updates_total.get('message'):.0f} ({updates_total.total():.0f} updates in total)",
+        f"• Update queue: {update_queue_depth.value():.0f} waiting"
     ]
     
+    def percentiles(histogram, labels=None) -> str:
+        values = [histogram.quantile(q, labels) for q in (0.5, 0.95, 0.99)]
+        if values[0] is None:
+            return "no data"
+        return " / ".join(f"{value * 1000:.0f}ms" for value in values)
+    
+    stats.append(f"• Handler latency p50/p95/p99: {percentiles(handler_latency)}")
+    busiest = sorted(commands_total.items(), key=lambda item: item[1], reverse=True)[:5]
+    for (command,), count in busiest:
+        # Command names can contain underscores, which Markdown would read as italics
+        label = command.replace("_", "\\_")
+        stats.append(f"  - {label} ×{count:.0f}: {percentiles(handler_latency, (command,))}")
+    stats.append(
+        f"• Bot API: {api_requests_total.total():.0f} calls, {api_errors_total.total():.0f} errors, "
+        f"p50/p95/p99 {percentiles(api_latency)}"
+    )
+    
+    cache_stats = admin_cache.stats()
+    stats.append(
+        f"• Admin cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%}), {cache_stats['rosters']} chat rosters, "
+        f"{cache_stats['roster_fetches']} roster fetches"
+    )
+    
+    pool_stats = cat_pool.stats()
+    stats.append(
+        f"• Cat image pool: {pool_stats['size']}/{pool_stats['capacity']} ready, "
+        f"refill batch {pool_stats['batch']}, {pool_stats['hit_rate']:.0%} hit rate"
+    )
+    
+    media_stats = file_id_cache.stats()
+    stats.append(
+        f"• Media file ID cache: {media_stats['entries']} entries, "
+        f"{media_stats['hits']} reused / {media_stats['misses']} uploaded"
+    )
+    
+    profile_stats = profile_cache.stats()
+    stats.append(
+        f"• Profile cache: {profile_stats['entries']} users, "
+        f"{profile_stats['hit_rate']:.0%} hit rate ({profile_stats['misses']} lookups)"
+    )
+    
+    index_stats = message_index.stats()
+    stats.append(f"• Message index: {index_stats['entries']} messages across {index_stats['chats']} chats")
+    
+    dispatch_stats = fast_path.stats()
+    stats.append(
+        f"• Fast path: {dispatch_stats['updates']} updates, "
+        f"classify {dispatch_stats['classify_avg_ms']:.3f}ms avg"
+    )
+    for name, stage in dispatch_stats["stages"].items():
+        # Stage names contain underscores, which Markdown would read as italics
+        label = name.replace("_", "\\_")
+        stats.append(
+            f"  - {label}: {stage['calls']} run / {stage['skipped']} skipped, "
+            f"{stage['avg_ms']:.2f}ms avg, {stage['max_ms']:.1f}ms max"
+        )
+    
+    if context.bot_data.get("maintenance_mode", False):
+        stats.append(
+            f"• Maintenance: {maintenance_gate.dropped} updates dropped, "
+            f"{maintenance_gate.notices} notices sent"
+        )
+    
+    if update_recorder.enabled:
+        recorder_stats = update_recorder.stats()
+        stats.append(
+            f"• Recording: {recorder_stats['recorded']} updates to {update_recorder.path.name} "
+            f"({recorder_stats['buffered']} buffered)"
+        )
+    
+    first_update = context.bot_data.get("first_update_seconds")
+    fanout = context.bot_data.get("startup_fanout_seconds")
+    if first_update is not None:
+        stats.append(f"• First update handled: {first_update:.1f}s after start")
+    if fanout is not None:
+        stats.append(f"• Startup fan-out finished: {fanout:.1f}s after start")
+    
     await update.message.reply_text("\n".join(stats), parse_mode=ParseMode.MARKDOWN)
 
 @require_permission(Permission.BOT_OWNER)
@@ -233,27 +283,124 @@ async def maintenance_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     new_mode = not current_mode
     context.bot_data["maintenance_mode"] = new_mode
     
-    # Save to persistent storage if available
-    if hasattr(context.bot_data, "persistence"):
-        context.bot_data.persistence.update_bot_data(context.bot_data)
+    # Persist so the mode survives a restart
+    await storage.set_setting("maintenance_mode", new_mode)
     
-    status = "🔧 Maintenance mode enabled. Only owner commands will work." if new_mode else "✅ Maintenance mode disabled. Bot is fully operational."
+    if new_mode:
+        maintenance_gate.reset()
+        status = "🔧 Maintenance mode enabled. Only owner commands will work."
+    else:
+        status = (
+            "✅ Maintenance mode disabled. Bot is fully operational.\n"
+            f"🚫 Updates dropped during maintenance: {maintenance_gate.dropped}"
+        )
     await update.message.reply_text(status)
 
-async def maintenance_middleware(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Middleware to check if bot is in maintenance mode."""
-    # Always allow owner commands
-    if update.effective_user and ADMIN_USER_ID and str(update.effective_user.id) == str(ADMIN_USER_ID):
-        return None
-        
-    # Check if maintenance mode is enabled
-    if context.bot_data.get("maintenance_mode", False):
-        if update.effective_message:
-            await update.effective_message.reply_text(
-                "🔧 Bot is currently in maintenance mode. Please try again later."
-            )
-        return -1  # Skip handler
-    return None
+class MaintenanceGate:
+    """
+    Drops non-owner updates while maintenance mode is on.
+
+    Registered as a TypeHandler in the lowest handler group, it raises
+    ApplicationHandlerStop so no other handler sees the update. Membership
+    updates are applied to the group registry and admin cache here, without
+    the greetings their handlers would send. Commands get
+    a notice, at most one per chat every MAINTENANCE_NOTICE_INTERVAL seconds.
+    """
+
+    def __init__(self, notice_interval: float = MAINTENANCE_NOTICE_INTERVAL):
+        self.notice_interval = notice_interval
+        self._last_notice: Dict[int, float] = {}
+        self.dropped = 0
+        self.notices = 0
+
+    def reset(self) -> None:
+        self._last_notice.clear()
+        self.dropped = 0
+        self.notices = 0
+
+    def _notice_due(self, chat_id: int) -> bool:
+        now = time.monotonic()
+        if now - self._last_notice.get(chat_id, float("-inf")) < self.notice_interval:
+            return False
+        self._last_notice[chat_id] = now
+        return True
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not context.bot_data.get("maintenance_mode", False):
+            return
+
+        # Always allow the owner
+        if update.effective_user and ADMIN_USER_ID and str(update.effective_user.id) == str(ADMIN_USER_ID):
+            return
+
+        # Keep tracking which groups the bot is in and who their admins are,
+        # so the admin cache isn't stale once maintenance ends, but don't let
+        # the handlers greet or welcome anyone
+        if update.my_chat_member:
+            record_bot_membership(update.effective_chat, update.my_chat_member.new_chat_member)
+            raise ApplicationHandlerStop
+        if update.chat_member:
+            await track_admin_changes(update, context)
+            raise ApplicationHandlerStop
+
+        self.dropped += 1
+        message = update.message
+        if message and message.text and message.text.startswith("/") and self._notice_due(message.chat_id):
+            self.notices += 1
+            try:
+                await message.reply_text("🔧 Bot is currently in maintenance mode. Please try again later.")
+            except TelegramError:
+                pass
+        elif update.callback_query:
+            try:
+                await update.callback_query.answer("🔧 Bot is currently in maintenance mode.")
+            except TelegramError:
+                pass
+
+        raise ApplicationHandlerStop
+
+maintenance_gate = MaintenanceGate()
+
+@require_permission(Permission.BOT_OWNER)
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Profile the live bot for a few seconds (owner only)."""
+    usage = (
+        "❌ Usage: /profile <seconds> [cpu|loop]\n"
+        "• cpu - top functions by cumulative time (default)\n"
+        "• loop - callbacks that blocked the event loop longest"
+    )
+    if not context.args:
+        await update.message.reply_text(usage)
+        return
+    
+    try:
+        seconds = float(context.args[0])
+    except ValueError:
+        await update.message.reply_text(usage)
+        return
+    seconds = max(1.0, min(seconds, PROFILE_MAX_SECONDS))
+    mode = context.args[1].lower() if len(context.args) > 1 else "cpu"
+    if mode not in ("cpu", "loop"):
+        await update.message.reply_text(usage)
+        return
+    
+    status_msg = await update.message.reply_text(f"⏱️ Profiling ({mode}) for {seconds:g}s...")
+    try:
+        if mode == "cpu":
+            report = await profile_cpu(seconds)
+        else:
+            report = await profile_loop(seconds)
+    except ProfilerBusy:
+        await status_msg.edit_text("⏳ A profile is already running. Try again when it finishes.")
+        return
+    
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    await update.message.reply_document(
+        document=io.BytesIO(report.encode("utf-8")),
+        filename=f"profile-{mode}-{timestamp}.txt",
+        caption=f"📊 {mode} profile over {seconds:g}s"
+    )
+    await status_msg.delete()
 
 @require_permission(Permission.BOT_OWNER)
 async def update_groups_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -273,13 +420,14 @@ def register_dev_handler(app):
     # Register command handlers
     app.add_handler(CommandHandler("shutdown", shutdown_command))
     app.add_handler(CommandHandler("restart", restart_command))
-    app.add_handler(CommandHandler("broadcast", broadcast_command))
+    app.add_handler(CommandHandler("broadcast", broadcast_command, block=False))
     app.add_handler(CommandHandler("sudo_list", sudo_list_command))
     app.add_handler(CommandHandler("sudo_add", sudo_add_command))
     app.add_handler(CommandHandler("sudo_remove", sudo_remove_command))
     app.add_handler(CommandHandler("stats", stats_command))
     app.add_handler(CommandHandler("maintenance", maintenance_command))
     app.add_handler(CommandHandler("update_groups", update_groups_command))
+    # Non-blocking so the bot keeps handling updates while it is being profiled
+    app.add_handler(CommandHandler("profile", profile_command, block=False))
     
-    # Add maintenance middleware if not already added
-    # Note: This requires additional setup in the main bot.py file
\ No newline at end of file
+    # The maintenance gate is registered in bot.py, ahead of every handler group
\ No newline at end of file
@@ -1,42 +1,141 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import asyncio
+from typing import List, Optional
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity
 from telegram.ext import CommandHandler, CallbackQueryHandler, ContextTypes
 from utils.permissions import is_user_admin
+from utils.admin_check import bot_lacks_right
+from utils.purge import delete_messages_bulk, PurgeReport
+from utils.message_index import message_index
+from utils.profile_cache import profile_cache
+from commands.moderation import parse_duration
+from config import MESSAGE_INDEX_PER_CHAT
+
+NO_DELETE_RIGHT = "❌ I need the \"Delete messages\" admin right to purge here."
+NO_PIN_RIGHT = "❌ I need the \"Pin messages\" admin right to do that here."
+
+PURGE_USAGE = (
+    "❗ Usage:\n"
+    "• Reply to a message with /purge to delete everything from there on\n"
+    "• /purge @user N to delete that user's last N messages\n"
+    "• /purge since 10m to delete messages from the last 10 minutes"
+)
+
+def resolve_purge_targets(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Optional[List[int]]:
+    """
+    Work out which message ids a /purge call covers.
+
+    The @user and since modes need to know who sent what and when, so they
+    read the message index. A reply range is deleted in full: the index
+    doesn't see messages from other bots or, in privacy mode, most group
+    traffic, and deleteMessages skips ids that don't exist at no extra cost.
+    """
+    chat_id = update.effective_chat.id
+    command_id = update.message.message_id
+    args = context.args or []
+
+    if args and args[0].lower() == "since":
+        duration = parse_duration(args[1]) if len(args) > 1 else None
+        if not duration:
+            return None
+        cutoff = int((update.message.date - duration).timestamp())
+        return message_index.ids_since(chat_id, cutoff) + [command_id]
+
+    if args and args[-1].isdigit():
+        limit = min(int(args[-1]), MESSAGE_INDEX_PER_CHAT)
+        user_id = None
+        for entity in update.message.entities:
+            if entity.type == MessageEntity.TEXT_MENTION and entity.user:
+                user_id = entity.user.id
+        if user_id is None and len(args) > 1 and args[0].startswith("@"):
+            user_id = profile_cache.resolve_username(args[0])
+        if user_id is None and update.message.reply_to_message and update.message.reply_to_message.from_user:
+            user_id = update.message.reply_to_message.from_user.id
+        if user_id is None:
+            return None
+        return message_index.ids_from_user(chat_id, user_id, limit) + [command_id]
+
+    if update.message.reply_to_message and not args:
+        start_message_id = update.message.reply_to_message.message_id
+        return list(range(start_message_id, command_id + 1))
+
+    return None
 
 async def purge_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not await is_user_admin(update, context):
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
 
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to a message to start purging from.")
+    if bot_lacks_right(update.effective_chat.id, "can_delete_messages"):
+        await update.message.reply_text(NO_DELETE_RIGHT)
+        return
+
+    message_ids = resolve_purge_targets(update, context)
+    if message_ids is None:
+        await update.message.reply_text(PURGE_USAGE)
+        return
+
+    if context.chat_data.get("purge_cancel"):
+        await update.message.reply_text("⏳ A purge is already running in this chat.")
         return
 
     chat_id = update.effective_chat.id
-    start_message_id = update.message.reply_to_message.message_id
-    end_message_id = update.message.message_id
-    deleted_count = 0
+
+    cancel = asyncio.Event()
+    context.chat_data["purge_cancel"] = cancel
+    cancel_markup = InlineKeyboardMarkup([[InlineKeyboardButton("✋ Cancel", callback_data="purge_cancel")]])
 
     try:
-        for msg_id in range(start_message_id, end_message_id + 1):
-            try:
-                await context.bot.delete_message(chat_id, msg_id)
-                deleted_count += 1
-            except:
-                continue
-
-        confirmation = await context.bot.send_message(
+        status_msg = await context.bot.send_message(
             chat_id=chat_id,
-            text=f"🗑️ Purged {deleted_count} messages."
+            text=f"🗑️ Purging {len(message_ids)} messages...",
+            reply_markup=cancel_markup
         )
 
+        async def show_progress(report: PurgeReport) -> None:
+            await status_msg.edit_text(
+                f"🗑️ Purging... {report.done}/{report.total} messages done.",
+                reply_markup=cancel_markup
+            )
+
+        report = await delete_messages_bulk(context.bot, chat_id, message_ids, on_progress=show_progress, cancel=cancel)
+        message_index.forget(chat_id, message_ids)
+
+        summary = f"🗑️ Purged {report.cleared} messages."
+        if report.cancelled:
+            summary = f"✋ Purge cancelled. Cleared {report.cleared} of {report.total} messages."
+        if report.aborted:
+            summary = (
+                f"❌ Purge stopped, I can't delete messages here ({report.aborted.message}). "
+                f"Cleared {report.cleared} of {report.total} messages."
+            )
+        if report.failed:
+            summary += f"\n⚠️ {report.failed} could not be deleted."
+        await status_msg.edit_text(summary)
+
         context.job_queue.run_once(
             delete_message_callback,
             5,
-            data={'chat_id': chat_id, 'message_id': confirmation.message_id}
+            data={'chat_id': chat_id, 'message_id': status_msg.message_id}
         )
 
     except Exception as e:
         await update.message.reply_text(f"Failed to purge messages: {e}")
+    finally:
+        context.chat_data.pop("purge_cancel", None)
+
+async def purge_cancel_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+
+    if not await is_user_admin(update, context):
+        await query.answer("❌ You don't have permission to use this command.", show_alert=True)
+        return
+
+    cancel = context.chat_data.get("purge_cancel")
+    if cancel:
+        cancel.set()
+        await query.answer("Stopping the purge...")
+    else:
+        await query.answer("No purge is running.")
 
 async def delete_message_callback(context: ContextTypes.DEFAULT_TYPE):
     job_data = context.job.data
@@ -51,6 +150,10 @@ async def pin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
 
+    if bot_lacks_right(update.effective_chat.id, "can_pin_messages"):
+        await update.message.reply_text(NO_PIN_RIGHT)
+        return
+
     if not update.message.reply_to_message:
         await update.message.reply_text("❗ Please reply to the message you want to pin.")
         return
@@ -71,6 +174,10 @@ async def unpin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
 
+    if bot_lacks_right(update.effective_chat.id, "can_pin_messages"):
+        await update.message.reply_text(NO_PIN_RIGHT)
+        return
+
     chat_id = update.effective_chat.id
 
     try:
@@ -90,6 +197,10 @@ async def unpinall_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
 
+    if bot_lacks_right(update.effective_chat.id, "can_pin_messages"):
+        await update.message.reply_text(NO_PIN_RIGHT)
+        return
+
     keyboard = [
         [InlineKeyboardButton("✅ Yes", callback_data="unpinall_yes"),
          InlineKeyboardButton("❌ No", callback_data="unpinall_no")]
@@ -119,7 +230,9 @@ async def unpinall_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 # ---------------- Register Handlers ----------------
 def register_message_handler(app):
-    app.add_handler(CommandHandler("purge", purge_command))
+    # Non-blocking so the cancel button is handled while a purge runs
+    app.add_handler(CommandHandler("purge", purge_command, block=False))
+    app.add_handler(CallbackQueryHandler(purge_cancel_callback, pattern=r"^purge_cancel$"))
     app.add_handler(CommandHandler("pin", pin_command))
     app.add_handler(CommandHandler("unpin", unpin_command))
     app.add_handler(CommandHandler("unpinall", unpinall_command))
@@ -1,10 +1,14 @@
 # File: commands/moderation.py
 
-from telegram import Update, ChatPermissions, User, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, ChatPermissions, User, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity
 from telegram.ext import CommandHandler, ContextTypes, CallbackQueryHandler
 from telegram.constants import ParseMode
 from utils.helpers import is_user_admin
+from utils.storage import storage
+from utils.admin_cache import admin_cache
+from utils.profile_cache import profile_cache
 from datetime import timedelta, datetime
+from typing import List, Optional, Tuple
 import re
 
 # Helper function to parse duration strings like "1h30m"
@@ -50,8 +54,41 @@ def format_time_delta(delta):
     
     return " ".join(parts)
 
+# Work out who a moderation command targets: the replied-to user, or an
+# @username, text mention or user id given as the first argument.
+# Returns the user (or None) and the remaining arguments.
+async def get_target_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Tuple[Optional[User], List[str]]:
+    message = update.message
+    args = list(context.args or [])
+
+    if message.reply_to_message:
+        return message.reply_to_message.from_user, args
+
+    # A text mention can span several words, so take the arguments after it
+    for entity in message.entities:
+        if entity.type == MessageEntity.TEXT_MENTION and entity.user:
+            rest = message.text.encode("utf-16-le")[(entity.offset + entity.length) * 2:].decode("utf-16-le")
+            return entity.user, rest.split()
+
+    if not args:
+        return None, args
+
+    target = args[0]
+    if target.startswith("@"):
+        user_id = profile_cache.resolve_username(target)
+        user = profile_cache.get(user_id) if user_id is not None else None
+        return user, args[1:]
+
+    if target.lstrip("-").isdigit():
+        user = await profile_cache.resolve(context.bot, int(target), update.effective_chat.id)
+        return user, args[1:]
+
+    return None, args
+
 # Get a user's name with ID for logging
 def get_user_info(user: User):
+    if isinstance(user, int):
+        return f"User [ID: {user}]"
     user_name = user.full_name
     user_id = user.id
     username = f" (@{user.username})" if user.username else ""
@@ -63,14 +100,19 @@ async def log_action(context, action, mod_user, target_user, reason=None, durati
     if not log_channel:
         return  # No log channel configured
     
+    # The target may be given as a bare id; take the name from the profile cache
+    if isinstance(target_user, int):
+        target_user = await profile_cache.resolve(context.bot, target_user) or target_user
+    
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     mod_info = get_user_info(mod_user)
     target_info = get_user_info(target_user)
+    target_mention = target_user.mention_html() if isinstance(target_user, User) else target_info
     
     message = f"🔶 <b>Moderation Action</b> 🔶\n\n"
     message += f"<b>Action:</b> {action}\n"
     message += f"<b>Moderator:</b> {mod_user.mention_html()}\n"
-    message += f"<b>Target:</b> {target_user.mention_html()}\n"
+    message += f"<b>Target:</b> {target_mention}\n"
     message += f"<b>Time:</b> {timestamp}\n"
     
     if duration:
@@ -95,17 +137,16 @@ async def mute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to mute.")
+    user_to_mute, args = await get_target_user(update, context)
+    if user_to_mute is None:
+        await update.message.reply_text("❗ Please reply to the user you want to mute, or name them with @username or their ID.")
         return
     
-    user_to_mute: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
     # Check if we're trying to mute an admin
     try:
-        member = await context.bot.get_chat_member(chat_id, user_to_mute.id)
-        if member.status in ['administrator', 'creator']:
+        if await admin_cache.is_admin(context, chat_id, user_to_mute.id):
             await update.message.reply_text("❌ I can't mute administrators or the chat creator.")
             return
     except Exception as e:
@@ -116,7 +157,6 @@ async def mute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     duration = timedelta(hours=1)  # Default: 1 hour
     reason = "No reason provided"
     
-    args = context.args
     if args:
         duration_str = args[0]
         parsed_duration = parse_duration(duration_str)
@@ -170,14 +210,14 @@ async def unmute_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to unmute.")
+    user_to_unmute, args = await get_target_user(update, context)
+    if user_to_unmute is None:
+        await update.message.reply_text("❗ Please reply to the user you want to unmute, or name them with @username or their ID.")
         return
     
-    user_to_unmute: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
+    reason = " ".join(args) if args else "No reason provided"
     
     permissions = ChatPermissions(
         can_send_messages=True,
@@ -213,24 +253,23 @@ async def kick_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to kick.")
+    user_to_kick, args = await get_target_user(update, context)
+    if user_to_kick is None:
+        await update.message.reply_text("❗ Please reply to the user you want to kick, or name them with @username or their ID.")
         return
     
-    user_to_kick: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
     # Check if we're trying to kick an admin
     try:
-        member = await context.bot.get_chat_member(chat_id, user_to_kick.id)
-        if member.status in ['administrator', 'creator']:
+        if await admin_cache.is_admin(context, chat_id, user_to_kick.id):
             await update.message.reply_text("❌ I can't kick administrators or the chat creator.")
             return
     except Exception as e:
         await update.message.reply_text(f"Error checking user status: {e}")
         return
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
+    reason = " ".join(args) if args else "No reason provided"
     
     try:
         await context.bot.ban_chat_member(chat_id, user_to_kick.id)
@@ -259,24 +298,23 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to ban.")
+    user_to_ban, args = await get_target_user(update, context)
+    if user_to_ban is None:
+        await update.message.reply_text("❗ Please reply to the user you want to ban, or name them with @username or their ID.")
         return
     
-    user_to_ban: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
     # Check if we're trying to ban an admin
     try:
-        member = await context.bot.get_chat_member(chat_id, user_to_ban.id)
-        if member.status in ['administrator', 'creator']:
+        if await admin_cache.is_admin(context, chat_id, user_to_ban.id):
             await update.message.reply_text("❌ I can't ban administrators or the chat creator.")
             return
     except Exception as e:
         await update.message.reply_text(f"Error checking user status: {e}")
         return
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
+    reason = " ".join(args) if args else "No reason provided"
     
     try:
         await context.bot.ban_chat_member(chat_id, user_to_ban.id)
@@ -320,18 +358,16 @@ async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     try:
         await context.bot.unban_chat_member(chat_id, user_id)
         
-        # Try to get user info - this might fail if user is not in any common chats
-        try:
-            user_info = await context.bot.get_chat(user_id)
-            user_mention = user_info.mention_html()
-        except:
-            user_mention = f"User [ID: {user_id}]"
+        # Banned users rarely share a chat with the bot, so the name comes from
+        # the profile cache; a lookup is only made if they were never seen
+        user_info = await profile_cache.resolve(context.bot, user_id)
+        user_mention = user_info.mention_html() if user_info else f"User [ID: {user_id}]"
         
         await log_action(
             context, 
             "UNBAN", 
             update.effective_user, 
-            user_info if 'user_info' in locals() else None, 
+            user_info or user_id, 
             reason
         )
         
@@ -349,42 +385,35 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to warn.")
+    user_to_warn, args = await get_target_user(update, context)
+    if user_to_warn is None:
+        await update.message.reply_text("❗ Please reply to the user you want to warn, or name them with @username or their ID.")
         return
     
-    user_to_warn: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
     # Check if we're trying to warn an admin
     try:
-        member = await context.bot.get_chat_member(chat_id, user_to_warn.id)
-        if member.status in ['administrator', 'creator']:
+        if await admin_cache.is_admin(context, chat_id, user_to_warn.id):
             await update.message.reply_text("❌ I can't warn administrators or the chat creator.")
             return
     except Exception as e:
         await update.message.reply_text(f"Error checking user status: {e}")
         return
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
-    
-    # Initialize warns dict in chat_data if not exists
-    if "warns" not in context.chat_data:
-        context.chat_data["warns"] = {}
+    reason = " ".join(args) if args else "No reason provided"
     
     # Get user's current warns
-    user_id_str = str(user_to_warn.id)
-    if user_id_str not in context.chat_data["warns"]:
-        context.chat_data["warns"][user_id_str] = {"count": 0, "reasons": []}
+    warns = await storage.get_warns(chat_id, user_to_warn.id) or {"count": 0, "reasons": []}
     
     # Get warn settings
     warn_limit = context.bot_data.get("WARN_LIMIT", 3)
     warn_action = context.bot_data.get("WARN_ACTION", "mute")  # Default: mute
     
     # Add warn
-    context.chat_data["warns"][user_id_str]["count"] += 1
-    context.chat_data["warns"][user_id_str]["reasons"].append(reason)
-    current_warns = context.chat_data["warns"][user_id_str]["count"]
+    warns["count"] += 1
+    warns["reasons"].append(reason)
+    current_warns = warns["count"]
     
     # Log the action
     await log_action(
@@ -405,7 +434,7 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         warning_message += f"\n\n🚫 User has reached the warning limit. Taking action: {warn_action}"
         
         # Reset warns
-        context.chat_data["warns"][user_id_str]["count"] = 0
+        warns["count"] = 0
         
         # Take action based on settings
         if warn_action == "mute":
@@ -429,6 +458,7 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await context.bot.ban_chat_member(chat_id, user_to_warn.id)
             warning_message += "\nUser has been banned."
     
+    await storage.set_warns(chat_id, user_to_warn.id, warns["count"], warns["reasons"])
     await update.message.reply_text(warning_message, parse_mode=ParseMode.HTML)
 
 # Remove warn
@@ -437,24 +467,26 @@ async def unwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to remove a warning from.")
+    user, args = await get_target_user(update, context)
+    if user is None:
+        await update.message.reply_text("❗ Please reply to the user you want to remove a warning from, or name them with @username or their ID.")
         return
     
-    user: User = update.message.reply_to_message.from_user
-    user_id_str = str(user.id)
+    chat_id = update.effective_chat.id
+    warns = await storage.get_warns(chat_id, user.id)
     
-    if "warns" not in context.chat_data or user_id_str not in context.chat_data["warns"]:
+    if warns is None:
         await update.message.reply_text(f"User {user.mention_html()} has no warnings.", parse_mode=ParseMode.HTML)
         return
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
+    reason = " ".join(args) if args else "No reason provided"
     
     # Reduce warn count
-    if context.chat_data["warns"][user_id_str]["count"] > 0:
-        context.chat_data["warns"][user_id_str]["count"] -= 1
+    if warns["count"] > 0:
+        warns["count"] -= 1
+        await storage.set_warns(chat_id, user.id, warns["count"], warns["reasons"])
     
-    current_warns = context.chat_data["warns"][user_id_str]["count"]
+    current_warns = warns["count"]
     
     await log_action(
         context, 
@@ -473,19 +505,17 @@ async def unwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 # Check warns
 async def warns_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not update.message.reply_to_message:
-        # Check own warns if not replying
+    user, _ = await get_target_user(update, context)
+    if user is None:
+        # Check own warns if no one else is named
         user = update.effective_user
-    else:
-        user = update.message.reply_to_message.from_user
     
-    user_id_str = str(user.id)
+    warn_data = await storage.get_warns(update.effective_chat.id, user.id)
     
-    if "warns" not in context.chat_data or user_id_str not in context.chat_data["warns"]:
+    if warn_data is None:
         await update.message.reply_text(f"{user.mention_html()} has no warnings.", parse_mode=ParseMode.HTML)
         return
     
-    warn_data = context.chat_data["warns"][user_id_str]
     warn_count = warn_data["count"]
     warn_limit = context.bot_data.get("WARN_LIMIT", 3)
     
@@ -506,23 +536,23 @@ async def resetwarns_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user whose warnings you want to reset.")
+    user, args = await get_target_user(update, context)
+    if user is None:
+        await update.message.reply_text("❗ Please reply to the user whose warnings you want to reset, or name them with @username or their ID.")
         return
     
-    user: User = update.message.reply_to_message.from_user
-    user_id_str = str(user.id)
+    chat_id = update.effective_chat.id
+    warns = await storage.get_warns(chat_id, user.id)
     
-    if "warns" not in context.chat_data or user_id_str not in context.chat_data["warns"]:
+    if warns is None:
         await update.message.reply_text(f"{user.mention_html()} has no warnings.", parse_mode=ParseMode.HTML)
         return
     
-    reason = " ".join(context.args) if context.args else "No reason provided"
+    reason = " ".join(args) if args else "No reason provided"
     
     # Reset warns
-    old_count = context.chat_data["warns"][user_id_str]["count"]
-    context.chat_data["warns"][user_id_str]["count"] = 0
-    context.chat_data["warns"][user_id_str]["reasons"] = []
+    old_count = warns["count"]
+    await storage.set_warns(chat_id, user.id, 0, [])
     
     await log_action(
         context, 
@@ -545,17 +575,16 @@ async def tban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         await update.message.reply_text("❌ You don't have permission to use this command.")
         return
     
-    if not update.message.reply_to_message:
-        await update.message.reply_text("❗ Please reply to the user you want to temporarily ban.")
+    user_to_ban, args = await get_target_user(update, context)
+    if user_to_ban is None:
+        await update.message.reply_text("❗ Please reply to the user you want to temporarily ban, or name them with @username or their ID.")
         return
     
-    user_to_ban: User = update.message.reply_to_message.from_user
     chat_id = update.effective_chat.id
     
     # Check if we're trying to ban an admin
     try:
-        member = await context.bot.get_chat_member(chat_id, user_to_ban.id)
-        if member.status in ['administrator', 'creator']:
+        if await admin_cache.is_admin(context, chat_id, user_to_ban.id):
             await update.message.reply_text("❌ I can't ban administrators or the chat creator.")
             return
     except Exception as e:
@@ -563,11 +592,11 @@ async def tban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
     
     # Parse duration and reason
-    if not context.args:
+    if not args:
         await update.message.reply_text("❗ Please specify a ban duration (e.g., 1d, 6h, 30m).")
         return
     
-    duration_str = context.args[0]
+    duration_str = args[0]
     parsed_duration = parse_duration(duration_str)
     
     if parsed_duration is None:
@@ -575,7 +604,7 @@ async def tban_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
     
     duration = parsed_duration
-    reason = " ".join(context.args[1:]) if len(context.args) > 1 else "No reason provided"
+    reason = " ".join(args[1:]) if len(args) > 1 else "No reason provided"
     
     until_date = update.message.date + duration
     
@@ -868,6 +897,7 @@ async def setwarnlimit_command(update: Update, context: ContextTypes.DEFAULT_TYP
             return
         
         context.bot_data["WARN_LIMIT"] = limit
+        await storage.set_setting("WARN_LIMIT", limit)
         await update.message.reply_text(f"✅ Warning limit set to {limit}.")
     except ValueError:
         await update.message.reply_text("❗ Please provide a valid number for the warning limit.")
@@ -892,6 +922,7 @@ async def setwarnaction_command(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     context.bot_data["WARN_ACTION"] = action
+    await storage.set_setting("WARN_ACTION", action)
     await update.message.reply_text(f"✅ Warning action set to: {action}")
 
 # Set log channel
@@ -920,6 +951,7 @@ async def setlog_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         
         # If successful, set the log channel
         context.bot_data["MOD_LOG_CHANNEL"] = log_channel
+        await storage.set_setting("MOD_LOG_CHANNEL", log_channel)
         await update.message.reply_text(f"✅ Log channel set successfully! Test message sent.")
     except Exception as e:
         await update.message.reply_text(f"Failed to set log channel: {e}\n\nMake sure the bot is an admin in the channel.")
@@ -950,6 +982,7 @@ async def modhelp_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         "• /setwarnlimit [number] - Set the warning limit\n"
         "• /setwarnaction [action] - Set action when warn limit is reached\n"
         "• /setlog [channel] - Set channel for moderation logs\n\n"
+        "<i>Target a user by replying to them, or put @username or their ID first (e.g., /ban @spammer Spam)</i>\n"
         "<i>For more details on each command, use /modhelp [command] (e.g., /modhelp mute)</i>"
     )
     
@@ -14,7 +14,7 @@ ADMIN_USER_ID = 7985094672
 
 # Directory structure
 BASE_DIR = Path(__file__).resolve().parent
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))
 DATA_DIR.mkdir(exist_ok=True)
 
 # Bot settings
@@ -28,4 +28,93 @@ ENABLE_AFK_TRACKING = True
 
 # Timeouts and limits
 COMMAND_TIMEOUT = 60  # seconds
-FLOOD_LIMIT = 5  # messages per minute
\ No newline at end of file
+FLOOD_LIMIT = 5  # messages per minute
+
+# Group registry
+GROUPS_FLUSH_INTERVAL = 30  # seconds between background flushes
+GROUPS_FLUSH_THRESHOLD = 100  # pending changes that trigger an early flush
+
+# Storage
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite")
+STORAGE_FILE = DATA_DIR / "bot.db"
+
+# Sudo admins
+SUDO_RECHECK_INTERVAL = 5  # seconds between checks for sudo edits made outside the bot
+
+# Bulk sending (broadcasts and other fan-out to many chats)
+BULK_SEND_RATE = 25  # messages per second, below Telegram's ~30/s global limit
+BROADCAST_CONCURRENCY = 20  # sends in flight
+BROADCAST_MAX_RETRIES = 3  # retries per chat after RetryAfter
+BROADCAST_PROGRESS_INTERVAL = 5  # seconds between status message edits
+
+# Group membership verification
+VERIFY_MODE = os.getenv("VERIFY_MODE", "sliding")  # "sliding" or "daily"
+VERIFY_CONCURRENCY = 10  # getChat calls in flight
+VERIFY_RATE = 20  # getChat calls per second
+VERIFY_SLICE_INTERVAL = 300  # seconds between slices in sliding mode
+
+# Startup
+STARTUP_NOTICE_WINDOW = int(os.getenv("STARTUP_NOTICE_WINDOW", 6 * 60 * 60))  # seconds before a group gets another startup notice
+
+# Admin status cache
+ADMIN_CACHE_TTL = 300  # seconds to trust a cached admin
+ADMIN_CACHE_NEGATIVE_TTL = 60  # seconds to trust a cached non-admin
+ADMIN_CACHE_MAX_ENTRIES = 50000
+ADMIN_ROSTER_TTL = 600  # seconds before a chat's admin list is refreshed in the background
+ADMIN_ROSTER_MAX_AGE = 3600  # seconds after which a stale admin list is reloaded before use
+
+# Outgoing HTTP
+HTTP_POOL_LIMIT = 50  # open connections across all hosts
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_TIMEOUT = 10  # seconds per request
+HTTP_CONNECT_TIMEOUT = 5
+
+# /meow image pool
+CAT_POOL_SIZE = 50  # image URLs kept ready
+CAT_POOL_LOW_WATER = 10  # refill when fewer than this remain
+CAT_POOL_REFILL_BATCH = 25  # images fetched per API request
+
+# Telegram file_id cache for media sent by URL
+MEDIA_CACHE_MAX_ENTRIES = 1000  # oldest entries are evicted past this
+
+# Welcome messages
+WELCOME_BATCH_WINDOW = float(os.getenv("WELCOME_BATCH_WINDOW", 5))  # seconds joins are collected before one welcome
+WELCOME_BATCH_MAX = int(os.getenv("WELCOME_BATCH_MAX", 20))  # welcome right away once this many have joined
+
+# /purge
+PURGE_CONCURRENCY = 3  # deleteMessages calls in flight per purge
+PURGE_MAX_RETRIES = 3  # flood-limit and network retries per chunk
+PURGE_RETRY_DELAY = 1  # seconds before retrying a chunk after a network error, times the attempt
+PURGE_PROGRESS_INTERVAL = 2  # seconds between progress edits
+
+# Recent-message index used by /purge
+MESSAGE_INDEX_PER_CHAT = 1000  # messages remembered per chat
+MESSAGE_INDEX_MAX_ENTRIES = 200000  # across all chats; least active chats are dropped first
+
+# AFK
+AFK_TTL = int(os.getenv("AFK_TTL", 7 * 24 * 3600))  # seconds before an AFK status expires (0 = never)
+AFK_SWEEP_INTERVAL = 3600  # seconds between expiry sweeps
+AFK_FLUSH_INTERVAL = 30  # seconds between writes of pending AFK changes
+AFK_FLUSH_THRESHOLD = 100  # write right away once this many changes are pending
+
+# Profiles of users seen in updates
+PROFILE_CACHE_MAX_ENTRIES = 100000  # least recently seen users are dropped first
+USERNAME_MAX_AGE = 30 * 24 * 3600  # seconds before an unseen @username stops resolving
+
+# Maintenance mode
+MAINTENANCE_NOTICE_INTERVAL = 300  # seconds between maintenance notices in the same chat
+
+# Metrics endpoint (Prometheus text format)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))  # 0 disables the endpoint
+
+# /profile
+PROFILE_MAX_SECONDS = 120  # longest capture allowed
+PROFILE_SLOW_CALLBACK = 0.05  # seconds a callback must hold the loop to be reported in loop mode
+
+# Update recording, replayed with benchmarks.replay
+RECORD_UPDATES = os.getenv("RECORD_UPDATES", "0") == "1"  # off unless enabled
+RECORD_DIR = DATA_DIR / "recordings"
+RECORD_ANONYMISE = os.getenv("RECORD_ANONYMISE", "ids")  # "none", "ids" (pseudonymous users and chats) or "text" (ids and message text)
+RECORD_FLUSH_INTERVAL = 10  # seconds between writes of buffered updates
+RECORD_FLUSH_THRESHOLD = 500  # write right away once this many updates are buffered
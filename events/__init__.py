@@ -1,5 +1,8 @@
 from telegram.ext import ChatMemberHandler
 from events.welcome import welcome_new_member
+from events.admin_changes import track_admin_changes
 
 def register_all_handlers(app):
     app.add_handler(ChatMemberHandler(welcome_new_member, ChatMemberHandler.CHAT_MEMBER))
+    # Separate group so it runs alongside the welcome handler
+    app.add_handler(ChatMemberHandler(track_admin_changes, ChatMemberHandler.CHAT_MEMBER), group=1)
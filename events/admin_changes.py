@@ -0,0 +1,23 @@
+# File: events/admin_changes.py
+import logging
+from telegram import Update, ChatMemberUpdated
+from telegram.ext import ContextTypes
+
+from utils.admin_cache import admin_cache, ADMIN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+async def track_admin_changes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep the admin cache in sync with promotions and demotions."""
+    member_update: ChatMemberUpdated = update.chat_member
+    was_admin = member_update.old_chat_member.status in ADMIN_STATUSES
+    is_admin = member_update.new_chat_member.status in ADMIN_STATUSES
+
+    user = member_update.new_chat_member.user
+    admin_cache.set(member_update.chat.id, user.id, is_admin)
+
+    if was_admin != is_admin:
+        logger.info(
+            f"🛡️ {user.full_name} (ID: {user.id}) was "
+            f"{'promoted' if is_admin else 'demoted'} in chat {member_update.chat.id}"
+        )
@@ -1,13 +1,144 @@
 # File: commands.py or welcome.py (depending on your structure)
 import random
 import logging
-from telegram import Update, ChatMemberUpdated
+from typing import Dict, List
+from telegram import Update, ChatMemberUpdated, User
 from telegram.constants import ParseMode
-from telegram.ext import ContextTypes
+from telegram.ext import ContextTypes, Job
 from telegram.error import TelegramError
 
+from config import WELCOME_BATCH_WINDOW, WELCOME_BATCH_MAX
+from utils.media_cache import send_cached_media
+
 logger = logging.getLogger(__name__)
 
+# Cute cat GIFs for welcome
+CAT_GIFS = [
+    "https://media.giphy.com/media/vFKqnCdLPNOKc/giphy.gif",      # Keyboard cat
+    "https://media.giphy.com/media/l0MYJnJQ4EiYLxvQ4/giphy.gif",  # Welcome cat
+    "https://media.giphy.com/media/3oKIPnAiaMCws8nOsE/giphy.gif", # Cat waving paw
+    "https://media.giphy.com/media/BzyTuYCmvSORqs1ABM/giphy.gif", # Hello cat
+    "https://media.giphy.com/media/Vbtc9VG51NtzT1Qnv1/giphy.gif"  # Happy jumping cat
+]
+
+# Telegram's limit on a media caption, counted after HTML is parsed
+CAPTION_LIMIT = 1024
+
+wave_emoji = "👋"
+paw_emoji = "🐾"
+sparkle_emoji = "✨"
+id_emoji = "🆔"
+bot_emoji = "🤖"
+
+
+def _visible_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def build_welcome_caption(members: List[User]) -> str:
+    """
+    Build one HTML caption welcoming every member in the batch.
+
+    Names that would push the caption past Telegram's limit are folded
+    into an "and N more" line.
+    """
+    if len(members) == 1:
+        member = members[0]
+        return (
+            f"{wave_emoji} <b>Welcome to the group, {member.mention_html()}!</b> {paw_emoji}\n\n"
+            f"{sparkle_emoji} Feel free to introduce yourself and join the chat!\n"
+            f"{id_emoji} <b>Your ID:</b> <code>{member.id}</code>\n"
+            f"{bot_emoji} <b>Username:</b> @{member.username or 'None'}\n\n"
+            f"Type <code>/help</code> to get started!"
+        )
+
+    header = f"{wave_emoji} <b>Welcome to the group, everyone!</b> {paw_emoji}\n\n"
+    footer = (
+        f"\n\n{sparkle_emoji} Feel free to introduce yourselves and join the chat!\n"
+        f"Type <code>/help</code> to get started!"
+    )
+    # Visible length only: the HTML tags don't count towards the limit
+    used = _visible_length("👋 Welcome to the group, everyone! 🐾\n\n") + _visible_length(footer) - len("<code></code>")
+    more_reserve = len("\n…and 9999 more")
+
+    lines = []
+    for member in members:
+        line_length = _visible_length(f"• {member.full_name}") + 1
+        if used + line_length + more_reserve > CAPTION_LIMIT:
+            break
+        lines.append(f"• {member.mention_html()}")
+        used += line_length
+
+    remaining = len(members) - len(lines)
+    if remaining:
+        lines.append(f"…and {remaining} more")
+
+    return header + "\n".join(lines) + footer
+
+
+class WelcomeBatcher:
+    """
+    Coalesces joins per chat into a single welcome.
+
+    The first join in a chat opens a window; everyone who joins before it
+    closes is welcomed by one animation. A full batch is sent right away.
+    """
+
+    def __init__(self, window: float = WELCOME_BATCH_WINDOW, max_batch: int = WELCOME_BATCH_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[int, List[User]] = {}
+        self._jobs: Dict[int, Job] = {}
+        self.joins = 0
+        self.sent = 0
+
+    def add(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, member: User) -> None:
+        self.joins += 1
+        batch = self._pending.setdefault(chat_id, [])
+        if any(existing.id == member.id for existing in batch):
+            return
+        batch.append(member)
+
+        if len(batch) >= self.max_batch:
+            # Full batch: send now and let the next join open a new window
+            job = self._jobs.pop(chat_id, None)
+            if job:
+                job.schedule_removal()
+            del self._pending[chat_id]
+            context.job_queue.run_once(self._send_job, 0, chat_id=chat_id, data=batch)
+        elif chat_id not in self._jobs:
+            self._jobs[chat_id] = context.job_queue.run_once(
+                self._window_closed, self.window, chat_id=chat_id, name=f"welcome_{chat_id}"
+            )
+
+    async def _window_closed(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        chat_id = context.job.chat_id
+        self._jobs.pop(chat_id, None)
+        members = self._pending.pop(chat_id, None)
+        if members:
+            await self.send(context, chat_id, members)
+
+    async def _send_job(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        await self.send(context, context.job.chat_id, context.job.data)
+
+    async def send(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, members: List[User]) -> None:
+        """Send one welcome for a batch of members."""
+        try:
+            # Reuses Telegram's file_id after the first upload of each GIF
+            await send_cached_media(
+                context.bot, "animation", chat_id, random.choice(CAT_GIFS),
+                caption=build_welcome_caption(members),
+                parse_mode=ParseMode.HTML
+            )
+            self.sent += 1
+        except TelegramError as e:
+            logger.error(f"❌ Error sending welcome message: {e}")
+
+
+welcome_batcher = WelcomeBatcher()
+
+
 async def welcome_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Welcomes new members in a group with a cute cat GIF and custom message."""
     chat = update.effective_chat
@@ -27,47 +158,8 @@ async def welcome_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE)
     new_member = member_update.new_chat_member.user
     logger.info(f"👤 New member joined: {new_member.full_name} (ID: {new_member.id})")
 
-    # Cute cat GIFs for welcome
-    cat_gifs = [
-        "https://media.giphy.com/media/vFKqnCdLPNOKc/giphy.gif",      # Keyboard cat
-        "https://media.giphy.com/media/l0MYJnJQ4EiYLxvQ4/giphy.gif",  # Welcome cat
-        "https://media.giphy.com/media/3oKIPnAiaMCws8nOsE/giphy.gif", # Cat waving paw
-        "https://media.giphy.com/media/BzyTuYCmvSORqs1ABM/giphy.gif", # Hello cat
-        "https://media.giphy.com/media/Vbtc9VG51NtzT1Qnv1/giphy.gif"  # Happy jumping cat
-    ]
-    selected_gif = random.choice(cat_gifs)
-
-    wave_emoji = "👋"
-    paw_emoji = "🐾"
-    sparkle_emoji = "✨"
-    id_emoji = "🆔"
-    bot_emoji = "🤖"
-
-    welcome_text = (
-        f"{wave_emoji} <b>Welcome to the group, {new_member.mention_html()}!</b> {paw_emoji}\n\n"
-        f"{sparkle_emoji} Feel free to introduce yourself and join the chat!\n"
-        f"{id_emoji} <b>Your ID:</b> <code>{new_member.id}</code>\n"
-        f"{bot_emoji} <b>Username:</b> @{new_member.username or 'None'}\n\n"
-        f"Type <code>/help</code> to get started!"
-    )
-
-    try:
-        # Send GIF
-        await context.bot.send_animation(
-            chat_id=chat.id,
-            animation=selected_gif,
-            caption=f"Welcome to the group, {new_member.first_name}! {wave_emoji}"
-        )
-
-        # Send message
-        await context.bot.send_message(
-            chat_id=chat.id,
-            text=welcome_text,
-            parse_mode=ParseMode.HTML
-        )
-
-    except TelegramError as e:
-        logger.error(f"❌ Error sending welcome message: {e}")
+    # Joins arriving close together share one welcome
+    welcome_batcher.add(context, chat.id, new_member)
 
 
 # File: commands/welcome.py
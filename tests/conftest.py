@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Keep config's data directory out of the working tree while testing
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="bot-tests-"))
+os.environ.setdefault("METRICS_PORT", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,51 @@
+import time
+
+from telegram import Chat, ChatMemberAdministrator, ChatMemberLeft, ChatMemberMember, User
+
+from utils.admin_cache import admin_cache
+from utils.admin_check import bot_lacks_right, record_bot_membership
+
+BOT = User(id=999, first_name="Bot", is_bot=True)
+
+
+def load_roster(chat_id, admins):
+    admin_cache._rosters[chat_id] = (frozenset(admins), time.monotonic())
+    for user_id in admins:
+        admin_cache.set(chat_id, user_id, True)
+
+
+def test_invalidate_drops_roster_and_entries():
+    load_roster(-1001, {1, 2})
+    admin_cache.set(-1002, 1, True)
+
+    admin_cache.invalidate(-1001)
+
+    assert -1001 not in admin_cache._rosters
+    assert admin_cache.get(-1001, 1) is None
+    assert admin_cache.get(-1002, 1) is True
+
+
+def test_bot_losing_admin_or_leaving_drops_the_roster():
+    chat = Chat(id=-1003, type=Chat.SUPERGROUP, title="Group")
+    load_roster(chat.id, {1})
+    record_bot_membership(chat, ChatMemberMember(user=BOT))
+    assert chat.id not in admin_cache._rosters
+
+    load_roster(chat.id, {1})
+    record_bot_membership(chat, ChatMemberLeft(user=BOT))
+    assert chat.id not in admin_cache._rosters
+    assert admin_cache.get(chat.id, 1) is None
+
+
+def test_bot_rights_recorded_from_membership_are_checked():
+    chat = Chat(id=-1004, type=Chat.SUPERGROUP, title="Group")
+    assert not bot_lacks_right(chat.id, "can_pin_messages")  # unknown chat: let the API decide
+
+    record_bot_membership(chat, ChatMemberAdministrator(
+        user=BOT, can_be_edited=False, is_anonymous=False, can_manage_chat=True,
+        can_delete_messages=True, can_manage_video_chats=False, can_restrict_members=False,
+        can_promote_members=False, can_change_info=False, can_invite_users=False,
+        can_pin_messages=False
+    ))
+    assert not bot_lacks_right(chat.id, "can_delete_messages")
+    assert bot_lacks_right(chat.id, "can_pin_messages")
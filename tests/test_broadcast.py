@@ -0,0 +1,38 @@
+import asyncio
+
+from telegram.error import ChatMigrated
+
+from utils.broadcast import broadcast_message
+from utils.group_registry import GroupRegistry
+from utils.throttle import TokenBucket
+
+
+class FakeBot:
+    def __init__(self, migrations):
+        self.migrations = migrations
+        self.sent_to = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.migrations:
+            raise ChatMigrated(self.migrations[chat_id])
+        self.sent_to.append(chat_id)
+
+
+def test_migrated_chat_is_reported_under_its_new_id():
+    registry = GroupRegistry(backend=None, flush_threshold=100)
+    registry._groups = {"-1": {"title": "Old group"}, "-2": {"title": "Other"}}
+    bot = FakeBot({"-1": -1001})
+    sent = []
+
+    report = asyncio.run(broadcast_message(
+        bot, ["-1", "-2"], "hello",
+        on_sent=sent.append,
+        on_migrated=registry.migrate,
+        bucket=TokenBucket(1000)
+    ))
+
+    assert report.sent == 2
+    assert report.migrated == {"-1": "-1001"}
+    assert sorted(sent) == ["-1001", "-2"]
+    assert "-1" not in registry
+    assert registry.get("-1001")["title"] == "Old group"
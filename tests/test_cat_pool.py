@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from commands.cat import CatImagePool
+
+
+class CountingPool(CatImagePool):
+    def __init__(self, fail: bool = False):
+        super().__init__(size=10, low_water=0, batch=3)
+        self.requests = 0
+        self.fail = fail
+
+    async def refill(self) -> None:
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ValueError("The cat API returned unexpected data")
+        self._urls.extend(f"https://cats.example/{self.requests}-{index}" for index in range(self.batch))
+
+
+def test_take_waits_for_the_warm_up_instead_of_fetching_again():
+    async def main():
+        pool = CountingPool()
+        pool.start_refill()
+        urls = await asyncio.gather(pool.take(), pool.take())
+        return pool, urls
+
+    pool, urls = asyncio.run(main())
+    assert pool.requests == 1
+    assert all(urls) and urls[0] != urls[1]
+
+
+def test_take_raises_when_the_refill_fails():
+    async def main():
+        pool = CountingPool(fail=True)
+        with pytest.raises(ValueError):
+            await pool.take()
+        return pool
+
+    pool = asyncio.run(main())
+    assert pool.requests == 1
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from telegram import Update
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.harness import BotUnderTest, feed
+
+GROUP_ID = -1001000000777
+ADDED_BY = 2001
+NEW_MEMBER = 2002
+PROMOTED = 2003
+NEW_GROUP_ID = -1001000000888
+
+SEND_METHODS = ("sendMessage", "sendAnimation", "sendPhoto")
+
+
+def member_update(api, chat_id, actor, user, old_status, new_status, kind="chat_member"):
+    return {
+        "update_id": 0,
+        kind: {
+            "chat": api.chat(chat_id),
+            "from": api.user(actor),
+            "date": int(time.time()),
+            "old_chat_member": {"status": old_status, "user": api.user(user)},
+            "new_chat_member": {"status": new_status, "user": api.user(user)},
+        },
+    }
+
+
+def test_membership_updates_during_maintenance_send_nothing(tmp_path):
+    async def main():
+        from events.welcome import welcome_batcher
+        from utils.admin_cache import admin_cache
+        from utils.group_registry import group_registry
+
+        api = FakeBotAPI()
+        async with BotUnderTest(api, log_file=str(tmp_path / "bot.log")) as app:
+            app.bot_data["maintenance_mode"] = True
+            bot_id = app.bot.id
+            promotion = member_update(api, GROUP_ID, ADDED_BY, PROMOTED, "member", "administrator")
+            promotion["chat_member"]["new_chat_member"].update(
+                {"can_be_edited": False, "is_anonymous": False, "can_manage_chat": True,
+                 "can_delete_messages": True, "can_manage_video_chats": False,
+                 "can_restrict_members": True, "can_promote_members": False,
+                 "can_change_info": False, "can_invite_users": True}
+            )
+            payloads = [
+                member_update(api, GROUP_ID, ADDED_BY, NEW_MEMBER, "left", "member"),
+                promotion,
+                member_update(api, NEW_GROUP_ID, ADDED_BY, bot_id, "left", "member", kind="my_chat_member"),
+            ]
+            api.reset_counts()
+            await feed(app, [Update.de_json(payload, app.bot) for payload in payloads])
+            await asyncio.sleep(0.05)
+
+            sends = {method: api.calls[method] for method in SEND_METHODS if api.calls[method]}
+            assert sends == {}
+            assert GROUP_ID not in welcome_batcher._pending
+            # State is still tracked
+            assert admin_cache.get(GROUP_ID, PROMOTED) is True
+            assert str(NEW_GROUP_ID) in group_registry
+
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import asyncio
+
+from telegram.error import BadRequest
+
+from utils.media_cache import FileIdCache, is_file_id_error
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.file_ids = {}
+
+    async def load_file_ids(self):
+        return dict(self.file_ids)
+
+    async def set_file_id(self, source_url, file_id):
+        self.file_ids[source_url] = file_id
+
+    async def delete_file_ids(self, source_urls):
+        for source_url in source_urls:
+            self.file_ids.pop(source_url, None)
+
+
+def run_with_cache(max_entries, steps):
+    backend = MemoryBackend()
+
+    async def main():
+        cache = FileIdCache(backend, max_entries=max_entries)
+        steps(cache)
+        await asyncio.gather(*cache._pending)
+        return cache
+
+    return asyncio.run(main()), backend
+
+
+def test_hit_keeps_entry_from_eviction():
+    def steps(cache):
+        cache.remember("gif", "file-gif")
+        for index in range(5):
+            assert cache.get("gif") == "file-gif"
+            cache.remember(f"cat{index}", f"file-cat{index}")
+
+    cache, backend = run_with_cache(3, steps)
+
+    assert cache.get("gif") == "file-gif"
+    assert cache.get("cat0") is None
+    assert set(backend.file_ids) == {"gif", "cat3", "cat4"}
+
+
+def test_least_recently_used_entry_is_evicted():
+    def steps(cache):
+        cache.remember("a", "1")
+        cache.remember("b", "2")
+        cache.get("a")
+        cache.remember("c", "3")
+
+    cache, backend = run_with_cache(2, steps)
+
+    assert cache.get("b") is None
+    assert set(backend.file_ids) == {"a", "c"}
+
+
+def test_forget_removes_entry():
+    def steps(cache):
+        cache.remember("a", "1")
+        cache.forget("a")
+        cache.forget("missing")
+
+    cache, backend = run_with_cache(2, steps)
+
+    assert cache.get("a") is None
+    assert backend.file_ids == {}
+
+
+def test_only_file_id_rejections_count_as_file_id_errors():
+    assert is_file_id_error(BadRequest("Wrong file identifier/http url specified"))
+    assert is_file_id_error(BadRequest("Wrong remote file identifier specified: wrong padding in the string"))
+    assert not is_file_id_error(BadRequest("Not enough rights to send animations to the chat"))
+    assert not is_file_id_error(BadRequest("Chat not found"))
+    assert not is_file_id_error(BadRequest("Replied message not found"))
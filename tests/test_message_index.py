@@ -0,0 +1,69 @@
+from utils.message_index import MessageIndex
+
+
+def fill(index: MessageIndex, chat_id: int, message_ids, user_id: int = 1, timestamp: int = 0) -> None:
+    for message_id in message_ids:
+        index.record(chat_id, message_id, user_id, timestamp)
+
+
+def test_per_chat_buffer_keeps_newest_messages():
+    index = MessageIndex(per_chat=3, max_entries=100)
+    fill(index, -1, range(1, 6))
+
+    assert index.ids_since(-1, 0) == [3, 4, 5]
+    assert len(index) == 3
+
+
+def test_least_recently_active_chat_is_evicted():
+    index = MessageIndex(per_chat=10, max_entries=4)
+    fill(index, -1, [1, 2])
+    fill(index, -2, [1, 2])
+    # Chat -1 becomes the most recently active one
+    fill(index, -1, [3])
+
+    assert index.stats() == {"chats": 1, "entries": 3}
+    assert index.ids_since(-2, 0) == []
+    assert index.ids_since(-1, 0) == [1, 2, 3]
+
+
+def test_last_chat_is_never_evicted():
+    index = MessageIndex(per_chat=10, max_entries=2)
+    fill(index, -1, [1, 2, 3])
+
+    assert index.ids_since(-1, 0) == [1, 2, 3]
+
+
+def test_forget_drops_deleted_messages():
+    index = MessageIndex(per_chat=10, max_entries=100)
+    fill(index, -1, [1, 2, 3, 4])
+    index.forget(-1, [2, 4, 99])
+
+    assert index.ids_since(-1, 0) == [1, 3]
+    assert len(index) == 2
+
+    # Buffer keeps its size limit after forgetting
+    fill(index, -1, range(5, 20))
+    assert len(index) == 10
+
+
+def test_forget_unknown_chat_is_a_no_op():
+    index = MessageIndex()
+    index.forget(-5, [1, 2])
+    assert len(index) == 0
+
+
+def test_ids_from_user_returns_newest_first():
+    index = MessageIndex(per_chat=10, max_entries=100)
+    for message_id in range(1, 9):
+        index.record(-1, message_id, 7 if message_id % 2 else 8, 0)
+
+    assert index.ids_from_user(-1, 7, 2) == [7, 5]
+    assert index.ids_from_user(-1, 9, 5) == []
+
+
+def test_ids_since_filters_by_timestamp():
+    index = MessageIndex(per_chat=10, max_entries=100)
+    for message_id, sent_at in [(1, 100), (2, 200), (3, 300)]:
+        index.record(-1, message_id, 1, sent_at)
+
+    assert index.ids_since(-1, 200) == [2, 3]
@@ -0,0 +1,67 @@
+import asyncio
+
+from telegram.error import BadRequest, Forbidden, TimedOut
+
+from utils import purge
+from utils.purge import delete_messages_bulk
+
+
+class FakeBot:
+    """Fails deleteMessages with the queued errors, then succeeds."""
+
+    def __init__(self, bulk_errors=(), single_error=None):
+        self.bulk_errors = list(bulk_errors)
+        self.single_error = single_error
+        self.bulk_calls = 0
+        self.single_calls = 0
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.bulk_calls += 1
+        if self.bulk_errors:
+            raise self.bulk_errors.pop(0)
+
+    async def delete_message(self, chat_id, message_id):
+        self.single_calls += 1
+        if self.single_error and message_id == 250:
+            raise self.single_error
+
+
+def purge_with(bot, count=250):
+    return asyncio.run(delete_messages_bulk(bot, -1, range(1, count + 1), concurrency=1))
+
+
+def test_undeletable_message_falls_back_to_single_deletes():
+    bot = FakeBot([BadRequest("Message can't be deleted")], single_error=BadRequest("Message can't be deleted"))
+    report = purge_with(bot)
+
+    assert bot.single_calls == 100
+    assert report.fallback_chunks == 1
+    assert report.cleared == 249 and report.failed == 1
+    assert report.aborted is None
+
+
+def test_missing_rights_stop_the_purge():
+    bot = FakeBot([BadRequest("Not enough rights to delete messages")])
+    report = purge_with(bot)
+
+    assert bot.bulk_calls == 1 and bot.single_calls == 0
+    assert report.skipped == 250 and report.cleared == 0
+    assert report.aborted is not None
+
+
+def test_forbidden_stops_the_purge():
+    bot = FakeBot([Forbidden("Forbidden: bot was kicked from the supergroup chat")])
+    report = purge_with(bot)
+
+    assert bot.single_calls == 0
+    assert report.skipped == 250
+    assert report.aborted is not None
+
+
+def test_network_error_retries_the_chunk(monkeypatch):
+    monkeypatch.setattr(purge, "PURGE_RETRY_DELAY", 0)
+    bot = FakeBot([TimedOut(), TimedOut()])
+    report = purge_with(bot)
+
+    assert bot.bulk_calls == 5 and bot.single_calls == 0
+    assert report.cleared == 250 and report.failed == 0
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from utils import storage as storage_module
+from utils.storage import SQLiteStorage, Storage, import_legacy_json
+
+
+def test_storage_interface_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def run_import(tmp_path, monkeypatch, groups_text, sudo_text):
+    groups_file = tmp_path / "groups.json"
+    sudo_file = tmp_path / "sudo_admins.json"
+    groups_file.write_text(groups_text)
+    sudo_file.write_text(sudo_text)
+    monkeypatch.setattr(storage_module, "LEGACY_GROUPS_FILE", groups_file)
+    monkeypatch.setattr(storage_module, "LEGACY_SUDO_FILE", sudo_file)
+
+    async def main():
+        store = SQLiteStorage(tmp_path / "bot.db")
+        await store.open()
+        try:
+            imported = await import_legacy_json(store)
+            return imported, await store.load_groups(), await store.load_sudo_admins(), await store.load_settings()
+        finally:
+            await store.close()
+
+    return asyncio.run(main())
+
+
+GROUPS = json.dumps({"-100": {"title": "Group", "last_active": "2026-01-01T00:00:00"}})
+ADMINS = json.dumps({"admins": [{"id": 5, "name": "Admin", "added_date": "2026-01-01T00:00:00", "added_by": 1}]})
+
+
+def test_broken_file_leaves_import_pending(tmp_path, monkeypatch):
+    imported, groups, admins, settings = run_import(tmp_path, monkeypatch, GROUPS, "{not json")
+
+    assert not imported
+    assert groups == {} and admins == []
+    assert "legacy_json_imported" not in settings
+
+    # Fixing the file lets the next start import both
+    imported, groups, admins, settings = run_import(tmp_path, monkeypatch, GROUPS, ADMINS)
+
+    assert imported
+    assert list(groups) == ["-100"]
+    assert [admin["id"] for admin in admins] == [5]
+    assert "legacy_json_imported" in settings
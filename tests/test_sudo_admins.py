@@ -0,0 +1,75 @@
+import asyncio
+
+from utils.storage import SQLiteStorage
+from utils.sudo_admins import SudoIndex
+
+
+def admin(user_id: int):
+    return {"id": user_id, "name": f"Admin {user_id}", "added_date": "2026-01-01T00:00:00", "added_by": 1}
+
+
+class CountingStorage(SQLiteStorage):
+    loads = 0
+    version_checks = 0
+
+    async def load_sudo_admins(self):
+        self.loads += 1
+        return await super().load_sudo_admins()
+
+    async def data_version(self):
+        self.version_checks += 1
+        return await super().data_version()
+
+
+def test_own_writes_do_not_trigger_a_reload(tmp_path):
+    async def main():
+        store = CountingStorage(tmp_path / "bot.db")
+        await store.open()
+        index = SudoIndex(store, recheck_interval=0)
+        await index.reload()
+
+        await store.save_groups({"-100": {"title": "Group", "last_active": "now"}}, [])
+        await index.add(admin(5))
+
+        assert await index.contains(5)
+        assert store.loads == 1
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_outside_edit_is_picked_up(tmp_path):
+    async def main():
+        store = CountingStorage(tmp_path / "bot.db")
+        other = SQLiteStorage(tmp_path / "bot.db")
+        await store.open()
+        await other.open()
+        index = SudoIndex(store, recheck_interval=0)
+        await index.reload()
+
+        assert not await index.contains(7)
+        await other.add_sudo_admin(admin(7))
+        assert await index.contains(7)
+        assert store.loads == 2
+
+        await other.close()
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_version_is_checked_at_most_once_per_interval(tmp_path):
+    async def main():
+        store = CountingStorage(tmp_path / "bot.db")
+        await store.open()
+        index = SudoIndex(store, recheck_interval=60)
+        await index.reload()
+        checks = store.version_checks
+
+        for _ in range(100):
+            await index.contains(5)
+
+        assert store.version_checks == checks
+        await store.close()
+
+    asyncio.run(main())
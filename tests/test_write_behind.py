@@ -0,0 +1,47 @@
+import asyncio
+
+from utils.write_behind import WriteBehind
+
+
+def test_threshold_starts_a_background_flush():
+    batches = []
+
+    async def write(batch):
+        batches.append(set(batch))
+
+    async def main():
+        writer = WriteBehind(write, threshold=3, label="test")
+        for key in ["a", "b", "a", "c"]:
+            writer.add(key)
+        await asyncio.sleep(0)
+        return writer
+
+    writer = asyncio.run(main())
+    assert batches == [{"a", "b", "c"}]
+    assert len(writer) == 0
+
+
+def test_failed_batch_is_kept_in_order():
+    batches = []
+    fail = [True]
+
+    async def write(batch):
+        if fail.pop(0) if fail else False:
+            raise OSError("disk full")
+        batches.append(list(batch))
+
+    async def main():
+        writer = WriteBehind(write, threshold=100, label="test", ordered=True)
+        writer.add("first")
+        assert not await writer.flush()
+        writer.add("second")
+        assert await writer.flush()
+
+    asyncio.run(main())
+    assert batches == [["first", "second"]]
+
+
+def test_add_without_running_loop_waits_for_flush():
+    writer = WriteBehind(lambda batch: None, threshold=1, label="test")
+    writer.add("a")
+    assert len(writer) == 1
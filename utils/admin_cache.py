@@ -0,0 +1,220 @@
+# utils/admin_cache.py
+import time
+import asyncio
+from typing import Callable, Dict, FrozenSet, Optional, Tuple, Union
+
+from telegram.ext import ContextTypes
+
+from config import (
+    ADMIN_CACHE_TTL,
+    ADMIN_CACHE_NEGATIVE_TTL,
+    ADMIN_CACHE_MAX_ENTRIES,
+    ADMIN_ROSTER_TTL,
+    ADMIN_ROSTER_MAX_AGE,
+)
+
+import logging
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ("administrator", "creator")
+
+ChatId = Union[str, int]
+ApiCallHook = Optional[Callable[[str], None]]
+
+
+class AdminCache:
+    """
+    Cache of who is an admin in each chat.
+
+    The primary source is a per-chat roster of admin ids loaded with a
+    single get_chat_administrators call, which answers checks for any user
+    in that chat. Rosters older than `roster_ttl` are still used but
+    refreshed in the background; rosters older than `roster_max_age` are
+    reloaded before answering.
+
+    If a roster can't be loaded, per-user entries from get_chat_member are
+    used instead. Admins are cached for `ttl` seconds and non-admins for
+    `negative_ttl` seconds. Promotions and demotions seen in chat_member
+    updates are applied right away. A chat is forgotten when the bot leaves
+    it or loses admin, since it stops getting those updates there.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ADMIN_CACHE_TTL,
+        negative_ttl: float = ADMIN_CACHE_NEGATIVE_TTL,
+        max_entries: int = ADMIN_CACHE_MAX_ENTRIES,
+        roster_ttl: float = ADMIN_ROSTER_TTL,
+        roster_max_age: float = ADMIN_ROSTER_MAX_AGE
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.roster_ttl = roster_ttl
+        self.roster_max_age = roster_max_age
+        self._entries: Dict[Tuple[int, int], Tuple[bool, float]] = {}
+        self._rosters: Dict[int, Tuple[FrozenSet[int], float]] = {}
+        self._roster_loads: Dict[int, asyncio.Task] = {}
+        self._roster_failed_until: Dict[int, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.roster_fetches = 0
+
+    def get(self, chat_id: ChatId, user_id: int) -> Optional[bool]:
+        """Return the cached status, or None if unknown or expired."""
+        key = (int(chat_id), int(user_id))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        is_admin, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        return is_admin
+
+    def set(self, chat_id: ChatId, user_id: int, is_admin: bool) -> None:
+        key = (int(chat_id), int(user_id))
+        ttl = self.ttl if is_admin else self.negative_ttl
+        self._entries.pop(key, None)
+        self._entries[key] = (is_admin, time.monotonic() + ttl)
+
+        # Keep a loaded roster in step with the change
+        roster = self._rosters.get(key[0])
+        if roster is not None and (key[1] in roster[0]) != is_admin:
+            admins = roster[0] | {key[1]} if is_admin else roster[0] - {key[1]}
+            self._rosters[key[0]] = (admins, roster[1])
+
+        # Drop the oldest entries once over the limit
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def invalidate(self, chat_id: ChatId) -> None:
+        """Forget every status in a chat, including its roster."""
+        chat_id = int(chat_id)
+        self._rosters.pop(chat_id, None)
+        self._roster_failed_until.pop(chat_id, None)
+        for key in [key for key in self._entries if key[0] == chat_id]:
+            del self._entries[key]
+
+    # ---------------- Rosters ----------------
+    async def _load_roster(
+        self,
+        context: ContextTypes.DEFAULT_TYPE,
+        chat_id: int,
+        on_api_call: ApiCallHook = None
+    ) -> Optional[FrozenSet[int]]:
+        from utils.admin_check import get_chat_admins
+
+        self.roster_fetches += 1
+        if on_api_call:
+            on_api_call("getChatAdministrators")
+        admins = await get_chat_admins(context, chat_id)
+        # A group always has at least one admin, so empty means the call failed
+        if not admins:
+            self._rosters.pop(chat_id, None)
+            self._roster_failed_until[chat_id] = time.monotonic() + self.negative_ttl
+            return None
+
+        self._roster_failed_until.pop(chat_id, None)
+
+        roster = frozenset(member.user.id for member in admins)
+        self._rosters[chat_id] = (roster, time.monotonic())
+        return roster
+
+    def _start_roster_load(
+        self,
+        context: ContextTypes.DEFAULT_TYPE,
+        chat_id: int,
+        on_api_call: ApiCallHook = None
+    ) -> asyncio.Task:
+        """Start loading a roster unless a load for the chat is already running."""
+        task = self._roster_loads.get(chat_id)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._load_roster(context, chat_id, on_api_call))
+            task.add_done_callback(lambda _: self._roster_loads.pop(chat_id, None))
+            self._roster_loads[chat_id] = task
+        return task
+
+    async def get_roster(
+        self,
+        context: ContextTypes.DEFAULT_TYPE,
+        chat_id: ChatId,
+        on_api_call: ApiCallHook = None
+    ) -> Optional[FrozenSet[int]]:
+        """
+        Return the ids of a chat's admins, loading or refreshing as needed.
+
+        `on_api_call` is told about calls made while the caller waits;
+        background refreshes aren't attributed to anyone.
+
+        Returns:
+            Optional[FrozenSet[int]]: Admin user ids, or None if they couldn't be loaded
+        """
+        chat_id = int(chat_id)
+        roster = self._rosters.get(chat_id)
+        if roster is not None:
+            admins, loaded_at = roster
+            age = time.monotonic() - loaded_at
+            if age < self.roster_ttl:
+                return admins
+            if age < self.roster_max_age:
+                # Serve the current roster and refresh it in the background
+                self._start_roster_load(context, chat_id)
+                return admins
+
+        return await asyncio.shield(self._start_roster_load(context, chat_id, on_api_call))
+
+    async def is_admin(
+        self,
+        context: ContextTypes.DEFAULT_TYPE,
+        chat_id: ChatId,
+        user_id: int,
+        on_api_call: ApiCallHook = None
+    ) -> bool:
+        """
+        Check admin status, calling the Bot API only on a cache miss.
+
+        `on_api_call` is called with the method name of each Bot API call made.
+
+        Raises:
+            TelegramError: If the roster can't be loaded and the lookup fails
+        """
+        chat_id = int(chat_id)
+        roster_failed = self._roster_failed_until.get(chat_id, 0) > time.monotonic()
+        if not roster_failed and (chat_id in self._rosters or self.get(chat_id, user_id) is None):
+            had_roster = chat_id in self._rosters
+            admins = await self.get_roster(context, chat_id, on_api_call)
+            if admins is not None:
+                if had_roster:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                return int(user_id) in admins
+
+        cached = self.get(chat_id, user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        # No roster available; fall back to a single lookup
+        self.misses += 1
+        if on_api_call:
+            on_api_call("getChatMember")
+        member = await context.bot.get_chat_member(chat_id, user_id)
+        is_admin = member.status in ADMIN_STATUSES
+        self.set(chat_id, user_id, is_admin)
+        return is_admin
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "rosters": len(self._rosters),
+            "roster_fetches": self.roster_fetches,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+admin_cache = AdminCache()
@@ -1,61 +1,15 @@
-from typing import Optional, List, Union
-from telegram import Update, Chat, User, ChatMember
+from typing import Callable, Optional, List, Union
+from telegram import Chat, ChatMember
 from telegram.ext import ContextTypes
 from telegram.error import TelegramError
 from telegram.constants import ChatType
 
+from utils.admin_cache import ADMIN_STATUSES, admin_cache
+from utils.group_registry import group_registry
+
 import logging
 logger = logging.getLogger(__name__)
 
-async def is_user_admin(
-    update: Update, 
-    context: ContextTypes.DEFAULT_TYPE,
-    silent: bool = False
-) -> bool:
-    """
-    Check if the user is an admin in the current group.
-    
-    Args:
-        update: The update object from Telegram
-        context: The context object from the handler
-        silent: If True, no messages will be sent to the chat
-        
-    Returns:
-        bool: True if the user is an admin, False otherwise
-    """
-    chat = update.effective_chat
-    user = update.effective_user
-    
-    # Handle None values (could happen in callbacks or other update types)
-    if not chat or not user:
-        logger.warning("Missing chat or user in update")
-        return False
-    
-    # Check if we're in a group chat
-    if chat.type not in [ChatType.GROUP, ChatType.SUPERGROUP]:
-        if not silent:
-            await update.effective_message.reply_text("⚠️ This command can only be used in group chats.")
-        return False
-    
-    try:
-        # Get chat member and check admin status
-        member = await context.bot.get_chat_member(chat.id, user.id)
-        
-        # Check admin status
-        if member.status in ["administrator", "creator"]:
-            return True
-        
-        # User is not an admin
-        if not silent:
-            await update.effective_message.reply_text("🚫 Only admins can use this command!")
-        return False
-        
-    except TelegramError as e:
-        logger.error(f"Admin check error: {e}")
-        if not silent:
-            await update.effective_message.reply_text("❌ Couldn't verify admin status. Try again later.")
-        return False
-
 async def get_chat_admins(
     context: ContextTypes.DEFAULT_TYPE, 
     chat_id: Union[str, int]
@@ -77,24 +31,102 @@ async def get_chat_admins(
         logger.error(f"Error getting chat admins: {e}")
         return []
 
+# Rights worth keeping from the bot's own ChatMemberAdministrator record
+BOT_RIGHTS = (
+    "can_delete_messages",
+    "can_restrict_members",
+    "can_pin_messages",
+    "can_invite_users",
+    "can_change_info",
+    "can_promote_members",
+)
+
+def bot_rights_from_member(member: ChatMember) -> List[str]:
+    """List the admin rights a chat member has."""
+    if member.status == ChatMember.OWNER:
+        return list(BOT_RIGHTS)
+    return [right for right in BOT_RIGHTS if getattr(member, right, False)]
+
+def bot_lacks_right(chat_id: Union[str, int], right: str) -> bool:
+    """
+    Check whether the bot is known to lack an admin right in a chat.
+
+    Rights are kept in the group registry from my_chat_member updates and
+    is_bot_admin lookups. Chats without that record return False, so callers
+    still try the API.
+
+    Args:
+        chat_id: The ID of the chat
+        right: A ChatMemberAdministrator flag from BOT_RIGHTS, e.g. "can_pin_messages"
+    """
+    info = group_registry.get(chat_id)
+    if not info or "bot_rights" not in info:
+        return False
+    return right not in info["bot_rights"]
+
+def record_bot_membership(chat: Chat, member: ChatMember) -> bool:
+    """
+    Apply a change to the bot's own membership to the group registry.
+
+    Only updates state, so it is safe to run while the bot must stay quiet.
+
+    Args:
+        chat: The chat the bot's membership changed in
+        member: The bot's new ChatMember record
+
+    Returns:
+        bool: True if the bot was added to a group it didn't know
+    """
+    if chat.type not in [ChatType.GROUP, ChatType.SUPERGROUP]:
+        return False
+
+    # Only admin bots get the chat_member updates that keep a roster current,
+    # so drop the chat's cached admins once the bot leaves or loses admin
+    if member.status not in ADMIN_STATUSES:
+        admin_cache.invalidate(chat.id)
+
+    if member.status in [ChatMember.LEFT, ChatMember.BANNED]:
+        if group_registry.remove(chat.id):
+            logger.info(f"➖ Bot removed from group: {chat.title} (ID: {chat.id})")
+        return False
+
+    is_new = group_registry.touch(chat)
+    if is_new:
+        logger.info(f"➕ Bot added to new group: {chat.title} (ID: {chat.id})")
+    # Keep the bot's own status current so BOT_ADMIN checks stay local
+    group_registry.update(chat.id, bot_status=member.status, bot_rights=bot_rights_from_member(member))
+    return is_new
+
 async def is_bot_admin(
     context: ContextTypes.DEFAULT_TYPE,
-    chat_id: Union[str, int]
+    chat_id: Union[str, int],
+    on_api_call: Optional[Callable[[str], None]] = None
 ) -> bool:
     """
     Check if the bot has admin privileges in the specified chat.
     
+    The bot's status is kept in the group registry from my_chat_member
+    updates. Chats with unknown status are looked up once and remembered.
+    
     Args:
         context: The context object from the handler
         chat_id: The ID of the chat to check
+        on_api_call: Called with the method name if a lookup is made
         
     Returns:
         bool: True if the bot is an admin, False otherwise
     """
+    info = group_registry.get(chat_id)
+    if info and info.get("bot_status"):
+        return info["bot_status"] in ADMIN_STATUSES
+    
     try:
+        if on_api_call:
+            on_api_call("getChatMember")
         bot_id = context.bot.id
         member = await context.bot.get_chat_member(chat_id, bot_id)
-        return member.status in ["administrator", "creator"]
+        group_registry.update(chat_id, bot_status=member.status, bot_rights=bot_rights_from_member(member))
+        return member.status in ADMIN_STATUSES
     except TelegramError as e:
         logger.error(f"Error checking bot admin status: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,121 @@
+# utils/afk_store.py
+import time
+from typing import Dict, Optional, Set
+
+from telegram.ext import ContextTypes
+
+from config import AFK_TTL, AFK_FLUSH_THRESHOLD
+from utils.storage import Storage, storage
+from utils.write_behind import WriteBehind
+
+import logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_REASON = "AFK"
+
+
+class AfkRecord:
+    """One AFK user: a unix timestamp and the reason they gave."""
+
+    __slots__ = ("since", "reason")
+
+    def __init__(self, since: float, reason: str):
+        self.since = since
+        # Most users keep the default reason; share a single string for it
+        self.reason = DEFAULT_REASON if reason == DEFAULT_REASON else reason
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now or time.time()) - self.since
+
+
+class AfkStore:
+    """
+    In-memory AFK records backed by storage.
+
+    Handlers read and change records in memory and mark them dirty. Dirty
+    records are written in the background, by the periodic flush job or once
+    enough changes pile up. Records older than the TTL count as gone and are
+    removed by the sweep job.
+    """
+
+    def __init__(self, backend: Storage, ttl: float = AFK_TTL, flush_threshold: int = AFK_FLUSH_THRESHOLD):
+        self.backend = backend
+        self.ttl = ttl
+        self._records: Dict[int, AfkRecord] = {}
+        self._writer = WriteBehind(self._save, flush_threshold, "AFK users")
+
+    async def load(self) -> None:
+        try:
+            rows = await self.backend.load_afk()
+        except Exception as e:
+            logger.error(f"❌ Failed to load AFK users: {e}")
+            return
+        self._records = {user_id: AfkRecord(since, reason) for user_id, (since, reason) in rows.items()}
+        self.sweep()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.get(user_id) is not None
+
+    def get(self, user_id: int) -> Optional[AfkRecord]:
+        record = self._records.get(user_id)
+        if record is not None and self.ttl and record.age() > self.ttl:
+            self.pop(user_id)
+            return None
+        return record
+
+    def set(self, user_id: int, reason: str = DEFAULT_REASON, since: Optional[float] = None) -> AfkRecord:
+        record = self._records[user_id] = AfkRecord(since or time.time(), reason)
+        self.mark_dirty(user_id)
+        return record
+
+    def pop(self, user_id: int) -> Optional[AfkRecord]:
+        record = self._records.pop(user_id, None)
+        if record is not None:
+            self.mark_dirty(user_id)
+        return record
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop records older than the TTL. Returns how many were dropped."""
+        if not self.ttl:
+            return 0
+        cutoff = (now or time.time()) - self.ttl
+        expired = [user_id for user_id, record in self._records.items() if record.since < cutoff]
+        for user_id in expired:
+            self.pop(user_id)
+        return len(expired)
+
+    def mark_dirty(self, user_id: int) -> None:
+        self._writer.add(user_id)
+
+    async def _save(self, dirty: Set[int]) -> None:
+        changed = {}
+        removed = []
+        for user_id in dirty:
+            record = self._records.get(user_id)
+            if record is None:
+                removed.append(user_id)
+            else:
+                changed[user_id] = (record.since, record.reason)
+        await self.backend.save_afk(changed, removed)
+
+    async def flush(self) -> bool:
+        """Write dirty records to storage as one batch."""
+        return await self._writer.flush()
+
+afk_store = AfkStore(storage)
+
+
+async def flush_afk_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job that writes pending AFK changes."""
+    await afk_store.flush()
+
+
+async def sweep_afk_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job that expires old AFK records."""
+    expired = afk_store.sweep()
+    if expired:
+        logger.info(f"🧹 Expired {expired} AFK users")
+        await afk_store.flush()
@@ -0,0 +1,120 @@
+# utils/broadcast.py
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from telegram import Bot
+from telegram.error import ChatMigrated, RetryAfter, TelegramError
+
+from config import BROADCAST_CONCURRENCY, BROADCAST_MAX_RETRIES, BROADCAST_PROGRESS_INTERVAL
+from utils.helpers import is_chat_gone_error
+from utils.throttle import TokenBucket, bulk_send_bucket, fan_out
+
+import logging
+logger = logging.getLogger(__name__)
+
+ChatId = Union[str, int]
+
+
+class BroadcastReport:
+    def __init__(self, total: int):
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.failed_ids: List[str] = []
+        self.pruned: List[str] = []
+        # Old chat id -> id of the supergroup it was upgraded to
+        self.migrated: Dict[str, str] = {}
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + len(self.pruned)
+
+    def __repr__(self):
+        return (
+            f"<BroadcastReport sent={self.sent} failed={self.failed} "
+            f"pruned={len(self.pruned)} total={self.total}>"
+        )
+
+
+async def broadcast_message(
+    bot: Bot,
+    chat_ids: Iterable[ChatId],
+    text: str,
+    on_progress: Optional[Callable[[BroadcastReport], Awaitable[None]]] = None,
+    on_sent: Optional[Callable[[str], None]] = None,
+    on_migrated: Optional[Callable[[str, str], None]] = None,
+    concurrency: int = BROADCAST_CONCURRENCY,
+    bucket: TokenBucket = bulk_send_bucket,
+    **kwargs
+) -> BroadcastReport:
+    """
+    Send the same message to many chats.
+
+    Sends run with bounded concurrency behind a shared token bucket. A
+    RetryAfter pauses the bucket for everyone and the send is retried. Groups
+    upgraded to a supergroup are retried at their new id, which is reported
+    from then on. Chats the bot was removed from are reported as pruned
+    instead of failed.
+
+    Args:
+        bot: The bot to send with
+        chat_ids: Chats to send to
+        text: The text to send
+        on_progress: Called with the running report, at most once per
+            BROADCAST_PROGRESS_INTERVAL seconds
+        on_sent: Called with the chat id after each successful send
+        on_migrated: Called with the old and new chat id when a group turns
+            out to have been upgraded to a supergroup, before the retry
+        concurrency: Maximum number of sends in flight
+        bucket: Rate limiter shared with other bulk senders
+        **kwargs: Additional keyword arguments for send_message
+
+    Returns:
+        BroadcastReport: Sent, failed and pruned counts, and migrated chats
+    """
+    chat_ids = list(chat_ids)
+    report = BroadcastReport(len(chat_ids))
+    last_progress = time.monotonic()
+
+    async def send(chat_id: ChatId) -> None:
+        nonlocal last_progress
+        chat_id = str(chat_id)
+
+        for _ in range(BROADCAST_MAX_RETRIES + 1):
+            await bucket.acquire()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                report.sent += 1
+                if on_sent:
+                    on_sent(chat_id)
+                break
+            except RetryAfter as e:
+                logger.warning(f"⏳ Flood limit hit during broadcast, pausing {e.retry_after}s")
+                bucket.pause(e.retry_after)
+            except ChatMigrated as e:
+                new_chat_id = str(e.new_chat_id)
+                report.migrated[chat_id] = new_chat_id
+                if on_migrated:
+                    on_migrated(chat_id, new_chat_id)
+                chat_id = new_chat_id
+            except TelegramError as e:
+                if is_chat_gone_error(e):
+                    report.pruned.append(chat_id)
+                else:
+                    logger.error(f"Error broadcasting to {chat_id}: {e}")
+                    report.failed += 1
+                    report.failed_ids.append(chat_id)
+                break
+        else:
+            report.failed += 1
+            report.failed_ids.append(chat_id)
+
+        if on_progress and time.monotonic() - last_progress >= BROADCAST_PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            try:
+                await on_progress(report)
+            except TelegramError as e:
+                logger.debug(f"Broadcast progress update failed: {e}")
+
+    await fan_out(chat_ids, send, concurrency)
+    return report
@@ -0,0 +1,156 @@
+# utils/dispatch.py
+import enum
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from telegram import Update
+from telegram.constants import MessageEntityType
+from telegram.ext import ContextTypes
+
+import logging
+logger = logging.getLogger(__name__)
+
+Stage = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[Any]]
+StagePredicate = Callable[[Update, "UpdateKind"], bool]
+
+
+class UpdateKind(enum.IntFlag):
+    """What an update contains, worked out once per update."""
+
+    NONE = 0
+    GROUP = enum.auto()     # sent in a group or supergroup
+    MESSAGE = enum.auto()   # a new message (not an edit, callback, member change, ...)
+    COMMAND = enum.auto()   # starts with a /command
+    TEXT = enum.auto()      # text or caption that isn't a command
+    REPLY = enum.auto()     # replies to another message
+    MENTION = enum.auto()   # mentions a user by @username or text mention
+    SERVICE = enum.auto()   # join, leave, pin and other service messages
+
+
+MENTION_TYPES = (MessageEntityType.MENTION, MessageEntityType.TEXT_MENTION)
+
+
+def classify(update: Update) -> UpdateKind:
+    kind = UpdateKind.NONE
+    chat = update.effective_chat
+    if chat is not None and chat.type in ("group", "supergroup"):
+        kind |= UpdateKind.GROUP
+
+    message = update.message
+    if message is None:
+        return kind
+    kind |= UpdateKind.MESSAGE
+
+    text = message.text or message.caption
+    entities = message.entities or message.caption_entities
+    if text is None:
+        if not message.effective_attachment:
+            kind |= UpdateKind.SERVICE
+    elif entities and entities[0].type == MessageEntityType.BOT_COMMAND and entities[0].offset == 0:
+        kind |= UpdateKind.COMMAND
+    else:
+        kind |= UpdateKind.TEXT
+
+    if message.reply_to_message is not None:
+        kind |= UpdateKind.REPLY
+    if any(entity.type in MENTION_TYPES for entity in entities):
+        kind |= UpdateKind.MENTION
+    return kind
+
+
+class StageStats:
+    __slots__ = ("calls", "skipped", "errors", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.skipped = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class FastPathDispatcher:
+    """
+    One pre-dispatch pass over every update.
+
+    The update is classified once, then each registered stage runs only if
+    its kinds match and its optional predicate agrees. Stages run in
+    registration order; an error in one is logged and the rest still run.
+    Time spent in each stage is recorded for /stats.
+    """
+
+    def __init__(self):
+        self._stages: List[tuple] = []
+        self._stats: Dict[str, StageStats] = {}
+        self.updates = 0
+        self.classify_time = 0.0
+
+    def add_stage(
+        self,
+        name: str,
+        callback: Stage,
+        requires: UpdateKind = UpdateKind.NONE,
+        any_of: UpdateKind = UpdateKind.NONE,
+        excludes: UpdateKind = UpdateKind.NONE,
+        when: Optional[StagePredicate] = None
+    ) -> None:
+        """
+        Register a stage.
+
+        Args:
+            name: Name shown in timing stats
+            callback: Handler-style coroutine called with (update, context)
+            requires: Kinds the update must all have
+            any_of: Kinds of which the update needs at least one
+            excludes: Kinds the update must not have
+            when: Extra cheap check, called with (update, kind)
+        """
+        self._stages.append((name, callback, requires, any_of, excludes, when))
+        self._stats[name] = StageStats()
+
+    async def __call__(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        started = time.perf_counter()
+        kind = classify(update)
+        self.classify_time += time.perf_counter() - started
+        self.updates += 1
+
+        for name, callback, requires, any_of, excludes, when in self._stages:
+            stats = self._stats[name]
+            if (
+                kind & requires != requires
+                or (any_of and not kind & any_of)
+                or kind & excludes
+                or (when is not None and not when(update, kind))
+            ):
+                stats.skipped += 1
+                continue
+
+            stage_started = time.perf_counter()
+            try:
+                await callback(update, context)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"❌ Error in {name} stage: {e}")
+            elapsed = time.perf_counter() - stage_started
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "updates": self.updates,
+            "classify_avg_ms": self.classify_time / self.updates * 1000 if self.updates else 0.0,
+            "stages": {
+                name: {
+                    "calls": stats.calls,
+                    "skipped": stats.skipped,
+                    "errors": stats.errors,
+                    "avg_ms": stats.total / stats.calls * 1000 if stats.calls else 0.0,
+                    "max_ms": stats.max * 1000,
+                }
+                for name, stats in self._stats.items()
+            },
+        }
+
+
+fast_path = FastPathDispatcher()
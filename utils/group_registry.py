@@ -0,0 +1,143 @@
+# utils/group_registry.py
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Set, Tuple, Union
+
+from telegram import Chat
+from telegram.ext import ContextTypes
+
+from config import GROUPS_FLUSH_THRESHOLD
+from utils.storage import Storage, storage
+from utils.write_behind import WriteBehind
+
+import logging
+logger = logging.getLogger(__name__)
+
+ChatId = Union[str, int]
+
+
+class GroupRegistry:
+    """
+    In-memory view of the groups the bot is in.
+
+    Handlers read and update groups in memory and only mark them dirty.
+    Dirty state is written back in the background, either by the periodic
+    flush job or as soon as enough changes have piled up.
+    """
+
+    def __init__(self, backend: Storage, flush_threshold: int = GROUPS_FLUSH_THRESHOLD):
+        self.backend = backend
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._writer = WriteBehind(self._save, flush_threshold, "groups")
+
+    # ---------------- Loading ----------------
+    async def load(self) -> None:
+        """Load groups from storage once. Later calls are no-ops."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            self._groups = await self.backend.load_groups()
+        except Exception as e:
+            logger.error(f"❌ Failed to load groups: {e}")
+            self._groups = {}
+
+    # ---------------- Reading ----------------
+    def __contains__(self, chat_id: ChatId) -> bool:
+        return str(chat_id) in self._groups
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def get(self, chat_id: ChatId) -> Optional[Dict[str, Any]]:
+        return self._groups.get(str(chat_id))
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over a snapshot of (chat_id, info) pairs."""
+        return iter(list(self._groups.items()))
+
+    def ids(self) -> list:
+        return list(self._groups)
+
+    # ---------------- Writing ----------------
+    def touch(self, chat: Chat) -> bool:
+        """
+        Record activity in a group, adding it if unknown.
+
+        Returns:
+            bool: True if the group was not known before
+        """
+        key = str(chat.id)
+        now = datetime.now().isoformat()
+        info = self._groups.get(key)
+        is_new = info is None
+
+        if is_new:
+            info = self._groups[key] = {
+                "first_joined": now,
+                "notifications_disabled": False,
+            }
+
+        info["title"] = chat.title
+        info["last_active"] = now
+        info["needs_verification"] = False
+        info["type"] = chat.type
+
+        self.mark_dirty(key)
+        return is_new
+
+    def update(self, chat_id: ChatId, **fields: Any) -> None:
+        """Update fields of a known group. Unknown groups are ignored."""
+        key = str(chat_id)
+        info = self._groups.get(key)
+        if info is None:
+            return
+        info.update(fields)
+        self.mark_dirty(key)
+
+    def remove(self, chat_id: ChatId) -> bool:
+        """Forget a group. Returns True if it was known."""
+        key = str(chat_id)
+        if self._groups.pop(key, None) is None:
+            return False
+        self.mark_dirty(key)
+        return True
+
+    def migrate(self, old_chat_id: ChatId, new_chat_id: ChatId) -> None:
+        """Move a group to the id of the supergroup it was upgraded to."""
+        info = self._groups.pop(str(old_chat_id), None)
+        if info is None:
+            return
+        self.mark_dirty(old_chat_id)
+        new_key = str(new_chat_id)
+        if new_key not in self._groups:
+            self._groups[new_key] = info
+            info["type"] = "supergroup"
+            self.mark_dirty(new_key)
+
+    def mark_dirty(self, chat_id: ChatId) -> None:
+        self._writer.add(str(chat_id))
+
+    # ---------------- Flushing ----------------
+    async def _save(self, dirty: Set[str]) -> None:
+        changed = {}
+        removed = []
+        for chat_id in dirty:
+            info = self._groups.get(chat_id)
+            if info is None:
+                removed.append(chat_id)
+            else:
+                changed[chat_id] = dict(info)
+        await self.backend.save_groups(changed, removed)
+
+    async def flush(self) -> bool:
+        """Write dirty groups to storage as one batch."""
+        return await self._writer.flush()
+
+group_registry = GroupRegistry(storage)
+
+
+async def flush_groups_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job that writes pending group changes."""
+    await group_registry.flush()
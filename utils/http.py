@@ -0,0 +1,75 @@
+# utils/http.py
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from config import HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    Shared aiohttp session for outgoing HTTP calls.
+
+    One pooled session is created at startup and closed on shutdown, so
+    handlers reuse connections instead of opening a new one per request.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        logger.info("🌐 HTTP client started")
+
+    async def close(self) -> None:
+        if self._session is None:
+            return
+        await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            raise RuntimeError("HTTP client is not started")
+        return self._session
+
+    async def get_json(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        GET a URL and decode the JSON body.
+
+        Raises:
+            aiohttp.ClientError: On connection errors and non-2xx responses
+            asyncio.TimeoutError: If the request takes too long
+        """
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with self.session.get(url, headers=headers, params=params, timeout=request_timeout) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+http_client = HttpClient()
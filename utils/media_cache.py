@@ -0,0 +1,156 @@
+# utils/media_cache.py
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Union
+
+from telegram import Bot, Message
+from telegram.error import BadRequest
+
+from config import MEDIA_CACHE_MAX_ENTRIES
+from utils.storage import Storage, storage
+
+import logging
+logger = logging.getLogger(__name__)
+
+ChatId = Union[str, int]
+
+# send_* method and the Message attribute holding the uploaded file
+MEDIA_KINDS = {
+    "animation": ("send_animation", "animation"),
+    "photo": ("send_photo", "photo"),
+}
+
+# BadRequest messages meaning Telegram no longer accepts a cached file_id
+FILE_ID_ERRORS = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "wrong padding in the string",
+    "file reference expired",
+    "can't use file of type",
+)
+
+
+def is_file_id_error(error: BadRequest) -> bool:
+    """Check whether a BadRequest means the file_id itself was rejected."""
+    return any(msg in error.message.lower() for msg in FILE_ID_ERRORS)
+
+
+class FileIdCache:
+    """
+    Persistent map from a media source URL to the file_id Telegram assigned.
+
+    The first send of a URL makes Telegram download and process the file;
+    later sends reuse the file_id. Entries are dropped when Telegram rejects
+    them, and the least recently used entries are evicted past `max_entries`.
+    Only cache media that is sent repeatedly; one-off URLs would push the
+    reused entries out.
+    """
+
+    def __init__(self, backend: Storage, max_entries: int = MEDIA_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.max_entries = max_entries
+        self._file_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self) -> None:
+        try:
+            self._file_ids = OrderedDict(await self.backend.load_file_ids())
+        except Exception as e:
+            logger.error(f"❌ Failed to load media cache: {e}")
+
+    def get(self, source_url: str) -> Optional[str]:
+        file_id = self._file_ids.get(source_url)
+        if file_id is not None:
+            self._file_ids.move_to_end(source_url)
+        return file_id
+
+    def _persist(self, coro) -> None:
+        """Write to storage in the background without holding up the send."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"❌ Failed to save media cache: {task.exception()}")
+
+    def remember(self, source_url: str, file_id: str) -> None:
+        if self._file_ids.get(source_url) == file_id:
+            return
+        self._file_ids[source_url] = file_id
+        self._file_ids.move_to_end(source_url)
+        self._persist(self.backend.set_file_id(source_url, file_id))
+
+        evicted = []
+        while len(self._file_ids) > self.max_entries:
+            oldest, _ = self._file_ids.popitem(last=False)
+            evicted.append(oldest)
+        if evicted:
+            self._persist(self.backend.delete_file_ids(evicted))
+
+    def forget(self, source_url: str) -> None:
+        if self._file_ids.pop(source_url, None) is not None:
+            self._persist(self.backend.delete_file_ids([source_url]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._file_ids), "hits": self.hits, "misses": self.misses}
+
+
+file_id_cache = FileIdCache(storage)
+
+
+def _file_id_from_message(message: Message, attribute: str) -> Optional[str]:
+    media = getattr(message, attribute, None)
+    if not media:
+        return None
+    # Photos come as a list of sizes; the largest is last
+    if isinstance(media, (list, tuple)):
+        media = media[-1]
+    return media.file_id
+
+
+async def send_cached_media(
+    bot: Bot,
+    kind: str,
+    chat_id: ChatId,
+    source_url: str,
+    **kwargs
+) -> Message:
+    """
+    Send media by URL, reusing Telegram's file_id after the first upload.
+
+    Args:
+        bot: The bot to send with
+        kind: "animation" or "photo"
+        chat_id: The chat to send to
+        source_url: The URL the media is originally fetched from
+        **kwargs: Additional keyword arguments for the send method
+
+    Returns:
+        Message: The sent message
+    """
+    method_name, attribute = MEDIA_KINDS[kind]
+    send = getattr(bot, method_name)
+
+    file_id = file_id_cache.get(source_url)
+    if file_id:
+        try:
+            message = await send(chat_id, file_id, **kwargs)
+            file_id_cache.hits += 1
+            return message
+        except BadRequest as e:
+            # Rights, missing chats and the like would fail the same way by URL
+            if not is_file_id_error(e):
+                raise
+            logger.warning(f"⚠️ Cached file_id for {source_url} was rejected ({e}). Re-sending from URL.")
+            file_id_cache.forget(source_url)
+
+    file_id_cache.misses += 1
+    message = await send(chat_id, source_url, **kwargs)
+    new_file_id = _file_id_from_message(message, attribute)
+    if new_file_id:
+        file_id_cache.remember(source_url, new_file_id)
+    return message
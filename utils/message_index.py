@@ -0,0 +1,134 @@
+# utils/message_index.py
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from telegram import Message, Update
+from telegram.ext import ContextTypes, ExtBot
+
+from config import MESSAGE_INDEX_PER_CHAT, MESSAGE_INDEX_MAX_ENTRIES
+
+import logging
+logger = logging.getLogger(__name__)
+
+# (message_id, user_id, unix timestamp)
+Entry = Tuple[int, int, int]
+
+
+class ChatBuffer:
+    """Recent messages of one chat, oldest first."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, size: int):
+        self.entries: Deque[Entry] = deque(maxlen=size)
+
+
+class MessageIndex:
+    """
+    Bounded per-chat ring buffers of messages the bot has seen.
+
+    Each chat keeps its last `per_chat` messages. When the total across
+    chats passes `max_entries`, the least recently active chats are dropped.
+
+    The index only holds messages that reached the bot. Messages from other
+    bots never do, and in privacy mode most group messages don't either, so
+    it must not be used to decide that an id in a range doesn't exist.
+    """
+
+    def __init__(
+        self,
+        per_chat: int = MESSAGE_INDEX_PER_CHAT,
+        max_entries: int = MESSAGE_INDEX_MAX_ENTRIES
+    ):
+        self.per_chat = per_chat
+        self.max_entries = max_entries
+        self._chats: "OrderedDict[int, ChatBuffer]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(self, chat_id: int, message_id: int, user_id: int, timestamp: int) -> None:
+        buffer = self._chats.get(chat_id)
+        if buffer is None:
+            buffer = self._chats[chat_id] = ChatBuffer(self.per_chat)
+        else:
+            self._chats.move_to_end(chat_id)
+
+        # A full deque drops its oldest entry on append
+        if len(buffer.entries) < buffer.entries.maxlen:
+            self._size += 1
+        buffer.entries.append((message_id, user_id, timestamp))
+
+        while self._size > self.max_entries and len(self._chats) > 1:
+            _, dropped = self._chats.popitem(last=False)
+            self._size -= len(dropped.entries)
+
+    def forget(self, chat_id: int, message_ids) -> None:
+        """Drop deleted messages from a chat's buffer."""
+        buffer = self._chats.get(chat_id)
+        if buffer is None:
+            return
+        gone = set(message_ids)
+        kept = [entry for entry in buffer.entries if entry[0] not in gone]
+        self._size -= len(buffer.entries) - len(kept)
+        buffer.entries = deque(kept, maxlen=self.per_chat)
+
+    def ids_from_user(self, chat_id: int, user_id: int, limit: int) -> List[int]:
+        """The ids of a user's last `limit` messages in a chat."""
+        buffer = self._chats.get(chat_id)
+        if buffer is None:
+            return []
+        ids = []
+        for message_id, sender_id, _ in reversed(buffer.entries):
+            if sender_id == user_id:
+                ids.append(message_id)
+                if len(ids) >= limit:
+                    break
+        return ids
+
+    def ids_since(self, chat_id: int, timestamp: int) -> List[int]:
+        """The ids of every indexed message sent at or after a timestamp."""
+        buffer = self._chats.get(chat_id)
+        if buffer is None:
+            return []
+        return [message_id for message_id, _, sent_at in buffer.entries if sent_at >= timestamp]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"chats": len(self._chats), "entries": self._size}
+
+
+message_index = MessageIndex()
+
+
+def index_message(message: Message) -> None:
+    if message.chat.type not in ("group", "supergroup"):
+        return
+    sender = message.from_user
+    message_index.record(
+        message.chat.id,
+        message.message_id,
+        sender.id if sender else 0,
+        int(message.date.timestamp())
+    )
+
+
+async def record_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handler adding every group message to the index."""
+    if update.message:
+        index_message(update.message)
+
+
+class IndexingBot(ExtBot):
+    """
+    Bot that also indexes the messages it sends.
+
+    Telegram never delivers the bot's own messages as updates, so without
+    this they would look like gaps to the purge index.
+    """
+
+    async def _send_message(self, *args, **kwargs) -> Any:
+        result = await super()._send_message(*args, **kwargs)
+        if isinstance(result, Message):
+            index_message(result)
+        return result
@@ -0,0 +1,323 @@
+# utils/metrics.py
+import bisect
+import functools
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application, ApplicationHandlerStop, CommandHandler
+from telegram.request import HTTPXRequest
+
+from config import METRICS_HOST, METRICS_PORT
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast in-memory handlers up to slow multi-call commands
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def items(self) -> List[Tuple[Labels, float]]:
+        return list(self._values.items())
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def render(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value:g}"
+
+
+class Gauge:
+    """A value read when metrics are collected."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help = help_text
+        self.labels = ()
+        self.read = read
+
+    def value(self) -> float:
+        try:
+            return float(self.read()) if self.read else 0.0
+        except Exception:
+            return 0.0
+
+    def reset(self) -> None:
+        pass
+
+    def render(self) -> Iterable[str]:
+        yield f"{self.name} {self.value():g}"
+
+
+class HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within a bucket."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # One slot per bucket plus the +Inf bucket
+            series = self._series[labels] = HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series.count if series else 0
+
+    def label_sets(self) -> List[Labels]:
+        return list(self._series)
+
+    def reset(self) -> None:
+        self._series.clear()
+
+    def _merged(self, labels: Optional[Labels]) -> Optional[HistogramSeries]:
+        if labels is not None:
+            return self._series.get(labels)
+        merged = HistogramSeries(len(self.buckets) + 1)
+        for series in self._series.values():
+            merged.counts = [a + b for a, b in zip(merged.counts, series.counts)]
+            merged.sum += series.sum
+            merged.count += series.count
+        return merged
+
+    def quantile(self, q: float, labels: Optional[Labels] = None) -> Optional[float]:
+        """Estimate a quantile for one label set, or across all of them."""
+        series = self._merged(labels)
+        if not series or not series.count:
+            return None
+
+        rank = q * series.count
+        cumulative = 0
+        for index, count in enumerate(series.counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> Iterable[str]:
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                le = 'le="%g"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {series.count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {series.sum:g}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {series.count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, read: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._add(Gauge(name, help_text, read))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def reset(self) -> None:
+        """Zero every counter and histogram, e.g. between benchmark runs."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+updates_total = metrics.counter("bot_updates_total", "Updates received, by type", ["type"])
+commands_total = metrics.counter("bot_commands_total", "Commands handled, by command", ["command"])
+handler_errors_total = metrics.counter("bot_handler_errors_total", "Handler exceptions, by handler", ["handler"])
+handler_latency = metrics.histogram("bot_handler_latency_seconds", "Handler run time, by handler", ["handler"])
+update_queue_depth = metrics.gauge("bot_update_queue_depth", "Updates waiting to be processed")
+api_requests_total = metrics.counter("bot_api_requests_total", "Bot API calls, by method", ["method"])
+api_errors_total = metrics.counter("bot_api_errors_total", "Failed Bot API calls, by method and error class", ["method", "error"])
+api_latency = metrics.histogram("bot_api_latency_seconds", "Bot API call time, by method", ["method"])
+
+UPDATE_TYPES = (
+    "message", "edited_message", "callback_query", "chat_member", "my_chat_member",
+    "channel_post", "edited_channel_post", "inline_query", "chat_join_request",
+)
+
+# Error classes python-telegram-bot raises for these HTTP status codes
+STATUS_ERRORS = {400: "BadRequest", 401: "InvalidToken", 403: "Forbidden", 404: "InvalidToken", 409: "Conflict", 429: "RetryAfter"}
+
+
+def update_type(update: Update) -> str:
+    for name in UPDATE_TYPES:
+        if getattr(update, name) is not None:
+            return name
+    return "other"
+
+
+async def count_update(update: Update, context) -> None:
+    """Fast-path stage counting every update by type."""
+    updates_total.inc(update_type(update))
+
+
+def _timed(callback: Callable, label: str, command: bool) -> Callable:
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            # Control flow, not a failure
+            raise
+        except Exception:
+            handler_errors_total.inc(label)
+            raise
+        finally:
+            handler_latency.observe(time.perf_counter() - started, label)
+            if command:
+                commands_total.inc(label)
+    return wrapper
+
+
+def instrument_handlers(app: Application) -> None:
+    """
+    Time every registered handler.
+
+    Commands are labelled "/name", other handlers by callback name. Call it
+    once, after all handlers are added.
+    """
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            if isinstance(handler, CommandHandler):
+                label = "/" + sorted(handler.commands)[0]
+                handler.callback = _timed(handler.callback, label, command=True)
+            else:
+                label = getattr(handler.callback, "__name__", type(handler.callback).__name__)
+                handler.callback = _timed(handler.callback, label, command=False)
+
+    update_queue_depth.read = app.update_queue.qsize
+
+
+class MetricsRequest(HTTPXRequest):
+    """HTTPXRequest that counts and times Bot API calls."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        api_requests_total.inc(api_method)
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception as e:
+            api_errors_total.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            api_latency.observe(time.perf_counter() - started, api_method)
+
+        if code >= 400:
+            api_errors_total.inc(api_method, STATUS_ERRORS.get(code, "NetworkError"))
+        return code, payload
+
+
+class MetricsServer:
+    """Serves /metrics in Prometheus text format on a local port."""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        if not self.port or self._runner:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"❌ Could not start metrics endpoint on {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+        self._runner = runner
+        logger.info(f"📈 Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics_server = MetricsServer()
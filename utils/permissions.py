@@ -3,7 +3,10 @@ from typing import Optional, Union, List
 from enum import Enum
 from telegram import Update, Chat
 from telegram.ext import ContextTypes
-from utils.admin_check import is_user_admin, is_bot_admin
+from telegram.error import TelegramError
+from telegram.constants import ChatType
+from utils.admin_cache import admin_cache
+from utils.admin_check import is_bot_admin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,12 +19,118 @@ class Permission(Enum):
     BOT_OWNER = 4      # Only the bot owner
 
 class PermissionResult:
-    def __init__(self, allowed: bool, reason: Optional[str] = None):
+    def __init__(self, allowed: bool, reason: Optional[str] = None, api_calls: int = 0):
         self.allowed = allowed
         self.reason = reason
+        self.api_calls = api_calls
 
     def __repr__(self):
-        return f"<PermissionResult allowed={self.allowed} reason={self.reason}>"
+        return f"<PermissionResult allowed={self.allowed} reason={self.reason} api_calls={self.api_calls}>"
+
+class PermissionEvaluator:
+    """
+    Resolves the permission facts for one update, each at most once.
+
+    The evaluator is stored on the per-update context, so every permission
+    check and admin check made while handling the update shares its answers.
+    api_calls counts the Bot API calls the checks needed.
+    """
+
+    def __init__(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        self.update = update
+        self.context = context
+        self.api_calls = 0
+        self._user_is_admin: Optional[bool] = None
+        self._bot_is_admin: Optional[bool] = None
+
+    def _count_call(self, method: str) -> None:
+        self.api_calls += 1
+
+    @property
+    def in_group(self) -> bool:
+        chat = self.update.effective_chat
+        return chat is not None and chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]
+
+    async def user_is_admin(self) -> bool:
+        """
+        Whether the user is an admin in the current group.
+
+        Raises:
+            TelegramError: If the status couldn't be looked up
+        """
+        if self._user_is_admin is None:
+            if not self.in_group or not self.update.effective_user:
+                return False
+            self._user_is_admin = await admin_cache.is_admin(
+                self.context,
+                self.update.effective_chat.id,
+                self.update.effective_user.id,
+                on_api_call=self._count_call
+            )
+        return self._user_is_admin
+
+    async def bot_is_admin(self) -> bool:
+        if self._bot_is_admin is None:
+            self._bot_is_admin = await is_bot_admin(
+                self.context,
+                self.update.effective_chat.id,
+                on_api_call=self._count_call
+            )
+        return self._bot_is_admin
+
+    def user_is_owner(self) -> bool:
+        from config import ADMIN_USER_ID
+        return bool(ADMIN_USER_ID) and str(self.update.effective_user.id) == str(ADMIN_USER_ID)
+
+    async def evaluate(self, permission: Permission) -> PermissionResult:
+        """Evaluate one permission without replying to the chat."""
+        user = self.update.effective_user
+        chat = self.update.effective_chat
+
+        # ADMINS or BOT_ADMIN
+        if permission in [Permission.ADMINS, Permission.BOT_ADMIN]:
+            try:
+                is_admin = await self.user_is_admin()
+            except TelegramError as e:
+                logger.error(f"Admin check error: {e}")
+                is_admin = False
+            if not is_admin:
+                logger.info(f"Permission denied: user {user.id} is not admin in chat {chat.id}")
+                return PermissionResult(False, "User is not an admin")
+
+        # BOT_ADMIN
+        if permission == Permission.BOT_ADMIN:
+            if not await self.bot_is_admin():
+                logger.info(f"Permission denied: bot is not admin in chat {chat.id}")
+                return PermissionResult(False, "Bot is not an admin")
+
+        # BOT_OWNER
+        if permission == Permission.BOT_OWNER:
+            from config import ADMIN_USER_ID
+            if not ADMIN_USER_ID:
+                logger.warning("ADMIN_USER_ID is not set in config")
+                return PermissionResult(False, "Bot owner ID not configured")
+
+            if not self.user_is_owner():
+                logger.info(f"Permission denied: user {user.id} is not the bot owner")
+                return PermissionResult(False, "User is not the bot owner")
+
+        return PermissionResult(True)
+
+def get_permission_evaluator(update: Update, context: ContextTypes.DEFAULT_TYPE) -> PermissionEvaluator:
+    """Return the evaluator for this update, creating it on first use."""
+    evaluator = getattr(context, "_permission_evaluator", None)
+    if evaluator is None or evaluator.update is not update:
+        evaluator = PermissionEvaluator(update, context)
+        context._permission_evaluator = evaluator
+    return evaluator
+
+# Reply sent when a single permission is denied
+DENIED_MESSAGES = {
+    "User is not an admin": "🚫 Only admins can use this command!",
+    "Bot is not an admin": "⚠️ I need admin privileges to perform this action!",
+    "User is not the bot owner": "🔒 This command is only for the bot owner.",
+}
 
 async def check_permissions(
     update: Update,
@@ -35,56 +144,83 @@ async def check_permissions(
     if not chat or not user:
         return PermissionResult(False, "Missing chat or user data")
 
+    evaluator = get_permission_evaluator(update, context)
+    calls_before = evaluator.api_calls
+    permissions = required_permission if isinstance(required_permission, list) else [required_permission]
+
+    result = None
+    for perm in permissions:
+        result = await evaluator.evaluate(perm)
+        if result.allowed:
+            break
+
+    cost = evaluator.api_calls - calls_before
+    logger.debug(f"Permission check {[p.name for p in permissions]} for user {user.id} cost {cost} API calls")
+
+    if result.allowed:
+        return PermissionResult(True, api_calls=cost)
+
     if isinstance(required_permission, list):
-        for perm in required_permission:
-            result = await check_permissions(update, context, perm, silent=True)
-            if result.allowed:
-                return PermissionResult(True)
         if not silent:
             await update.effective_message.reply_text("🚫 You don't have permission to use this command.")
-        return PermissionResult(False, f"User lacks one of the required permissions: {[p.name for p in required_permission]}")
+        return PermissionResult(
+            False,
+            f"User lacks one of the required permissions: {[p.name for p in required_permission]}",
+            api_calls=cost
+        )
 
-    # EVERYONE
-    if required_permission == Permission.EVERYONE:
-        return PermissionResult(True)
+    if not silent and result.reason in DENIED_MESSAGES:
+        await update.effective_message.reply_text(DENIED_MESSAGES[result.reason])
+    result.api_calls = cost
+    return result
 
-    # ADMINS or BOT_ADMIN
-    if required_permission in [Permission.ADMINS, Permission.BOT_ADMIN]:
-        is_admin = await is_user_admin(update, context, silent=True)
-        if not is_admin:
-            if not silent:
-                await update.effective_message.reply_text("🚫 Only admins can use this command!")
-            logger.info(f"Permission denied: user {user.id} is not admin in chat {chat.id}")
-            return PermissionResult(False, "User is not an admin")
-
-    # BOT_ADMIN
-    if required_permission == Permission.BOT_ADMIN:
-        bot_is_admin = await is_bot_admin(context, chat.id)
-        if not bot_is_admin:
-            if not silent:
-                await update.effective_message.reply_text("⚠️ I need admin privileges to perform this action!")
-            logger.info(f"Permission denied: bot is not admin in chat {chat.id}")
-            return PermissionResult(False, "Bot is not an admin")
-
-    # BOT_OWNER
-    if required_permission == Permission.BOT_OWNER:
-        try:
-            from config import ADMIN_USER_ID
-        except ImportError:
-            logger.error("ADMIN_USER_ID not found in config")
-            return PermissionResult(False, "Bot owner ID not configured")
+async def is_user_admin(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    silent: bool = False
+) -> bool:
+    """
+    Check if the user is an admin in the current group.
 
-        if not ADMIN_USER_ID:
-            logger.warning("ADMIN_USER_ID is not set in config")
-            return PermissionResult(False, "Bot owner ID not configured")
+    Shares the per-update PermissionEvaluator, so repeated checks while
+    handling one update cost at most one lookup.
 
-        if str(user.id) != str(ADMIN_USER_ID):
-            if not silent:
-                await update.effective_message.reply_text("🔒 This command is only for the bot owner.")
-            logger.info(f"Permission denied: user {user.id} is not the bot owner")
-            return PermissionResult(False, "User is not the bot owner")
+    Args:
+        update: The update object from Telegram
+        context: The context object from the handler
+        silent: If True, no messages will be sent to the chat
 
-    return PermissionResult(True)
+    Returns:
+        bool: True if the user is an admin, False otherwise
+    """
+    chat = update.effective_chat
+    user = update.effective_user
+
+    # Handle None values (could happen in callbacks or other update types)
+    if not chat or not user:
+        logger.warning("Missing chat or user in update")
+        return False
+
+    # Check if we're in a group chat
+    if chat.type not in [ChatType.GROUP, ChatType.SUPERGROUP]:
+        if not silent:
+            await update.effective_message.reply_text("⚠️ This command can only be used in group chats.")
+        return False
+
+    try:
+        if await get_permission_evaluator(update, context).user_is_admin():
+            return True
+
+        # User is not an admin
+        if not silent:
+            await update.effective_message.reply_text("🚫 Only admins can use this command!")
+        return False
+
+    except TelegramError as e:
+        logger.error(f"Admin check error: {e}")
+        if not silent:
+            await update.effective_message.reply_text("❌ Couldn't verify admin status. Try again later.")
+        return False
 
 def require_permission(permission_level: Union[Permission, List[Permission]]):
     def decorator(func):
@@ -0,0 +1,172 @@
+# utils/profile_cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Union
+
+from telegram import Bot, Chat, Update, User
+from telegram.constants import MessageEntityType
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+from config import PROFILE_CACHE_MAX_ENTRIES, USERNAME_MAX_AGE
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Profile:
+    """What the bot last saw of a user."""
+
+    __slots__ = ("first_name", "last_name", "username", "last_seen")
+
+    def __init__(self, first_name: str, last_name: Optional[str], username: Optional[str], last_seen: float):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.username = username
+        self.last_seen = last_seen
+
+
+class ProfileCache:
+    """
+    Bounded LRU of user profiles, filled from the updates the bot receives.
+
+    Every update already carries the sender, so names for AFK replies and
+    moderation messages are read from here. The API is only asked on a miss.
+    A username -> id index is kept alongside so @mentions resolve locally;
+    a username not seen for `username_max_age` seconds is treated as stale.
+    """
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_MAX_ENTRIES, username_max_age: float = USERNAME_MAX_AGE):
+        self.max_entries = max_entries
+        self.username_max_age = username_max_age
+        self._profiles: "OrderedDict[int, Profile]" = OrderedDict()
+        self._by_username: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def observe(self, user: Union[User, Chat, None]) -> None:
+        """Remember a user seen in an update."""
+        if user is None or not user.first_name:
+            return
+        profile = self._profiles.get(user.id)
+        if profile is None:
+            self._profiles[user.id] = Profile(user.first_name, user.last_name, user.username, time.time())
+            if len(self._profiles) > self.max_entries:
+                evicted_id, evicted = self._profiles.popitem(last=False)
+                self._unindex_username(evicted.username, evicted_id)
+        else:
+            if profile.username != user.username:
+                self._unindex_username(profile.username, user.id)
+            profile.first_name = user.first_name
+            profile.last_name = user.last_name
+            profile.username = user.username
+            profile.last_seen = time.time()
+            self._profiles.move_to_end(user.id)
+
+        if user.username:
+            self._by_username[user.username.lower()] = user.id
+
+    def _unindex_username(self, username: Optional[str], user_id: int) -> None:
+        # Only drop the mapping if nobody else has taken the username since
+        if username and self._by_username.get(username.lower()) == user_id:
+            del self._by_username[username.lower()]
+
+    def resolve_username(self, username: str) -> Optional[int]:
+        """Map an @username to a user id without calling the API."""
+        key = username.lstrip("@").lower()
+        user_id = self._by_username.get(key)
+        if user_id is None:
+            return None
+
+        profile = self._profiles.get(user_id)
+        if profile is None or time.time() - profile.last_seen > self.username_max_age:
+            del self._by_username[key]
+            return None
+        return user_id
+
+    def observe_update(self, update: Update) -> None:
+        for user in _users_in_update(update):
+            self.observe(user)
+
+    def get(self, user_id: int) -> Optional[User]:
+        """Return a cached user, or None without calling the API."""
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            return None
+        return User(
+            id=user_id,
+            first_name=profile.first_name,
+            is_bot=False,
+            last_name=profile.last_name,
+            username=profile.username
+        )
+
+    async def resolve(self, bot: Bot, user_id: int, chat_id: Optional[int] = None) -> Optional[User]:
+        """
+        Return a user's profile, asking Telegram only on a cache miss.
+
+        Args:
+            bot: The bot used for the lookup on a miss
+            user_id: The user to look up
+            chat_id: A chat the user is in; get_chat_member is used when given,
+                get_chat otherwise
+
+        Returns:
+            Optional[User]: The user, or None if Telegram doesn't know them
+        """
+        user = self.get(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        self.misses += 1
+        try:
+            if chat_id is not None:
+                user = (await bot.get_chat_member(chat_id, user_id)).user
+            else:
+                user = await bot.get_chat(user_id)
+        except TelegramError as e:
+            logger.debug(f"Profile lookup for {user_id} failed: {e}")
+            return None
+
+        self.observe(user)
+        return self.get(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._profiles),
+            "usernames": len(self._by_username),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def _users_in_update(update: Update) -> Iterable[User]:
+    yield update.effective_user
+
+    message = update.effective_message
+    if message is not None:
+        if message.reply_to_message is not None:
+            yield message.reply_to_message.from_user
+        for entity in message.entities or ():
+            if entity.type == MessageEntityType.TEXT_MENTION:
+                yield entity.user
+        for member in message.new_chat_members or ():
+            yield member
+
+    member_update = update.chat_member or update.my_chat_member
+    if member_update is not None:
+        yield member_update.new_chat_member.user
+
+
+profile_cache = ProfileCache()
+
+
+async def observe_users(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handler filling the profile cache from every update."""
+    profile_cache.observe_update(update)
@@ -0,0 +1,116 @@
+# utils/profiler.py
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import re
+from typing import List, Tuple
+
+from config import PROFILE_SLOW_CALLBACK
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a capture is requested while another one is running."""
+
+
+_capture_lock = asyncio.Lock()
+
+
+async def profile_cpu(seconds: float, top: int = 40) -> str:
+    """
+    Run cProfile over the event loop thread for a time window.
+
+    The capture covers everything the loop runs meanwhile, so the calling
+    handler must not block other updates.
+
+    Returns:
+        str: pstats output sorted by cumulative time
+    """
+    if _capture_lock.locked():
+        raise ProfilerBusy("A profile is already running")
+
+    async with _capture_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return output.getvalue()
+
+
+class _SlowCallbackCollector(logging.Handler):
+    """Collects asyncio's "Executing <handle> took N seconds" warnings."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.records: List[Tuple[float, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.msg.startswith("Executing") and len(record.args or ()) == 2:
+            handle, duration = record.args
+            self.records.append((float(duration), str(handle)))
+
+
+def _describe(handle: str) -> str:
+    """Shorten a handle repr to the coroutine and the line where it next paused."""
+    coro = re.search(r"coro=<(\S+) running at (\S+)>", handle)
+    if coro:
+        return f"{coro.group(1)} at {coro.group(2)}"
+    return handle[:160]
+
+
+async def profile_loop(seconds: float, threshold: float = PROFILE_SLOW_CALLBACK, top: int = 25) -> str:
+    """
+    Report which callbacks held the event loop longest during a window.
+
+    Turns on asyncio debug mode for the window, so every callback running
+    longer than `threshold` seconds is logged with its coroutine.
+
+    Returns:
+        str: A plain-text report, slowest first
+    """
+    if _capture_lock.locked():
+        raise ProfilerBusy("A profile is already running")
+
+    loop = asyncio.get_running_loop()
+    asyncio_logger = logging.getLogger("asyncio")
+    collector = _SlowCallbackCollector()
+
+    async with _capture_lock:
+        was_debug = loop.get_debug()
+        old_threshold = loop.slow_callback_duration
+        old_propagate = asyncio_logger.propagate
+
+        asyncio_logger.addHandler(collector)
+        # Keep the per-callback warnings out of the console while capturing
+        asyncio_logger.propagate = False
+        loop.slow_callback_duration = threshold
+        loop.set_debug(True)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            loop.set_debug(was_debug)
+            loop.slow_callback_duration = old_threshold
+            asyncio_logger.propagate = old_propagate
+            asyncio_logger.removeHandler(collector)
+
+    records = sorted(collector.records, reverse=True)
+    lines = [
+        f"Callbacks that held the event loop for more than {threshold * 1000:.0f}ms "
+        f"during {seconds:g}s: {len(records)}",
+        "",
+    ]
+    if records:
+        lines.append(f"Total blocked: {sum(duration for duration, _ in records) * 1000:.0f}ms")
+        lines.append("")
+        for duration, handle in records[:top]:
+            lines.append(f"{duration * 1000:8.1f}ms  {_describe(handle)}")
+    return "\n".join(lines) + "\n"
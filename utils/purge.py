@@ -0,0 +1,180 @@
+# utils/purge.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, Sequence
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from config import PURGE_CONCURRENCY, PURGE_PROGRESS_INTERVAL, PURGE_MAX_RETRIES, PURGE_RETRY_DELAY
+from utils.throttle import fan_out
+
+import logging
+logger = logging.getLogger(__name__)
+
+# deleteMessages accepts at most this many ids per call
+DELETE_CHUNK_SIZE = 100
+
+# BadRequest messages meaning some message in the chunk can't be deleted
+UNDELETABLE_ERRORS = ("message can't be deleted", "message to delete not found")
+
+# BadRequest messages meaning the bot can't delete anything in the chat
+NO_RIGHTS_ERRORS = ("not enough rights", "need administrator rights", "chat_admin_required", "chat not found")
+
+
+def is_undeletable_error(error: TelegramError) -> bool:
+    """Check whether a bulk delete failed on individual messages, not the chat."""
+    return isinstance(error, BadRequest) and any(msg in error.message.lower() for msg in UNDELETABLE_ERRORS)
+
+
+def is_no_rights_error(error: TelegramError) -> bool:
+    """Check whether the bot can't delete messages in the chat at all."""
+    if isinstance(error, Forbidden):
+        return True
+    if isinstance(error, BadRequest):
+        return any(msg in error.message.lower() for msg in NO_RIGHTS_ERRORS)
+    return False
+
+
+class PurgeReport:
+    def __init__(self, total: int):
+        self.total = total
+        self.cleared = 0
+        self.failed = 0
+        self.skipped = 0
+        self.fallback_chunks = 0
+        self.cancelled = False
+        # Set to the error when the bot turned out unable to delete in the chat
+        self.aborted: Optional[TelegramError] = None
+
+    @property
+    def done(self) -> int:
+        return self.cleared + self.failed + self.skipped
+
+    def __repr__(self):
+        return (
+            f"<PurgeReport cleared={self.cleared} failed={self.failed} "
+            f"skipped={self.skipped} total={self.total}>"
+        )
+
+
+def chunked(ids: Sequence[int], size: int = DELETE_CHUNK_SIZE) -> List[Sequence[int]]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+async def _delete_chunk(bot: Bot, chat_id: int, message_ids: Sequence[int]) -> None:
+    """Delete up to 100 messages in one Bot API call."""
+    if hasattr(bot, "delete_messages"):
+        await bot.delete_messages(chat_id, list(message_ids))
+    else:
+        # python-telegram-bot 20.0 predates the deleteMessages wrapper
+        await bot._post("deleteMessages", {"chat_id": chat_id, "message_ids": list(message_ids)})
+
+
+async def delete_messages_bulk(
+    bot: Bot,
+    chat_id: int,
+    message_ids: Iterable[int],
+    on_progress: Optional[Callable[[PurgeReport], Awaitable[None]]] = None,
+    cancel: Optional[asyncio.Event] = None,
+    concurrency: int = PURGE_CONCURRENCY
+) -> PurgeReport:
+    """
+    Delete many messages from one chat in chunks of 100.
+
+    Chunks run with bounded concurrency. A chunk rejected because of a
+    message that can't be deleted is retried one message at a time, so that
+    message does not keep the rest of its chunk. Flood limits and network
+    errors retry the chunk. If the bot lacks the rights to delete, the purge
+    stops and the remaining chunks are skipped. Telegram silently skips ids
+    that no longer exist, so `cleared` counts ids handled rather than
+    messages removed.
+
+    Args:
+        bot: The bot to delete with
+        chat_id: The chat to delete from
+        message_ids: Ids of the messages to delete
+        on_progress: Called with the running report, at most once per
+            PURGE_PROGRESS_INTERVAL seconds
+        cancel: When set, chunks that have not started yet are skipped
+
+    Returns:
+        PurgeReport: Cleared, failed and skipped counts, and the error that
+            stopped the purge, if any
+    """
+    message_ids = sorted(set(message_ids), reverse=True)
+    report = PurgeReport(len(message_ids))
+    last_progress = time.monotonic()
+
+    def abort(error: TelegramError) -> None:
+        if report.aborted is None:
+            logger.warning(f"⚠️ Purge in {chat_id} stopped, the bot can't delete messages there: {error}")
+            report.aborted = error
+
+    async def delete_one_by_one(chunk: Sequence[int]) -> None:
+        report.fallback_chunks += 1
+        for index, message_id in enumerate(chunk):
+            if report.aborted:
+                report.skipped += len(chunk) - index
+                return
+            for _ in range(PURGE_MAX_RETRIES + 1):
+                try:
+                    await bot.delete_message(chat_id, message_id)
+                    report.cleared += 1
+                    break
+                except RetryAfter as e:
+                    await asyncio.sleep(e.retry_after)
+                except TelegramError as e:
+                    if is_no_rights_error(e):
+                        abort(e)
+                    report.failed += 1
+                    break
+            else:
+                report.failed += 1
+
+    async def delete(chunk: Sequence[int]) -> None:
+        nonlocal last_progress
+        if report.aborted:
+            report.skipped += len(chunk)
+            return
+        if cancel and cancel.is_set():
+            report.cancelled = True
+            report.skipped += len(chunk)
+            return
+
+        for attempt in range(PURGE_MAX_RETRIES + 1):
+            try:
+                await _delete_chunk(bot, chat_id, chunk)
+                report.cleared += len(chunk)
+                break
+            except RetryAfter as e:
+                logger.warning(f"⏳ Flood limit hit during purge, pausing {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+            except TelegramError as e:
+                if is_undeletable_error(e):
+                    logger.debug(f"Bulk delete failed in {chat_id}, deleting one by one: {e}")
+                    await delete_one_by_one(chunk)
+                    break
+                if is_no_rights_error(e):
+                    abort(e)
+                    report.skipped += len(chunk)
+                    return
+                if isinstance(e, NetworkError) and not isinstance(e, BadRequest):
+                    logger.debug(f"Bulk delete in {chat_id} hit a network error, retrying: {e}")
+                    await asyncio.sleep(PURGE_RETRY_DELAY * (attempt + 1))
+                    continue
+                logger.warning(f"⚠️ Bulk delete failed in {chat_id}: {e}")
+                report.failed += len(chunk)
+                break
+        else:
+            report.failed += len(chunk)
+
+        if on_progress and time.monotonic() - last_progress >= PURGE_PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            try:
+                await on_progress(report)
+            except TelegramError as e:
+                logger.debug(f"Purge progress update failed: {e}")
+
+    await fan_out(chunked(message_ids), delete, concurrency)
+    return report
@@ -0,0 +1,273 @@
+# utils/recorder.py
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from telegram import Bot, Update
+from telegram.ext import ContextTypes
+
+from config import RECORD_DIR, RECORD_ANONYMISE, RECORD_FLUSH_THRESHOLD
+from utils.write_behind import WriteBehind
+
+import logging
+logger = logging.getLogger(__name__)
+
+Json = Dict[str, Any]
+
+RECORDING_VERSION = 1
+ANONYMISE_LEVELS = ("none", "ids", "text")
+
+# Personal fields dropped from every object when anonymising
+DROPPED_FIELDS = {"last_name", "phone_number", "bio", "description", "invite_link", "contact", "location", "venue"}
+
+# Other integer fields holding a user or chat id
+ID_FIELDS = ("user_id", "chat_id", "migrate_to_chat_id", "migrate_from_chat_id")
+
+# Entities whose text survives "text" anonymisation; mentions are pseudonymised first
+KEPT_ENTITY_TYPES = {"bot_command", "mention"}
+
+
+def _utf16_slice(text: str, offset: int, length: int) -> str:
+    return text.encode("utf-16-le")[offset * 2:(offset + length) * 2].decode("utf-16-le")
+
+
+def _utf16_replace(text: str, offset: int, length: int, replacement: str) -> str:
+    encoded = text.encode("utf-16-le")
+    return (encoded[:offset * 2] + replacement.encode("utf-16-le") + encoded[(offset + length) * 2:]).decode("utf-16-le")
+
+
+class Anonymiser:
+    """
+    Rewrites update payloads so recordings don't carry personal data.
+
+    "ids" swaps user and chat ids, names and usernames for pseudonyms that
+    are stable within one recording, so replies and @mentions still line up.
+    "text" also blanks message text and captions, keeping their length so
+    entity offsets stay valid. Command names and @mentions are kept.
+
+    Args:
+        level: "none", "ids" or "text"
+        salt: Key for the pseudonyms; random unless given
+    """
+
+    def __init__(self, level: str, salt: Optional[bytes] = None):
+        if level not in ANONYMISE_LEVELS:
+            raise ValueError(f"Unknown anonymisation level: {level}")
+        self.level = level
+        self._salt = salt or os.urandom(16)
+
+    def _digest(self, value: str) -> bytes:
+        return hashlib.blake2b(value.encode(), key=self._salt, digest_size=16).digest()
+
+    def pseudo_id(self, value: int) -> int:
+        pseudo = int.from_bytes(self._digest(str(value))[:8], "big") % 10**12 + 1
+        return -pseudo if value < 0 else pseudo
+
+    def pseudo_username(self, username: str) -> str:
+        # Same length, so @mention entity offsets still hold
+        digest = self._digest(username.lower()).hex()
+        return ("u" + digest)[:len(username)]
+
+    def apply(self, data: Json) -> Json:
+        """Anonymise an update payload in place and return it."""
+        if self.level != "none":
+            self._walk(data)
+        return data
+
+    def _walk(self, node: Any) -> None:
+        if isinstance(node, list):
+            for item in node:
+                self._walk(item)
+            return
+        if not isinstance(node, dict):
+            return
+
+        for key in DROPPED_FIELDS & node.keys():
+            del node[key]
+        # Users and chats, but not bots; polls and callback queries have string ids
+        if isinstance(node.get("id"), int) and not node.get("is_bot") and ("first_name" in node or "type" in node):
+            self._profile(node)
+        for key in ID_FIELDS:
+            if isinstance(node.get(key), int):
+                node[key] = self.pseudo_id(node[key])
+
+        for text_key, entities_key in (("text", "entities"), ("caption", "caption_entities")):
+            if isinstance(node.get(text_key), str):
+                node[text_key] = self._text(node[text_key], node.get(entities_key) or [])
+
+        for value in node.values():
+            self._walk(value)
+
+    def _profile(self, node: Json) -> None:
+        tag = self._digest(str(node["id"])).hex()[:6]
+        node["id"] = self.pseudo_id(node["id"])
+        if "first_name" in node:
+            node["first_name"] = f"User {tag}"
+        if "title" in node:
+            node["title"] = f"Group {tag}"
+        if node.get("username"):
+            node["username"] = self.pseudo_username(node["username"])
+
+    def _text(self, text: str, entities: List[Json]) -> str:
+        for entity in entities:
+            if entity.get("type") == "mention":
+                handle = _utf16_slice(text, entity["offset"], entity["length"])
+                text = _utf16_replace(text, entity["offset"], entity["length"], "@" + self.pseudo_username(handle[1:]))
+            elif entity.get("type") == "text_link" and self.level == "text":
+                entity["url"] = "https://example.invalid"
+        if self.level != "text":
+            return text
+
+        kept = [
+            (entity["offset"], entity["offset"] + entity["length"])
+            for entity in entities if entity.get("type") in KEPT_ENTITY_TYPES
+        ]
+        blanked = []
+        position = 0
+        for char in text:
+            width = 2 if ord(char) > 0xFFFF else 1
+            if char.isspace() or any(start <= position < end for start, end in kept):
+                blanked.append(char)
+            else:
+                blanked.append("x" * width)
+            position += width
+        return "".join(blanked)
+
+
+class UpdateRecorder:
+    """
+    Appends incoming updates to a gzip-compressed NDJSON file.
+
+    The first line is a header describing the recording; every other line
+    holds one update and when it arrived, in seconds since recording began.
+    Lines are buffered and written off the event loop, by the periodic
+    flush job or as soon as enough have piled up. Each write appends a gzip
+    member, which gzip readers treat as one stream.
+    """
+
+    def __init__(
+        self,
+        directory: Path = RECORD_DIR,
+        anonymise: str = RECORD_ANONYMISE,
+        flush_threshold: int = RECORD_FLUSH_THRESHOLD
+    ):
+        self.directory = directory
+        self.anonymise = anonymise
+        self.path: Optional[Path] = None
+        self.recorded = 0
+        self._anonymiser: Optional[Anonymiser] = None
+        self._started = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._writer = WriteBehind(self._save, flush_threshold, "update recording", ordered=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, bot: Bot) -> Path:
+        """
+        Open a new recording.
+
+        Args:
+            bot: The initialized bot; its username is kept so replays can
+                match commands addressed to it
+
+        Returns:
+            Path: The file updates are written to
+        """
+        self._anonymiser = Anonymiser(self.anonymise)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"updates-{datetime.now():%Y%m%d-%H%M%S}.ndjson.gz"
+        self._started = time.monotonic()
+
+        header = {
+            "version": RECORDING_VERSION,
+            "started_at": datetime.now().isoformat(),
+            "anonymise": self.anonymise,
+            "bot_id": bot.id,
+            "bot_username": bot.username,
+        }
+        self._writer.add(json.dumps({"recording": header}))
+        logger.info(f"⏺️ Recording updates to {self.path} (anonymise: {self.anonymise})")
+        return self.path
+
+    def record(self, update: Update) -> None:
+        if not self.enabled:
+            return
+        line = {
+            "t": round(time.monotonic() - self._started, 4),
+            "update": self._anonymiser.apply(update.to_dict()),
+        }
+        self._writer.add(json.dumps(line, ensure_ascii=False, separators=(",", ":")))
+        self.recorded += 1
+
+    # ---------------- Flushing ----------------
+    def _write(self, lines: List[str]) -> None:
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def _save(self, lines: List[str]) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write, lines)
+
+    async def flush(self) -> bool:
+        """Write buffered updates to the recording."""
+        if not self.enabled:
+            return True
+        return await self._writer.flush()
+
+    async def close(self) -> None:
+        if not self.enabled:
+            return
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        logger.info(f"⏹️ Recorded {self.recorded} updates to {self.path}")
+        self.path = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path) if self.path else None, "recorded": self.recorded, "buffered": len(self._writer)}
+
+
+def load_recording(path: Path) -> Tuple[Json, Iterator[Tuple[float, Json]]]:
+    """
+    Open a recording for replay.
+
+    Returns:
+        Tuple[Json, Iterator[Tuple[float, Json]]]: The header, and the
+            (arrival time, update payload) pairs in order
+    """
+    f = gzip.open(path, "rt", encoding="utf-8")
+    first = json.loads(f.readline() or "{}")
+    header = first.get("recording")
+    if header is None or header.get("version") != RECORDING_VERSION:
+        f.close()
+        raise ValueError(f"{path} is not an update recording")
+
+    def entries() -> Iterator[Tuple[float, Json]]:
+        with f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield entry["t"], entry["update"]
+
+    return header, entries()
+
+
+update_recorder = UpdateRecorder()
+
+
+async def record_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Fast-path stage adding each update to the recording."""
+    update_recorder.record(update)
+
+
+async def flush_recording_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job that writes buffered updates to the recording."""
+    await update_recorder.flush()
@@ -0,0 +1,446 @@
+# utils/storage.py
+import json
+import asyncio
+import sqlite3
+from abc import ABC, abstractmethod
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from config import DATA_DIR, STORAGE_BACKEND, STORAGE_FILE
+
+import logging
+logger = logging.getLogger(__name__)
+
+ChatId = Union[str, int]
+
+LEGACY_GROUPS_FILE = DATA_DIR / "groups.json"
+LEGACY_SUDO_FILE = DATA_DIR / "sudo_admins.json"
+
+
+class Storage(ABC):
+    """
+    Interface for persistent bot state.
+
+    Backends store groups, sudo admins, per-chat warns, AFK users, global
+    settings and cached media file_ids.
+    All methods are coroutines so backends can keep blocking I/O off the
+    event loop.
+    """
+
+    @abstractmethod
+    async def open(self) -> None:
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    async def data_version(self) -> Optional[int]:
+        """
+        Marker that changes when another process commits to the store.
+
+        The bot's own writes leave it unchanged. Returns None if the backend
+        can't tell, in which case callers should rely on their own writes.
+        """
+        return None
+
+    # Groups
+    @abstractmethod
+    async def load_groups(self) -> Dict[str, Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def save_groups(self, changed: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    async def groups_active_since(self, since: datetime) -> List[str]:
+        ...
+
+    # Sudo admins
+    @abstractmethod
+    async def load_sudo_admins(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def add_sudo_admin(self, admin: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    async def remove_sudo_admin(self, user_id: int) -> bool:
+        ...
+
+    # Warns
+    @abstractmethod
+    async def get_warns(self, chat_id: ChatId, user_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set_warns(self, chat_id: ChatId, user_id: int, count: int, reasons: List[str]) -> None:
+        ...
+
+    # Settings
+    @abstractmethod
+    async def load_settings(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def set_setting(self, key: str, value: Any) -> None:
+        ...
+
+    # AFK users: user_id -> (since as a unix timestamp, reason)
+    @abstractmethod
+    async def load_afk(self) -> Dict[int, Tuple[float, str]]:
+        ...
+
+    @abstractmethod
+    async def save_afk(self, changed: Dict[int, Tuple[float, str]], removed: Iterable[int] = ()) -> None:
+        ...
+
+    # Telegram file_ids for media sent by URL
+    @abstractmethod
+    async def load_file_ids(self) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    async def set_file_id(self, source_url: str, file_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_file_ids(self, source_urls: Iterable[str]) -> None:
+        ...
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    chat_id INTEGER PRIMARY KEY,
+    title TEXT,
+    last_active TEXT,
+    needs_verification INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_groups_last_active ON groups (last_active);
+CREATE INDEX IF NOT EXISTS idx_groups_needs_verification ON groups (needs_verification);
+
+CREATE TABLE IF NOT EXISTS sudo_admins (
+    user_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    added_date TEXT NOT NULL,
+    added_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS warns (
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    reasons TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (chat_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS afk (
+    user_id INTEGER PRIMARY KEY,
+    since REAL NOT NULL,
+    reason TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS file_ids (
+    source_url TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    cached_at TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite backend running in WAL mode.
+
+    The connection lives on a single worker thread, so every query runs off
+    the event loop and writes from one call share a single transaction.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run(self, fn: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # ---------------- Lifecycle ----------------
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    async def open(self) -> None:
+        if self._conn is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        await self._run(self._open)
+        logger.info(f"🗄️ Storage opened: {self.path}")
+
+    def _close(self) -> None:
+        self._conn.close()
+        self._conn = None
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    async def data_version(self) -> Optional[int]:
+        """SQLite's data_version, which only moves on commits from other connections."""
+        return await self._run(self._data_version)
+
+    # ---------------- Groups ----------------
+    def _load_groups(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._conn.execute("SELECT chat_id, data FROM groups").fetchall()
+        return {str(row["chat_id"]): json.loads(row["data"]) for row in rows}
+
+    async def load_groups(self) -> Dict[str, Dict[str, Any]]:
+        return await self._run(self._load_groups)
+
+    def _save_groups(self, changed: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        with self._conn:
+            if changed:
+                self._conn.executemany(
+                    "INSERT INTO groups (chat_id, title, last_active, needs_verification, data) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(chat_id) DO UPDATE SET title = excluded.title, "
+                    "last_active = excluded.last_active, "
+                    "needs_verification = excluded.needs_verification, data = excluded.data",
+                    [
+                        (
+                            int(chat_id),
+                            info.get("title"),
+                            info.get("last_active"),
+                            int(bool(info.get("needs_verification", False))),
+                            json.dumps(info, ensure_ascii=False),
+                        )
+                        for chat_id, info in changed.items()
+                    ]
+                )
+            if removed:
+                self._conn.executemany(
+                    "DELETE FROM groups WHERE chat_id = ?",
+                    [(int(chat_id),) for chat_id in removed]
+                )
+
+    async def save_groups(self, changed: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()) -> None:
+        await self._run(self._save_groups, changed, list(removed))
+
+    def _groups_active_since(self, since: str) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT chat_id FROM groups WHERE last_active >= ?", (since,)
+        ).fetchall()
+        return [str(row["chat_id"]) for row in rows]
+
+    async def groups_active_since(self, since: datetime) -> List[str]:
+        return await self._run(self._groups_active_since, since.isoformat())
+
+    # ---------------- Sudo admins ----------------
+    def _load_sudo_admins(self) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT user_id, name, added_date, added_by FROM sudo_admins ORDER BY added_date"
+        ).fetchall()
+        return [
+            {"id": row["user_id"], "name": row["name"], "added_date": row["added_date"], "added_by": row["added_by"]}
+            for row in rows
+        ]
+
+    async def load_sudo_admins(self) -> List[Dict[str, Any]]:
+        return await self._run(self._load_sudo_admins)
+
+    def _add_sudo_admin(self, admin: Dict[str, Any]) -> bool:
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sudo_admins (user_id, name, added_date, added_by) VALUES (?, ?, ?, ?)",
+                (int(admin["id"]), admin["name"], admin["added_date"], admin.get("added_by"))
+            )
+        return cursor.rowcount > 0
+
+    async def add_sudo_admin(self, admin: Dict[str, Any]) -> bool:
+        return await self._run(self._add_sudo_admin, admin)
+
+    def _remove_sudo_admin(self, user_id: int) -> bool:
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM sudo_admins WHERE user_id = ?", (int(user_id),))
+        return cursor.rowcount > 0
+
+    async def remove_sudo_admin(self, user_id: int) -> bool:
+        return await self._run(self._remove_sudo_admin, user_id)
+
+    # ---------------- Warns ----------------
+    def _get_warns(self, chat_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT count, reasons FROM warns WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"count": row["count"], "reasons": json.loads(row["reasons"])}
+
+    async def get_warns(self, chat_id: ChatId, user_id: int) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get_warns, int(chat_id), int(user_id))
+
+    def _set_warns(self, chat_id: int, user_id: int, count: int, reasons: List[str]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO warns (chat_id, user_id, count, reasons) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, user_id) DO UPDATE SET count = excluded.count, reasons = excluded.reasons",
+                (chat_id, user_id, count, json.dumps(reasons, ensure_ascii=False))
+            )
+
+    async def set_warns(self, chat_id: ChatId, user_id: int, count: int, reasons: List[str]) -> None:
+        await self._run(self._set_warns, int(chat_id), int(user_id), count, list(reasons))
+
+    # ---------------- Settings ----------------
+    def _load_settings(self) -> Dict[str, Any]:
+        rows = self._conn.execute("SELECT key, value FROM settings").fetchall()
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    async def load_settings(self) -> Dict[str, Any]:
+        return await self._run(self._load_settings)
+
+    def _set_setting(self, key: str, value: Any) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value, ensure_ascii=False))
+            )
+
+    async def set_setting(self, key: str, value: Any) -> None:
+        await self._run(self._set_setting, key, value)
+
+    # ---------------- AFK ----------------
+    def _load_afk(self) -> Dict[int, Tuple[float, str]]:
+        rows = self._conn.execute("SELECT user_id, since, reason FROM afk").fetchall()
+        return {row["user_id"]: (row["since"], row["reason"]) for row in rows}
+
+    async def load_afk(self) -> Dict[int, Tuple[float, str]]:
+        return await self._run(self._load_afk)
+
+    def _save_afk(self, changed: Dict[int, Tuple[float, str]], removed: List[int]) -> None:
+        with self._conn:
+            if changed:
+                self._conn.executemany(
+                    "INSERT INTO afk (user_id, since, reason) VALUES (?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET since = excluded.since, reason = excluded.reason",
+                    [(int(user_id), since, reason) for user_id, (since, reason) in changed.items()]
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM afk WHERE user_id = ?", [(int(user_id),) for user_id in removed])
+
+    async def save_afk(self, changed: Dict[int, Tuple[float, str]], removed: Iterable[int] = ()) -> None:
+        await self._run(self._save_afk, changed, list(removed))
+
+    # ---------------- File ids ----------------
+    def _load_file_ids(self) -> Dict[str, str]:
+        rows = self._conn.execute("SELECT source_url, file_id FROM file_ids ORDER BY cached_at").fetchall()
+        return {row["source_url"]: row["file_id"] for row in rows}
+
+    async def load_file_ids(self) -> Dict[str, str]:
+        return await self._run(self._load_file_ids)
+
+    def _set_file_id(self, source_url: str, file_id: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO file_ids (source_url, file_id, cached_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(source_url) DO UPDATE SET file_id = excluded.file_id, cached_at = excluded.cached_at",
+                (source_url, file_id, datetime.now().isoformat())
+            )
+
+    async def set_file_id(self, source_url: str, file_id: str) -> None:
+        await self._run(self._set_file_id, source_url, file_id)
+
+    def _delete_file_ids(self, source_urls: List[str]) -> None:
+        with self._conn:
+            self._conn.executemany("DELETE FROM file_ids WHERE source_url = ?", [(url,) for url in source_urls])
+
+    async def delete_file_ids(self, source_urls: Iterable[str]) -> None:
+        await self._run(self._delete_file_ids, list(source_urls))
+
+
+BACKENDS = {
+    "sqlite": SQLiteStorage,
+}
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> Storage:
+    """Create the configured storage backend."""
+    try:
+        return BACKENDS[backend](STORAGE_FILE)
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+
+storage = create_storage()
+
+
+async def import_legacy_json(target: Storage) -> bool:
+    """
+    Import groups.json and sudo_admins.json into storage once.
+
+    Nothing is imported while either file fails to decode, so fixing the
+    file and restarting imports both.
+
+    Returns:
+        bool: True if an import ran, False if it had already been done or
+            a file couldn't be read
+    """
+    settings = await target.load_settings()
+    if settings.get("legacy_json_imported"):
+        return False
+
+    # Read both files before writing anything; if either is broken, leave the
+    # flag unset so the import runs again once it's fixed
+    legacy = {}
+    for path in (LEGACY_GROUPS_FILE, LEGACY_SUDO_FILE):
+        if not path.exists():
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                legacy[path] = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Error decoding {path}: {e}. Skipping the JSON import until it is fixed.")
+            return False
+
+    groups = legacy.get(LEGACY_GROUPS_FILE, {})
+    admins = legacy.get(LEGACY_SUDO_FILE, {}).get("admins", [])
+    if groups:
+        await target.save_groups(groups)
+    for admin in admins:
+        await target.add_sudo_admin(admin)
+
+    await target.set_setting("legacy_json_imported", datetime.now().isoformat())
+    logger.info(f"📥 Imported {len(groups)} groups and {len(admins)} sudo admins from JSON files")
+    return True
+
+
+if __name__ == "__main__":
+    async def _main():
+        await storage.open()
+        try:
+            if not await import_legacy_json(storage):
+                print("Nothing imported: the JSON files were already imported or failed to decode.")
+        finally:
+            await storage.close()
+
+    asyncio.run(_main())
@@ -0,0 +1,85 @@
+# utils/sudo_admins.py
+import asyncio
+import time
+from typing import Any, Dict, FrozenSet, Optional
+
+from config import ADMIN_USER_ID, SUDO_RECHECK_INTERVAL
+from utils.storage import Storage, storage
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SudoIndex:
+    """
+    In-memory set of sudo admin ids.
+
+    Loaded once, then kept current by the add/remove methods. Edits made
+    outside the bot are picked up by comparing the storage data version,
+    which the bot's own writes (group flushes, AFK, warns, ...) leave alone.
+    The version is checked at most once per `recheck_interval` seconds, so
+    most membership checks are a plain set lookup that never waits on the
+    storage thread.
+    """
+
+    def __init__(self, backend: Storage, recheck_interval: float = SUDO_RECHECK_INTERVAL):
+        self.backend = backend
+        self.recheck_interval = recheck_interval
+        self._checked_at = float("-inf")
+        self._ids: FrozenSet[int] = frozenset()
+        self._version: Optional[int] = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def reload(self) -> None:
+        async with self._lock:
+            version = await self.backend.data_version()
+            self._checked_at = time.monotonic()
+            admins = await self.backend.load_sudo_admins()
+            self._ids = frozenset(int(admin["id"]) for admin in admins)
+            self._version = version
+            self._loaded = True
+
+    async def _refresh_if_changed(self) -> None:
+        if not self._loaded:
+            await self.reload()
+            return
+        if time.monotonic() - self._checked_at < self.recheck_interval:
+            return
+        self._checked_at = time.monotonic()
+        version = await self.backend.data_version()
+        if version is not None and version != self._version:
+            await self.reload()
+
+    async def contains(self, user_id: int) -> bool:
+        await self._refresh_if_changed()
+        return int(user_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def add(self, admin: Dict[str, Any]) -> bool:
+        """Add a sudo admin. Returns False if already present."""
+        added = await self.backend.add_sudo_admin(admin)
+        if added:
+            self._ids = self._ids | {int(admin["id"])}
+        return added
+
+    async def remove(self, user_id: int) -> bool:
+        """Remove a sudo admin. Returns False if not present."""
+        removed = await self.backend.remove_sudo_admin(user_id)
+        if removed:
+            self._ids = self._ids - {int(user_id)}
+        return removed
+
+
+sudo_index = SudoIndex(storage)
+
+
+async def is_sudo_admin(user_id: int) -> bool:
+    """Check if a user is a sudo admin."""
+    # Bot owner is always a sudo admin
+    if ADMIN_USER_ID and str(user_id) == str(ADMIN_USER_ID):
+        return True
+
+    return await sudo_index.contains(user_id)
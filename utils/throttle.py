@@ -0,0 +1,72 @@
+# utils/throttle.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+from config import BULK_SEND_RATE
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Async token bucket limiting how many calls start per second.
+
+    Waiters are served in arrival order. A RetryAfter from Telegram applies
+    to the whole bot, so pause() stops every waiter until it expires.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def fan_out(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[None]],
+    concurrency: int
+) -> None:
+    """
+    Run worker over items with at most `concurrency` calls in flight.
+
+    Workers pull from one shared iterator, so no task is created per item.
+    Exceptions from the worker propagate; workers should handle their own errors.
+    """
+    iterator = iter(items)
+
+    async def runner():
+        for item in iterator:
+            await worker(item)
+
+    await asyncio.gather(*(runner() for _ in range(max(1, concurrency))))
+
+
+# Shared by every bulk sender (broadcasts and startup notices) so together
+# they stay under Telegram's global limit. Group verification makes getChat
+# calls, not sends, and has its own bucket in bot.py.
+bulk_send_bucket = TokenBucket(BULK_SEND_RATE)
@@ -0,0 +1,79 @@
+# utils/write_behind.py
+import asyncio
+from typing import Any, Awaitable, Callable, Collection, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class WriteBehind:
+    """
+    Collects pending changes and writes them in batches off the hot path.
+
+    Owners add items as they change state in memory. Once `threshold` items
+    are pending a flush is started in the background; a periodic job calls
+    flush() for whatever is left. A failed batch is kept for the next flush.
+
+    Args:
+        write: Coroutine function that stores one batch
+        threshold: Pending items that trigger a background flush
+        label: What is being written, for the error log
+        ordered: Keep every item in order (a list) instead of a set of
+            distinct keys
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Collection[Any]], Awaitable[None]],
+        threshold: int,
+        label: str,
+        ordered: bool = False
+    ):
+        self.write = write
+        self.threshold = threshold
+        self.label = label
+        self.ordered = ordered
+        self._pending = self._empty()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _empty(self) -> Collection[Any]:
+        return [] if self.ordered else set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, item: Any) -> None:
+        if self.ordered:
+            self._pending.append(item)
+        else:
+            self._pending.add(item)
+        if len(self._pending) >= self.threshold:
+            self.schedule()
+
+    def schedule(self) -> None:
+        """Start a background flush unless one is already running."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet (e.g. during startup); the periodic job will pick it up
+            return
+        self._task = loop.create_task(self.flush())
+
+    async def flush(self) -> bool:
+        """Write everything pending as one batch. Returns False if it failed."""
+        async with self._lock:
+            if not self._pending:
+                return True
+
+            batch = self._pending
+            self._pending = self._empty()
+            try:
+                await self.write(batch)
+                return True
+            except Exception as e:
+                logger.error(f"❌ Failed to save {self.label}: {e}")
+                self._pending = batch + self._pending if self.ordered else batch | self._pending
+                return False